@@ -4,25 +4,107 @@ FASTAPI MAIN - REST API endpoints for frontend
 - GET /api/sectors - list all sectors
 - GET /api/price?symbol=AAPL - current price (cache → DB → API)
 - GET /api/history?symbol=AAPL&period=1mo - historical data (cache → DB → API)
+  (&interval=1w|1mo for weekly/monthly candles, &max_points=300 to LTTB-downsample long periods)
+- GET /api/prices?symbols=AAPL,MSFT - current prices, batched (MGET → one IN query → grouped API)
+- GET /api/history/batch?symbols=AAPL,MSFT&period=1y - historical data, batched
+- WS /ws/prices?symbols=AAPL,MSFT - live prices pushed as they change; send
+  {"action": "subscribe" | "unsubscribe", "symbols": [...]} to change the set
+- GET /api/stream/prices?symbols=AAPL,MSFT - the same stream as Server-Sent Events
+  (one producer refreshes each subscribed symbol per interval, services/price_stream.py)
+- GET /api/history/rolling?symbol=AAPL&period=1y&windows=20,60 - history + rolling SMA/volatility/correlation
+- GET /api/analysis/correlation?symbols=AAPL,MSFT&estimator=ledoit_wolf&lookback=252 - cached correlation matrix
+- GET /api/risk/stock/AAPL?period=1y - risk metrics (one vectorized pass over all stocks, cached)
+- GET /api/risk/stocks?symbols=AAPL,MSFT - risk metrics for several/all stocks
+- GET /api/risk/portfolio?symbols=AAPL,MSFT&weights=0.6,0.4 - weighted basket risk
+  (&simulate=true&paths=100000&seed=42 adds Monte Carlo VaR/CVaR)
+- GET /api/predictions/stocks - stocks that have predictions (latest run date)
+- GET /api/predictions/AAPL - 1day/1week/1month/6months predictions from the latest run
+- GET /api/predictions/AAPL/path?horizon=1month - every trading day up to the horizon
+- GET /api/predictions/AAPL/latest - latest predictions vs the current close
+- GET /api/predictions/AAPL/compare?horizon=1week - accuracy of matured predictions per model
+  (prediction_accuracy, refreshed nightly) + the newest predicted vs actual closes
+  (predictions are written by the nightly batch, the API only reads them;
+  &model=linear picks a model, responses report model_name / model_version)
+- POST /api/portfolio/optimize - max_sharpe / min_variance / target_return weights or a frontier
+- GET /api/cache/stats - cache hit/miss counters for this worker
+- GET /api/stream/stats - price stream connections / fan-out counters for this worker
+- GET /api/db/stats - database pool / sync thread usage for this worker
+- GET /api/compute/stats - compute pool queue / job counters for this worker
 - Smart data fetching: checks cache first, then database, then external API
+- Cache misses are coalesced (services/singleflight.py): one load per key,
+  stale values served while a single background refresh runs
 - Returns "source" field so you know where data came from
+- Responses are encoded with orjson; /api/history cache hits splice the stored body
+  bytes into the envelope without decoding them (services/responses.py)
+- JSON GET responses carry a strong ETag (If-None-Match → 304) and large ones are
+  brotli/gzip-compressed per Accept-Encoding
+- Nothing blocking runs on the event loop: DB reads await an AsyncSession (asyncpg),
+  upstream calls use the pooled httpx client, cache calls that reach Redis run in
+  services/cache.py's thread pool (the *_async variants; L1 hits are answered inline),
+  and the remaining sync work (analytics on a sync Session, downsampling) goes
+  through database.db.run_sync()
+- Risk, Monte Carlo, covariance builds and optimization run in the compute process
+  pool (services/compute.py): 503 + Retry-After when it's saturated, 504 on timeout
 """
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.data_fetcher import get_current_price, get_historical_data
-from services.cache import get_cache, set_cache
-from database.db import get_db, init_db
-from database.crud import get_latest_price, get_stock_prices
+from services.data_fetcher import (
+    get_current_price_async, get_historical_data_async, get_grouped_daily_async, close_async_client
+)
+from services.singleflight import load_with_singleflight
+from services.price_stream import (
+    hub as price_hub, start_price_stream, stop_price_stream, get_stream_stats,
+    encode_price, SEND_TIMEOUT, HEARTBEAT_SECONDS
+)
+from services.cache import (
+    start_invalidation_listener, stop_invalidation_listener, get_cache_stats,
+    get_cache, set_cache, get_cache_many_async, set_cache_many_async, get_ttl_async,
+    history_series_key, history_view_key, get_history_body_async, set_history_body_async,
+    history_series_version, HISTORY_SERIES_DAYS
+)
+from services.responses import (
+    RawJSON, spliced_response, EventStreamResponse, JSONResponseMiddleware, get_response_stats
+)
+from services.downsampling import downsample_rows, INTERVALS, MIN_POINTS, MAX_POINTS
+from services.data_fetcher import PERIOD_DAYS
+from database.db import SessionLocal, AsyncSessionLocal, init_db, run_sync, dispose_async_engine, get_pool_stats
+from services.compute import (
+    start_compute_executor, stop_compute_executor, run_compute, get_compute_stats, ComputeBusy, ComputeTimeout
+)
+from database.crud import (
+    get_latest_price_async, get_predictions_async, get_latest_prediction_dates_async,
+    get_prediction_accuracy_async, get_matured_predictions_async
+)
+from database.price_store import get_price_arrays_async, get_price_arrays_many_async
+from services.rolling_stats import (
+    load_rolling_payloads, slice_rolling, rolling_key, ROLLING_CACHE_TTL, WINDOWS as ROLLING_WINDOWS
+)
+from services.ml_predictor import HORIZONS, SERVING_MODELS, horizon_type
+from services.portfolio_optimizer import (
+    optimize_job, MODES as OPTIMIZE_MODES, DEFAULT_FRONTIER_POINTS, MAX_FRONTIER_POINTS
+)
+from services.covariance import (
+    get_covariance, build_covariance_job, submatrix, correlation_from_covariance,
+    ESTIMATORS, DEFAULT_ESTIMATOR, DEFAULT_LOOKBACK
+)
+from services.risk_calculator import (
+    universe_risk_job, portfolio_risk_job,
+    EQUAL_WEIGHT_BENCHMARK, MC_DEFAULT_PATHS, MC_MAX_PATHS, TRADING_DAYS, RISK_FREE_RATE
+)
 from config.stocks import get_all_stocks, get_stock_by_symbol, get_all_sectors, is_valid_symbol
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import asyncio
+import numpy as np
 
-app = FastAPI(title="ML Trading Dashboard API", version="1.0.0")
+app = FastAPI(title="ML Trading Dashboard API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Initialize database on startup
 @app.on_event("startup")
@@ -30,8 +112,24 @@ async def startup_event():
     """Run when the app starts"""
     print("Starting ML Trading Dashboard API...")
     init_db()
+    start_invalidation_listener()
+    start_compute_executor()
+    start_price_stream(refresh_stream_prices)
     print("Ready to accept requests!")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Run when the app stops"""
+    stop_invalidation_listener()
+    stop_compute_executor()
+    await stop_price_stream()
+    await close_async_client()
+    await dispose_async_engine()
+
+# ETag / 304 / compression for JSON responses
+app.add_middleware(JSONResponseMiddleware)
+
 # CORS - allows frontend to call this API
 app.add_middleware(
     CORSMiddleware,
@@ -47,6 +145,43 @@ async def root():
     return {"status": "online", "message": "ML Trading Dashboard API"}
 
 
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """
+    Cache hit/miss counters per tier (in-process L1, Redis) for this worker,
+    plus ETag / compression counters.
+    """
+    return dict(get_cache_stats(), responses=get_response_stats())
+
+
+@app.get("/api/db/stats")
+async def db_stats():
+    """
+    Connections in use / idle in the async and sync pools, and busy sync threads, for this worker.
+    """
+    return get_pool_stats()
+
+
+@app.get("/api/compute/stats")
+async def compute_stats():
+    """
+    Compute pool size, jobs queued or running, and completed / rejected / timed-out counts for this worker.
+    """
+    return get_compute_stats()
+
+
+async def compute(func, *args, **kwargs):
+    """
+    Run a CPU-heavy job in the compute pool; 503 when it's saturated, 504 on timeout.
+    """
+    try:
+        return await run_compute(func, *args, **kwargs)
+    except ComputeBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ComputeTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
 @app.get("/api/stocks")
 async def get_stocks(sector: str = None):
     """
@@ -73,11 +208,215 @@ async def get_sectors():
     return {"sectors": sorted(sectors), "count": len(sectors)}
 
 
+PRICE_CACHE_TTL = 300        # 5 minutes fresh
+PRICE_STALE_TTL = 120        # then served stale for up to 2 more while refreshing
+HISTORY_CACHE_TTL = 6 * 3600 # 6 hours fresh (new bars are appended as they're written)
+HISTORY_STALE_TTL = 900      # then served stale for up to 15 more while refreshing
+
+MAX_BATCH_SYMBOLS = 50
+
+
+def _is_success(data) -> bool:
+    """Only successful payloads are cached (API errors are retried next time)."""
+    return isinstance(data, dict) and data.get("status") == "success"
+
+
+async def _read_latest_price(symbol: str):
+    """DB lookup for /api/price. Returns price data if it's less than 7 days old."""
+    async with AsyncSessionLocal() as db:
+        latest = await get_latest_price_async(db, symbol)
+    if not latest:
+        return None
+    
+    days_old = (datetime.now().date() - latest.date).days
+    if days_old >= 7:
+        return None
+    
+    return {
+        "symbol": symbol,
+        "date": str(latest.date),
+        "open": round(latest.open, 2),
+        "high": round(latest.high, 2),
+        "low": round(latest.low, 2),
+        "close": round(latest.close, 2),
+        "volume": latest.volume,
+        "status": "success",
+        "days_old": days_old
+    }
+
+
+def _series_from_arrays(symbol: str, prices):
+    """History series from newest-first PriceArrays. None if there isn't enough data."""
+    if len(prices) < 30:  # Not enough data
+        return None
+    
+    oldest = prices.date[0] - np.timedelta64(HISTORY_SERIES_DAYS, "D")
+    data = prices.take(prices.date > oldest).to_records()
+    return {"symbol": symbol, "data": data, "count": len(data), "status": "success"}
+
+
+async def _read_history_series(symbol: str):
+    """DB lookup for the full history series. Returns None if there isn't enough data."""
+    async with AsyncSessionLocal() as db:
+        prices = await get_price_arrays_async(db, symbol, limit=HISTORY_SERIES_DAYS)
+    return _series_from_arrays(symbol, prices)
+
+
+async def _read_latest_prices(symbols):
+    """One IN query for /api/prices. Returns {symbol: price data} for prices < 7 days old."""
+    today = datetime.now().date()
+    async with AsyncSessionLocal() as db:
+        arrays = await get_price_arrays_many_async(db, symbols, start_date=today - timedelta(days=6))
+    
+    prices = {}
+    for symbol, symbol_prices in arrays.items():
+        latest = symbol_prices.take(slice(0, 1)).to_records()[0]
+        prices[symbol] = {
+            "symbol": symbol,
+            **latest,
+            "status": "success",
+            "days_old": (today - date.fromisoformat(latest["date"])).days
+        }
+    return prices
+
+
+async def _read_history_series_many(symbols):
+    """One IN query for /api/history/batch. Returns {symbol: series} for symbols with enough data."""
+    # Twice the window so symbols with stale data still get a full series
+    start_date = datetime.now().date() - timedelta(days=2 * HISTORY_SERIES_DAYS)
+    async with AsyncSessionLocal() as db:
+        arrays = await get_price_arrays_many_async(db, symbols, start_date=start_date)
+    
+    series = {symbol: _series_from_arrays(symbol, prices) for symbol, prices in arrays.items()}
+    return {symbol: data for symbol, data in series.items() if data}
+
+
+def slice_history(series: dict, period: str) -> dict:
+    """
+    Cut one period out of a history series (newest first).
+    Periods count calendar days back from the newest bar.
+    """
+    if not _is_success(series):
+        return dict(series, period=period)
+    
+    rows = series["data"]
+    days = PERIOD_DAYS.get(period, 30)
+    cutoff = (date.fromisoformat(rows[0]["date"]) - timedelta(days=days)).isoformat() if rows else ""
+    data = [row for row in rows if row["date"] > cutoff]
+    return {
+        "symbol": series["symbol"],
+        "period": period,
+        "data": data,
+        "count": len(data),
+        "status": "success"
+    }
+
+
+async def load_price(symbol: str):
+    """Database (if recent) → API. Returns (data, source)."""
+    price_data = await _read_latest_price(symbol)
+    if price_data:
+        return price_data, "database"
+    return await get_current_price_async(symbol), "api"
+
+
+async def fetch_history_series(symbol: str):
+    """API only (one 5y request). Returns (series, source)."""
+    data = await get_historical_data_async(symbol, "5y")
+    data.pop("period", None)
+    return data, "api"
+
+
+async def load_history_series(symbol: str):
+    """Database → API (5y). Returns (series, source)."""
+    series = await _read_history_series(symbol)
+    if series:
+        return series, "database"
+    return await fetch_history_series(symbol)
+
+
+def _price_response(symbol: str, data: dict, source: str) -> dict:
+    stock_info = get_stock_by_symbol(symbol)
+    return {
+        "symbol": symbol, 
+        "name": stock_info["name"],
+        "sector": stock_info["sector"],
+        "data": data,
+        "source": source
+    }
+
+
+def downsample_history(symbol: str, series: dict, period: str, interval: str = "1d", max_points: int = None) -> dict:
+    """
+    slice_history(), resampled to interval candles and LTTB-reduced to max_points.
+    Each view is cached next to the raw series and recomputed once the series changes.
+    """
+    if not _is_success(series) or (interval == "1d" and max_points is None):
+        return slice_history(series, period)
+    
+    key = history_view_key(symbol, period, interval, max_points)
+    version = history_series_version(series)
+    cached = get_cache(key)
+    if cached and cached.get("version") == version:
+        return cached
+    
+    view = slice_history(series, period)
+    data = downsample_rows(view["data"], interval, max_points)
+    view = dict(
+        view, data=data, count=len(data), raw_count=view["count"],
+        interval=interval, max_points=max_points, version=version
+    )
+    set_cache(key, view, expire_seconds=HISTORY_CACHE_TTL + HISTORY_STALE_TTL)
+    return view
+
+
+def _history_response(symbol: str, period: str, series: dict, source: str, interval: str = "1d", max_points: int = None) -> dict:
+    stock_info = get_stock_by_symbol(symbol)
+    return {
+        "symbol": symbol,
+        "name": stock_info["name"],
+        "sector": stock_info["sector"],
+        "period": period,
+        "data": downsample_history(symbol, series, period, interval, max_points),
+        "source": source
+    }
+
+
+def _history_body_response(symbol: str, period: str, data: RawJSON, source: str):
+    """_history_response() with the data payload already encoded."""
+    stock_info = get_stock_by_symbol(symbol)
+    return spliced_response({
+        "symbol": symbol,
+        "name": stock_info["name"],
+        "sector": stock_info["sector"],
+        "period": period,
+        "data": data,
+        "source": source
+    })
+
+
+def _parse_symbols(symbols: str):
+    """Comma-separated symbols → de-duplicated upper-case list (400 on unknown symbols)."""
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given.")
+    if len(requested) > MAX_BATCH_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SYMBOLS} symbols per request.")
+    invalid = [s for s in requested if not is_valid_symbol(s)]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid stock symbols: {', '.join(invalid)}. Use /api/stocks to see available stocks."
+        )
+    return requested
+
+
 @app.get("/api/price")
-async def get_price(symbol: str, db: Session = Depends(get_db)):
+async def get_price(symbol: str):
     """
     Get current price for a stock symbol.
     Checks: Cache → Database → API (in that order)
+    Concurrent misses for the same symbol share a single load.
     """
     if not is_valid_symbol(symbol):
         raise HTTPException(
@@ -86,149 +425,823 @@ async def get_price(symbol: str, db: Session = Depends(get_db)):
         )
     
     try:
-        stock_info = get_stock_by_symbol(symbol)
         cache_key = f"price:current:{symbol}"
         
-        # 1. Check cache first (5-minute TTL)
-        cached = get_cache(cache_key)
-        if cached:
-            return {
-                "symbol": symbol,
-                "name": stock_info["name"],
-                "sector": stock_info["sector"],
-                "data": cached,
-                "source": "cache"
-            }
-        
-        # 2. Check database (if recent data exists - within last 7 days)
-        latest = get_latest_price(db, symbol)
-        
-        if latest:
-            days_old = (datetime.now().date() - latest.date).days
-            # Use database data if it's less than 7 days old
-            if days_old < 7:
-                price_data = {
-                    "symbol": symbol,
-                    "date": str(latest.date),
-                    "open": round(latest.open, 2),
-                    "high": round(latest.high, 2),
-                    "low": round(latest.low, 2),
-                    "close": round(latest.close, 2),
-                    "volume": latest.volume,
-                    "status": "success",
-                    "days_old": days_old
-                }
-                # Cache it for next time
-                set_cache(cache_key, price_data, expire_seconds=300)
-                return {
-                    "symbol": symbol,
-                    "name": stock_info["name"],
-                    "sector": stock_info["sector"],
-                    "data": price_data,
-                    "source": "database"
-                }
-        
-        # 3. Fallback to API (and cache the result)
-        data = get_current_price(symbol)
-        if data.get("status") == "success":
-            set_cache(cache_key, data, expire_seconds=300)
+        data, source = await load_with_singleflight(
+            cache_key,
+            lambda: load_price(symbol),
+            ttl=PRICE_CACHE_TTL,
+            stale_ttl=PRICE_STALE_TTL,
+            cacheable=_is_success
+        )
         
-        return {
-            "symbol": symbol, 
-            "name": stock_info["name"],
-            "sector": stock_info["sector"],
-            "data": data,
-            "source": "api"
-        }
+        return _price_response(symbol, data, source)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/api/history")
-async def get_history(symbol: str, period: str = "1mo", db: Session = Depends(get_db)):
+async def get_history(symbol: str, period: str = "1mo", interval: str = "1d", max_points: int = None):
     """
     Get historical price data for a stock symbol.
     Period: 1d, 1w, 1mo, 3mo, 6mo, 1y, 2y, 5y
+    Interval: 1d (daily bars), 1w / 1mo (OHLC candles)
+    max_points: at most this many rows, picked by LTTB on the close (for line charts)
     Checks: Cache → Database → API (in that order)
+    Every period is a slice of one cached 5y series per symbol; each view's encoded
+    body is cached too, and a hit is returned without decoding it.
+    Concurrent misses for the same symbol share a single load.
     """
     if not is_valid_symbol(symbol):
         raise HTTPException(
             status_code=400, 
             detail=f"Invalid stock symbol. Use /api/stocks to see available stocks."
         )
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Invalid interval. Use one of: {', '.join(INTERVALS)}")
+    if max_points is not None and not MIN_POINTS <= max_points <= MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"max_points must be between {MIN_POINTS} and {MAX_POINTS}")
     
+    view = f"{period}:{interval}:{max_points or 'all'}"
     try:
-        stock_info = get_stock_by_symbol(symbol)
-        cache_key = f"history:{symbol}:{period}"
+        body = await get_history_body_async(symbol, view)
+        if body is not None:
+            return _history_body_response(symbol, period, RawJSON.unpack(body), "cache")
         
-        # 1. Check cache first (1-hour TTL)
-        cached = get_cache(cache_key)
-        if cached:
-            return {
-                "symbol": symbol,
-                "name": stock_info["name"],
-                "sector": stock_info["sector"],
-                "period": period,
-                "data": cached.get("data", cached),
-                "source": "cache"
-            }
+        series, source = await load_with_singleflight(
+            history_series_key(symbol),
+            lambda: load_history_series(symbol),
+            ttl=HISTORY_CACHE_TTL,
+            stale_ttl=HISTORY_STALE_TTL,
+            cacheable=_is_success
+        )
+        data = RawJSON.encode(await run_sync(downsample_history, symbol, series, period, interval, max_points))
         
-        # 2. Try to get from database
-        period_days = {
-            "1d": 1, "1w": 7, "1mo": 30, "3mo": 90,
-            "6mo": 180, "1y": 365, "2y": 730, "5y": 1825
+        # Bodies live only while the series is fresh, so stale hits still go through
+        # the singleflight refresh above
+        if _is_success(series):
+            fresh_for = (await get_ttl_async(history_series_key(symbol)) or 0) - HISTORY_STALE_TTL
+            if fresh_for >= 1:
+                await set_history_body_async(symbol, view, data.pack(), fresh_for, history_series_version(series))
+        return _history_body_response(symbol, period, data, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def load_prices(symbols, use_cache: bool = True):
+    """
+    Current prices for several symbols: Cache (one MGET) → Database (one IN query)
+    → API (one grouped-daily request). use_cache=False skips the MGET (the stream
+    producer's refresh); what's loaded is cached either way.
+    
+    Returns:
+        ({symbol: (data, source)}, [symbols not found])
+    """
+    results = {}
+    keys = {f"price:current:{symbol}": symbol for symbol in symbols}
+    
+    # 1. Cache
+    if use_cache:
+        for key, data in (await get_cache_many_async(keys)).items():
+            results[keys[key]] = (data, "cache")
+    missing = [s for s in symbols if s not in results]
+    
+    # 2. Database
+    if missing:
+        db_prices = await _read_latest_prices(missing)
+        await set_cache_many_async(
+            {f"price:current:{s}": data for s, data in db_prices.items()},
+            expire_seconds=PRICE_CACHE_TTL + PRICE_STALE_TTL
+        )
+        results.update({s: (data, "database") for s, data in db_prices.items()})
+        missing = [s for s in missing if s not in results]
+    
+    # 3. API - the whole market's last trading day in one call
+    if missing:
+        api_prices = await get_grouped_daily_async(missing)
+        await set_cache_many_async(
+            {f"price:current:{s}": data for s, data in api_prices.items()},
+            expire_seconds=PRICE_CACHE_TTL + PRICE_STALE_TTL
+        )
+        results.update({s: (data, "api") for s, data in api_prices.items()})
+        missing = [s for s in missing if s not in results]
+    
+    return results, missing
+
+
+async def refresh_stream_prices(symbols):
+    """Price stream producer loader - skips the cache so every cycle sees new bars."""
+    results, _ = await load_prices(symbols, use_cache=False)
+    return results
+
+
+@app.get("/api/prices")
+async def get_prices(symbols: str):
+    """
+    Get current prices for several symbols (comma-separated) in one request.
+    Checks: Cache (one MGET) → Database (one IN query) → API (one grouped-daily request)
+    """
+    requested = _parse_symbols(symbols)
+    
+    try:
+        results, missing = await load_prices(requested)
+        return {
+            "prices": {
+                s: _price_response(s, *results[s]) for s in requested if s in results
+            },
+            "count": len(results),
+            "missing": missing
         }
-        days = period_days.get(period, 30)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/history/batch")
+async def get_history_batch(symbols: str, period: str = "1mo"):
+    """
+    Get historical data for several symbols (comma-separated) in one request.
+    Period: 1d, 1w, 1mo, 3mo, 6mo, 1y, 2y, 5y
+    Checks: Cache (one MGET) → Database (one IN query) → API (per symbol, coalesced)
+    """
+    requested = _parse_symbols(symbols)
+    
+    try:
+        results = {}
+        keys = {history_series_key(symbol): symbol for symbol in requested}
         
-        db_prices = get_stock_prices(db, symbol, limit=days * 2)  # Get more than needed
+        # 1. Cache
+        for key, series in (await get_cache_many_async(keys)).items():
+            results[keys[key]] = (series, "cache")
+        missing = [s for s in requested if s not in results]
         
-        if db_prices and len(db_prices) >= min(days, 30):  # If we have enough data
-            history_data = {
-                "symbol": symbol,
-                "period": period,
-                "data": [
-                    {
-                        "date": str(price.date),
-                        "open": round(price.open, 2),
-                        "high": round(price.high, 2),
-                        "low": round(price.low, 2),
-                        "close": round(price.close, 2),
-                        "volume": price.volume
-                    }
-                    for price in db_prices[:days]
-                ],
-                "count": len(db_prices[:days]),
-                "status": "success"
-            }
-            # Cache it
-            set_cache(cache_key, history_data, expire_seconds=3600)
-            return {
-                "symbol": symbol,
-                "name": stock_info["name"],
-                "sector": stock_info["sector"],
-                "period": period,
-                "data": history_data,
-                "source": "database"
-            }
+        # 2. Database
+        if missing:
+            db_series = await _read_history_series_many(missing)
+            await set_cache_many_async(
+                {history_series_key(s): series for s, series in db_series.items()},
+                expire_seconds=HISTORY_CACHE_TTL + HISTORY_STALE_TTL
+            )
+            results.update({s: (series, "database") for s, series in db_series.items()})
+            missing = [s for s in missing if s not in results]
         
-        # 3. Fallback to API
-        data = get_historical_data(symbol, period)
-        if data.get("status") == "success":
-            set_cache(cache_key, data, expire_seconds=3600)
+        # 3. API - no multi-symbol history endpoint upstream, so one coalesced load each
+        if missing:
+            loaded = await asyncio.gather(*(
+                load_with_singleflight(
+                    history_series_key(s),
+                    lambda s=s: fetch_history_series(s),
+                    ttl=HISTORY_CACHE_TTL,
+                    stale_ttl=HISTORY_STALE_TTL,
+                    cacheable=_is_success
+                )
+                for s in missing
+            ))
+            results.update(dict(zip(missing, loaded)))
         
-        return {
-            "symbol": symbol,
-            "name": stock_info["name"],
-            "sector": stock_info["sector"],
+        # Returned as a response so the large payload skips jsonable_encoder
+        history = await run_sync(lambda: {s: _history_response(s, period, *results[s]) for s in requested})
+        return ORJSONResponse({
             "period": period,
-            "data": data,
-            "source": "api"
-        }
+            "history": history,
+            "count": len(requested)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _stream_symbols(symbols) -> list:
+    """Validate a stream subscription (list or comma-separated). Raises ValueError."""
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    if not isinstance(symbols, list):
+        raise ValueError("symbols must be a list or a comma-separated string")
+    try:
+        return _parse_symbols(",".join(str(s) for s in symbols))
+    except HTTPException as e:
+        raise ValueError(e.detail)
+
+
+async def _stream_subscribe(subscriber, symbols: list) -> list:
+    """Subscribe and queue the current price of each new symbol (from the cache when fresh)."""
+    added = price_hub.subscribe(subscriber, symbols)
+    if added:
+        snapshot, _ = await load_prices(added)
+        for symbol, (data, source) in snapshot.items():
+            subscriber.offer(symbol, encode_price(symbol, data, source))
+    return added
+
+
+async def _ws_receive(websocket: WebSocket, subscriber):
+    """Apply subscribe / unsubscribe messages until the client disconnects."""
+    while True:
+        message = await websocket.receive_json()
+        try:
+            if not isinstance(message, dict) or message.get("action") not in ("subscribe", "unsubscribe"):
+                raise ValueError('Send {"action": "subscribe" | "unsubscribe", "symbols": [...]}')
+            symbols = _stream_symbols(message.get("symbols", []))
+        except ValueError as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            continue
+        if message["action"] == "subscribe":
+            await _stream_subscribe(subscriber, symbols)
+        else:
+            price_hub.unsubscribe(subscriber, symbols)
+        await websocket.send_json({"type": "subscribed", "symbols": sorted(subscriber.symbols)})
+
+
+async def _ws_send_batch(websocket: WebSocket, batch: list):
+    for message in batch:
+        await websocket.send_text(message)
+
+
+async def _ws_send(websocket: WebSocket, subscriber):
+    """Push pending updates; a send blocked for SEND_TIMEOUT drops the connection."""
+    while True:
+        batch = await subscriber.next_batch(timeout=HEARTBEAT_SECONDS)
+        if not batch:
+            batch = ['{"type":"ping"}']
+        await asyncio.wait_for(_ws_send_batch(websocket, batch), SEND_TIMEOUT)
+
+
+@app.websocket("/ws/prices")
+async def stream_prices_ws(websocket: WebSocket, symbols: str = None):
+    """
+    Live prices over a WebSocket. Optional ?symbols= subscribes on connect; each new
+    symbol gets its current price immediately, then updates when the producer sees a change.
+    """
+    await websocket.accept()
+    subscriber = price_hub.connect()
+    tasks = []
+    try:
+        if symbols:
+            try:
+                await _stream_subscribe(subscriber, _stream_symbols(symbols))
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.send_json({"type": "subscribed", "symbols": sorted(subscriber.symbols)})
+        tasks = [
+            asyncio.create_task(_ws_receive(websocket, subscriber)),
+            asyncio.create_task(_ws_send(websocket, subscriber))
+        ]
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                await websocket.close(code=1013)  # too slow to keep up - try again later
+            elif error is not None and not isinstance(error, (WebSocketDisconnect, OSError)):
+                print(f"Price stream connection error: {error}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        price_hub.disconnect(subscriber)
+
+
+@app.get("/api/stream/prices")
+async def stream_prices_sse(request: Request, symbols: str):
+    """
+    Live prices as Server-Sent Events (for clients that can't open a WebSocket).
+    Each update is an `event: price` with the same JSON as /ws/prices; like there,
+    a client that blocks a send for SEND_TIMEOUT is dropped.
+    """
+    requested = _parse_symbols(symbols)
+    subscriber = price_hub.connect()
+    try:
+        await _stream_subscribe(subscriber, requested)
+    except BaseException:
+        # No response is returned, so its on_close never runs
+        price_hub.disconnect(subscriber)
+        raise
+    
+    async def events():
+        while not await request.is_disconnected():
+            batch = await subscriber.next_batch(timeout=HEARTBEAT_SECONDS)
+            # One chunk per batch; a send blocked past SEND_TIMEOUT ends the stream
+            yield "".join(f"event: price\ndata: {message}\n\n" for message in batch) or ": keep-alive\n\n"
+    
+    return EventStreamResponse(
+        events(),
+        send_timeout=SEND_TIMEOUT,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        on_close=lambda: price_hub.disconnect(subscriber)
+    )
+
+
+@app.get("/api/stream/stats")
+async def stream_stats():
+    """
+    Price stream counters for the worker that answers (connections, fan-out, CPU seconds).
+    """
+    return get_stream_stats()
+
+
+def _read_rolling_payloads() -> dict:
+    """Rolling series for every tracked stock in one vectorized pass (the benchmark needs them all)."""
+    db = SessionLocal()
+    try:
+        return load_rolling_payloads(db, [s["symbol"] for s in get_all_stocks()])
+    finally:
+        db.close()
+
+
+async def load_rolling(symbol: str):
+    """
+    Database (full vectorized computation for the whole universe) → cache.
+    Other symbols' payloads are cached on the way so their first request is a hit.
+    """
+    payloads = await run_sync(_read_rolling_payloads)
+    await set_cache_many_async(
+        {rolling_key(s): payload for s, payload in payloads.items() if s != symbol},
+        expire_seconds=ROLLING_CACHE_TTL
+    )
+    return payloads.get(symbol, {"status": "error", "message": f"No price data for {symbol}"}), "database"
+
+
+@app.get("/api/history/rolling")
+async def get_history_rolling(symbol: str, period: str = "1y", windows: str = None):
+    """
+    Historical data plus rolling 20/60/252-day SMA, volatility and correlation
+    with the equal-weight universe.
+    Windows: comma-separated subset of 20,60,252 (default all).
+    Rolling series are kept current by daily_update.py (O(1) per new bar).
+    """
+    if not is_valid_symbol(symbol):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid stock symbol. Use /api/stocks to see available stocks."
+        )
+    symbol = symbol.upper()
+    try:
+        selected = [int(w) for w in windows.split(",")] if windows else list(ROLLING_WINDOWS)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Windows must be integers.")
+    if not set(selected) <= set(ROLLING_WINDOWS):
+        raise HTTPException(status_code=400, detail=f"Windows must be among {', '.join(map(str, ROLLING_WINDOWS))}.")
+    
+    try:
+        (series, source), (rolling, rolling_source) = await asyncio.gather(
+            load_with_singleflight(
+                history_series_key(symbol),
+                lambda: load_history_series(symbol),
+                ttl=HISTORY_CACHE_TTL,
+                stale_ttl=HISTORY_STALE_TTL,
+                cacheable=_is_success
+            ),
+            load_with_singleflight(
+                rolling_key(symbol),
+                lambda: load_rolling(symbol),
+                ttl=ROLLING_CACHE_TTL,
+                cacheable=_is_success,
+                lease_seconds=15.0
+            )
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    
+    if not _is_success(rolling):
+        raise HTTPException(status_code=404, detail=rolling.get("message", "No rolling data"))
+    
+    return ORJSONResponse(dict(
+        await run_sync(_history_response, symbol, period, series, source),
+        rolling=slice_rolling(rolling, PERIOD_DAYS.get(period, 30), selected),
+        rolling_source=rolling_source
+    ))
+
+
+async def load_covariance(estimator: str, lookback: int):
+    """Cached covariance payload, or build it in the compute pool. Returns (payload, source)."""
+    payload = await run_sync(get_covariance, estimator, lookback)
+    if payload is not None:
+        return payload, "cache"
+    return await compute(build_covariance_job, estimator, lookback), "database"
+
+
+@app.get("/api/analysis/correlation")
+async def get_correlation(symbols: str, estimator: str = DEFAULT_ESTIMATOR, lookback: int = DEFAULT_LOOKBACK):
+    """
+    Correlation matrix of daily returns for several stocks (comma-separated).
+    Estimator: sample, ledoit_wolf, ewma. Lookback in trading days.
+    A submatrix of the cached universe matrix (rebuilt daily by daily_update.py).
+    """
+    requested = _parse_symbols(symbols)
+    if estimator not in ESTIMATORS:
+        raise HTTPException(status_code=400, detail=f"Invalid estimator. Use one of: {', '.join(ESTIMATORS)}")
+    if not 20 <= lookback <= 1260:
+        raise HTTPException(status_code=400, detail="lookback must be between 20 and 1260 trading days.")
+    
+    try:
+        payload, source = await load_covariance(estimator, lookback)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not payload:
+        raise HTTPException(status_code=404, detail="No price data available. Run populate_db.py first.")
+    
+    found, _, covariance = submatrix(payload, requested)
+    volatility = np.sqrt(np.diag(covariance) * TRADING_DAYS)
+    return {
+        "symbols": found,
+        "estimator": estimator,
+        "lookback": lookback,
+        "asof": payload["asof"],
+        "observations": payload["observations"],
+        "correlation": np.round(correlation_from_covariance(covariance), 4).tolist(),
+        "volatility": dict(zip(found, np.round(volatility, 4).tolist())),
+        "missing": [s for s in requested if s not in found],
+        "source": source
+    }
+
+
+async def _read_predictions(symbol: str, model: str = None, **filters):
+    """Rows from the requested model, or the first serving model (then its fallbacks) that has any."""
+    async with AsyncSessionLocal() as db:
+        for model_name in [model] if model else SERVING_MODELS:
+            rows = await get_predictions_async(db, symbol, model_name, **filters)
+            if rows:
+                return rows
+        return []
+
+
+async def _read_latest_prediction_dates(model: str = None):
+    async with AsyncSessionLocal() as db:
+        for model_name in [model] if model else SERVING_MODELS:
+            latest = await get_latest_prediction_dates_async(db, model_name)
+            if latest:
+                return model_name, latest
+        return model or SERVING_MODELS[0], {}
+
+
+def _parse_prediction_symbol(symbol: str) -> str:
+    symbol = symbol.upper()
+    if not is_valid_symbol(symbol):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid stock symbol. Use /api/stocks to see available stocks."
+        )
+    return symbol
+
+
+def _prediction_point(row: dict) -> dict:
+    return {
+        "horizon_type": horizon_type(row["horizon_days"]),
+        "horizon_days": row["horizon_days"],
+        "target_date": str(row["target_date"]),
+        "predicted_price": row["predicted_price"],
+        "confidence_score": row["confidence"],
+        "actual_price": row["actual_price"]
+    }
+
+
+def _horizon_predictions(symbol: str, rows: list) -> dict:
+    if not rows:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"No predictions for {symbol}. Run scripts/run_predictions.py first."
+        )
+    return {
+        "symbol": symbol,
+        "model_name": rows[0]["model_name"],
+        "model_version": rows[0]["model_version"],
+        "prediction_date": str(rows[0]["prediction_date"]),
+        "predictions": [_prediction_point(row) for row in rows]
+    }
+
+
+@app.get("/api/predictions/stocks")
+async def get_stocks_with_predictions(model: str = None):
+    """
+    Stocks that have predictions, with the date of their latest run.
+    """
+    model_name, latest = await _read_latest_prediction_dates(model)
+    stocks = [
+        {"symbol": symbol, "name": (get_stock_by_symbol(symbol) or {}).get("name"), "prediction_date": str(run_date)}
+        for symbol, run_date in latest.items()
+    ]
+    return {"stocks": stocks, "count": len(stocks), "model_name": model_name}
+
+
+@app.get("/api/predictions/{symbol}")
+async def get_stock_predictions(symbol: str, prediction_date: date = None, model: str = None):
+    """
+    Predicted close for each horizon (1day, 1week, 1month, 6months) from one run
+    (default: the latest). Read from the predictions table - no inference.
+    Model: default the served model (PREDICTION_MODEL) or its fallbacks;
+    the response names the model_name / model_version it came from.
+    """
+    symbol = _parse_prediction_symbol(symbol)
+    rows = await _read_predictions(symbol, model, prediction_date=prediction_date, horizons=list(HORIZONS.values()))
+    return _horizon_predictions(symbol, rows)
+
+
+@app.get("/api/predictions/{symbol}/path")
+async def get_prediction_path(symbol: str, horizon: str = "1month", prediction_date: date = None, model: str = None):
+    """
+    The predicted close for every trading day up to the horizon, for charting.
+    """
+    symbol = _parse_prediction_symbol(symbol)
+    if horizon not in HORIZONS:
+        raise HTTPException(status_code=400, detail=f"Invalid horizon. Use one of: {', '.join(HORIZONS)}")
+    
+    rows = await _read_predictions(symbol, model, prediction_date=prediction_date, max_horizon=HORIZONS[horizon])
+    result = _horizon_predictions(symbol, rows)
+    return {
+        "symbol": symbol,
+        "horizon": horizon,
+        "model_name": result["model_name"],
+        "model_version": result["model_version"],
+        "prediction_date": result["prediction_date"],
+        "path": result["predictions"],
+        "count": len(rows)
+    }
+
+
+@app.get("/api/predictions/{symbol}/latest")
+async def get_latest_predictions(symbol: str, model: str = None):
+    """
+    Latest run's horizon predictions with the change from the current close.
+    """
+    symbol = _parse_prediction_symbol(symbol)
+    rows = await _read_predictions(symbol, model, horizons=list(HORIZONS.values()))
+    result = _horizon_predictions(symbol, rows)
+    
+    try:
+        price, _ = await load_with_singleflight(
+            f"price:current:{symbol}",
+            lambda: load_price(symbol),
+            ttl=PRICE_CACHE_TTL,
+            stale_ttl=PRICE_STALE_TTL,
+            cacheable=_is_success
+        )
+        current = price.get("close") if _is_success(price) else None
+    except Exception as e:
+        print(f"Current price error for {symbol}: {e}")
+        current = None
+    for point in result["predictions"]:
+        change = point["predicted_price"] - current if current else None
+        point.update(
+            price_change=round(change, 2) if change is not None else None,
+            price_change_pct=round(change / current * 100, 2) if change is not None else None,
+            direction=None if change is None else ("up" if change >= 0 else "down")
+        )
+    return dict(result, current_price=current)
+
+
+COMPARE_MAX_POINTS = 250
+
+
+async def _read_prediction_comparison(symbol: str, horizon_days: int, model: str = None, points: int = 30):
+    async with AsyncSessionLocal() as db:
+        accuracy = await get_prediction_accuracy_async(db, symbol, horizon_days)
+        if model:
+            model_name = model
+        else:
+            scored = {row["model_name"] for row in accuracy}
+            model_name = next((name for name in SERVING_MODELS if name in scored), SERVING_MODELS[0])
+        rows = await get_matured_predictions_async(db, symbol, model_name, horizon_days, limit=points)
+    return model_name, accuracy, rows
+
+
+@app.get("/api/predictions/{symbol}/compare")
+async def compare_predictions(symbol: str, horizon: str = "1week", model: str = None, points: int = 30):
+    """
+    How past predictions at this horizon turned out: MAE / RMSE / MAPE / directional accuracy
+    per model from prediction_accuracy (maintained by scripts/daily_update.py, so this is
+    one small read however many predictions have matured), plus the newest `points`
+    predicted vs actual closes of the served (or requested) model.
+    """
+    symbol = _parse_prediction_symbol(symbol)
+    if horizon not in HORIZONS:
+        raise HTTPException(status_code=400, detail=f"Invalid horizon. Use one of: {', '.join(HORIZONS)}")
+    if not 1 <= points <= COMPARE_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be between 1 and {COMPARE_MAX_POINTS}")
+    
+    model_name, accuracy, rows = await _read_prediction_comparison(symbol, HORIZONS[horizon], model, points)
+    return {
+        "symbol": symbol,
+        "horizon": horizon,
+        "horizon_days": HORIZONS[horizon],
+        "accuracy": [
+            dict(
+                row,
+                mae=round(row["mae"], 4),
+                rmse=round(row["rmse"], 4),
+                mape=round(row["mape"], 3),
+                directional_accuracy=round(row["directional_accuracy"], 4) if row["directional_accuracy"] is not None else None,
+                last_target_date=str(row["last_target_date"]),
+                updated_at=row["updated_at"].isoformat() if row["updated_at"] else None
+            )
+            for row in accuracy
+        ],
+        "model_name": model_name,
+        "comparison": [
+            {
+                "prediction_date": str(row["prediction_date"]),
+                "target_date": str(row["target_date"]),
+                "predicted_price": row["predicted_price"],
+                "actual_price": row["actual_price"],
+                "error": round(row["predicted_price"] - row["actual_price"], 4),
+                "error_pct": round((row["predicted_price"] - row["actual_price"]) / row["actual_price"] * 100, 3),
+                "model_version": row["model_version"]
+            }
+            for row in rows
+        ]
+    }
+
+
+RISK_CACHE_TTL = 3600        # 1 hour fresh (inputs only change once a day)
+RISK_STALE_TTL = 900         # then served stale for up to 15 more while refreshing
+
+
+def _parse_risk_params(period: str, benchmark: str):
+    if period not in PERIOD_DAYS:
+        raise HTTPException(status_code=400, detail=f"Invalid period. Use one of: {', '.join(PERIOD_DAYS)}")
+    if not benchmark or benchmark.strip().lower() == EQUAL_WEIGHT_BENCHMARK:
+        return None
+    benchmark = benchmark.strip().upper()
+    if not is_valid_symbol(benchmark):
+        raise HTTPException(status_code=400, detail=f"Invalid benchmark symbol: {benchmark}")
+    return benchmark
+
+
+async def load_universe_risk(period: str, benchmark: str = None):
+    """Universe risk for one (period, benchmark), computed in the compute pool, coalesced and cached as a whole."""
+    async def load():
+        risk = await compute(universe_risk_job, PERIOD_DAYS[period], benchmark)
+        return dict(risk, period=period), "database"
+    
+    return await load_with_singleflight(
+        f"risk:universe:{period}:{benchmark or EQUAL_WEIGHT_BENCHMARK}",
+        load,
+        ttl=RISK_CACHE_TTL,
+        stale_ttl=RISK_STALE_TTL,
+        cacheable=_is_success
+    )
+
+
+@app.get("/api/risk/stock/{symbol}")
+async def get_stock_risk(symbol: str, period: str = "1y", benchmark: str = None):
+    """
+    Risk metrics for one stock: volatility, VaR/CVaR (historical + parametric),
+    Sharpe, Sortino, beta, max drawdown.
+    Computed for the whole universe in one pass and cached, then sliced per symbol.
+    Benchmark: a tracked symbol, default equal-weight universe.
+    """
+    symbol = symbol.upper()
+    if not is_valid_symbol(symbol):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid stock symbol. Use /api/stocks to see available stocks."
+        )
+    benchmark = _parse_risk_params(period, benchmark)
+    
+    try:
+        risk, source = await load_universe_risk(period, benchmark)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not _is_success(risk) or symbol not in risk["metrics"]:
+        raise HTTPException(status_code=404, detail=f"No price data for {symbol}. Run populate_db.py first.")
+    
+    stock_info = get_stock_by_symbol(symbol)
+    return {
+        "symbol": symbol,
+        "name": stock_info["name"],
+        "sector": stock_info["sector"],
+        "period": period,
+        "benchmark": risk["benchmark"],
+        "confidence": risk["confidence"],
+        "start_date": risk["start_date"],
+        "end_date": risk["end_date"],
+        "metrics": risk["metrics"][symbol],
+        "source": source
+    }
+
+
+@app.get("/api/risk/stocks")
+async def get_stocks_risk(symbols: str = None, period: str = "1y", benchmark: str = None):
+    """
+    Risk metrics for several stocks (comma-separated), default all tracked stocks.
+    """
+    requested = _parse_symbols(symbols) if symbols else None
+    benchmark = _parse_risk_params(period, benchmark)
+    
+    try:
+        risk, source = await load_universe_risk(period, benchmark)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not _is_success(risk):
+        raise HTTPException(status_code=404, detail=risk.get("message", "No price data available"))
+    
+    metrics = risk["metrics"]
+    if requested:
+        metrics = {s: metrics[s] for s in requested if s in metrics}
+    return dict(risk, metrics=metrics, count=len(metrics), source=source)
+
+
+@app.get("/api/risk/portfolio")
+async def get_portfolio_risk(
+    symbols: str,
+    weights: str = None,
+    period: str = "1y",
+    benchmark: str = None,
+    simulate: bool = False,
+    paths: int = MC_DEFAULT_PATHS,
+    seed: int = None,
+    horizon: int = 1
+):
+    """
+    Risk metrics for a weighted basket of stocks plus each holding.
+    Weights: comma-separated, same order as symbols (default equal weights).
+    simulate=true adds Monte Carlo VaR/CVaR over `horizon` trading days
+    (`paths` simulated paths; pass the returned `seed` to reproduce a run).
+    """
+    requested = _parse_symbols(symbols)
+    benchmark = _parse_risk_params(period, benchmark)
+    if simulate and not 1 <= paths <= MC_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"paths must be between 1 and {MC_MAX_PATHS}.")
+    if simulate and not 1 <= horizon <= 30:
+        raise HTTPException(status_code=400, detail="horizon must be between 1 and 30 days.")
+    
+    if weights:
+        try:
+            values = [float(w) for w in weights.split(",")]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Weights must be numbers.")
+        if len(values) != len(requested):
+            raise HTTPException(status_code=400, detail="Give one weight per symbol.")
+    else:
+        values = [1.0] * len(requested)
+    
+    try:
+        risk = await compute(
+            portfolio_risk_job, dict(zip(requested, values)), PERIOD_DAYS[period], benchmark,
+            simulate=simulate, paths=paths, seed=seed, horizon_days=horizon
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not _is_success(risk):
+        raise HTTPException(status_code=400, detail=risk["message"])
+    return dict(risk, period=period)
+
+
+class OptimizeRequest(BaseModel):
+    symbols: List[str]
+    mode: str = "max_sharpe"            # max_sharpe, min_variance, target_return, frontier
+    target_return: Optional[float] = None  # annual, for target_return mode
+    points: int = DEFAULT_FRONTIER_POINTS  # for frontier mode
+    min_weight: float = 0.0
+    max_weight: float = 1.0
+    risk_free_rate: Optional[float] = None
+    estimator: str = DEFAULT_ESTIMATOR
+    lookback: int = DEFAULT_LOOKBACK
+
+
+@app.post("/api/portfolio/optimize")
+async def optimize(request: OptimizeRequest):
+    """
+    Optimal weights for a set of stocks (Modern Portfolio Theory).
+    Uses the day's cached covariance matrix; identical requests are served from cache.
+    Solved in the compute pool, so a long frontier doesn't hold up other requests.
+    """
+    requested = _parse_symbols(",".join(request.symbols))
+    if request.mode not in OPTIMIZE_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid mode. Use one of: {', '.join(OPTIMIZE_MODES)}")
+    if request.estimator not in ESTIMATORS:
+        raise HTTPException(status_code=400, detail=f"Invalid estimator. Use one of: {', '.join(ESTIMATORS)}")
+    if not 2 <= request.points <= MAX_FRONTIER_POINTS:
+        raise HTTPException(status_code=400, detail=f"points must be between 2 and {MAX_FRONTIER_POINTS}.")
+    
+    try:
+        result = await compute(
+            optimize_job,
+            requested,
+            mode=request.mode,
+            target=request.target_return,
+            points=request.points,
+            min_weight=request.min_weight,
+            max_weight=request.max_weight,
+            risk_free_rate=RISK_FREE_RATE if request.risk_free_rate is None else request.risk_free_rate,
+            estimator=request.estimator,
+            lookback=request.lookback
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not _is_success(result):
+        raise HTTPException(status_code=400, detail=result["message"])
+    return result
 
 
 # TODO: We'll build these endpoints next
-# @app.get("/api/prediction")
-# @app.get("/api/risk")
-# @app.post("/api/portfolio/optimize")
+# @app.get("/api/risk/portfolio/{portfolio_id}") - needs the portfolio tables
@@ -3,12 +3,41 @@ DATABASE CRUD OPERATIONS - Create/Read/Update/Delete functions
 - Directly interacts with PostgreSQL database
 - Handles stock prices, predictions, and stock records
 - Used by scripts (populate_db.py, daily_update.py) to save data
+- Reads the API serves have *_async() variants taking an AsyncSession
+  (same statements, awaited on the event loop instead of run in a thread)
 - Different from config/stocks.py which is just a static list
 """
-from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Optional
-from .models import Stock, StockPrice, Prediction
+from sqlalchemy import select, update, delete, func, case, and_, literal
+from sqlalchemy.orm import Session, load_only, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, date as date_type
+from typing import Optional, Union, Sequence, Mapping
+from .models import Stock, StockPrice, Prediction, PredictionAccuracy, BacktestResult
+
+
+# Rows per INSERT statement - keeps bind parameters well under PostgreSQL's 65535 limit
+BULK_CHUNK_SIZE = 5000
+
+OHLCV_FIELDS = ("date", "open", "high", "low", "close", "volume")
+
+# Columns held by ix_stock_prices_stock_date_covering - reading only these is index-only
+PRICE_COLUMNS = (
+    StockPrice.stock_id, StockPrice.date, StockPrice.open, StockPrice.high,
+    StockPrice.low, StockPrice.close, StockPrice.volume
+)
+
+
+def _extend_cached_history(symbol: str, bars):
+    """
+    Append freshly written bars to the cached history series so they show up right away.
+    Cache problems never fail the DB write.
+    """
+    try:
+        from services.cache import extend_history_series
+        extend_history_series(symbol, bars)
+    except Exception as e:
+        print(f"History cache update error: {e}")
 
 
 def get_or_create_stock(db: Session, symbol: str, name: Optional[str] = None) -> Stock:
@@ -52,7 +81,7 @@ def add_stock_price(
             existing.close = close
             existing.volume = volume
             db.commit()
-            return existing
+            price = existing
         else:
             price = StockPrice(
                 stock_id=stock.id,
@@ -66,12 +95,245 @@ def add_stock_price(
             db.add(price)
             db.commit()
             db.refresh(price)
-            return price
+        
+        _extend_cached_history(symbol, [{
+            "date": date, "open": open_price, "high": high,
+            "low": low, "close": close, "volume": volume
+        }])
+        return price
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def _to_date(value) -> date_type:
+    """
+    Normalize a 'YYYY-MM-DD' string, datetime or date into a date.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _iter_ohlcv_rows(records: Union[Sequence[Mapping], Mapping[str, Sequence]]):
+    """
+    Yield (date, open, high, low, close, volume) tuples from either
+    a list of per-bar dicts (data_fetcher format) or a columnar dict of arrays.
+    """
+    if isinstance(records, Mapping):
+        columns = [records[field] for field in OHLCV_FIELDS]
+        yield from zip(*columns)
+    else:
+        for record in records:
+            yield tuple(record[field] for field in OHLCV_FIELDS)
+
+
+def bulk_upsert_stock_prices(
+    db: Session,
+    symbol: str,
+    records: Union[Sequence[Mapping], Mapping[str, Sequence]],
+    name: Optional[str] = None
+) -> int:
+    """
+    Insert or update a whole OHLCV series for one stock in a single transaction.
+    Uses INSERT ... ON CONFLICT (stock_id, date) DO UPDATE, chunked.
+    
+    Args:
+        records: list of {"date", "open", "high", "low", "close", "volume"} dicts,
+                 or a columnar dict mapping those keys to equal-length arrays
+    
+    Returns:
+        Number of rows written
+    """
+    try:
+        stock = get_or_create_stock(db, symbol, name)
+        
+        # Last value wins if the same date shows up twice in one batch
+        rows_by_date = {}
+        for bar_date, open_price, high, low, close, volume in _iter_ohlcv_rows(records):
+            bar_date = _to_date(bar_date)
+            rows_by_date[bar_date] = {
+                "stock_id": stock.id,
+                "date": bar_date,
+                "open": float(open_price),
+                "high": float(high),
+                "low": float(low),
+                "close": float(close),
+                "volume": int(volume),
+                "created_at": datetime.utcnow()
+            }
+        rows = list(rows_by_date.values())
+        
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            stmt = pg_insert(StockPrice).values(rows[start:start + BULK_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[StockPrice.stock_id, StockPrice.date],
+                set_={
+                    "open": stmt.excluded.open,
+                    "high": stmt.excluded.high,
+                    "low": stmt.excluded.low,
+                    "close": stmt.excluded.close,
+                    "volume": stmt.excluded.volume
+                }
+            )
+            db.execute(stmt)
+        
+        db.commit()
+        _extend_cached_history(symbol, rows)
+        return len(rows)
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def bulk_upsert_predictions(db: Session, rows: Sequence[Mapping]) -> int:
+    """
+    Insert or update many predictions (any number of stocks and models) in one transaction.
+    Uses INSERT ... ON CONFLICT (stock_id, prediction_date, target_date, model_name) DO UPDATE, chunked.
+    
+    Args:
+        rows: {"symbol", "prediction_date", "target_date", "predicted_price", "model_name",
+               optional "model_version", "horizon_days", "confidence", "actual_price"} dicts
+    
+    Returns:
+        Number of rows written
+    """
+    try:
+        stock_ids = {
+            symbol: get_or_create_stock(db, symbol).id
+            for symbol in dict.fromkeys(row["symbol"] for row in rows)
+        }
+        now = datetime.utcnow()
+        values = [
+            {
+                "stock_id": stock_ids[row["symbol"]],
+                "prediction_date": _to_date(row["prediction_date"]),
+                "target_date": _to_date(row["target_date"]),
+                "horizon_days": row.get("horizon_days"),
+                "predicted_price": float(row["predicted_price"]),
+                "actual_price": row.get("actual_price"),
+                "model_name": row["model_name"],
+                "model_version": row.get("model_version"),
+                "confidence": row.get("confidence"),
+                "created_at": now
+            }
+            for row in rows
+        ]
+        
+        for start in range(0, len(values), BULK_CHUNK_SIZE):
+            stmt = pg_insert(Prediction).values(values[start:start + BULK_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    Prediction.stock_id, Prediction.prediction_date,
+                    Prediction.target_date, Prediction.model_name
+                ],
+                set_={
+                    "horizon_days": stmt.excluded.horizon_days,
+                    "predicted_price": stmt.excluded.predicted_price,
+                    "confidence": stmt.excluded.confidence,
+                    "model_version": stmt.excluded.model_version,
+                    "created_at": stmt.excluded.created_at
+                }
+            )
+            db.execute(stmt)
+        
+        db.commit()
+        return len(values)
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def bulk_upsert_backtest_results(db: Session, rows: Sequence[Mapping]) -> int:
+    """
+    Insert or update walk-forward backtest metrics in one transaction.
+    Uses INSERT ... ON CONFLICT (run_id, stock_id, model_name, fold, horizon_days) DO UPDATE, chunked.
+    
+    Args:
+        rows: {"run_id", "symbol", "model_name", "fold", "horizon_days", "train_end", "test_start",
+               "test_end", "samples", "mae", "rmse", "directional_accuracy"} dicts
+    
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+    try:
+        stock_ids = {
+            symbol: get_or_create_stock(db, symbol).id
+            for symbol in dict.fromkeys(row["symbol"] for row in rows)
+        }
+        now = datetime.utcnow()
+        metric_columns = ("train_end", "test_start", "test_end", "samples", "mae", "rmse", "directional_accuracy")
+        values = [
+            {
+                "run_id": row["run_id"],
+                "stock_id": stock_ids[row["symbol"]],
+                "model_name": row["model_name"],
+                "fold": int(row["fold"]),
+                "horizon_days": int(row["horizon_days"]),
+                "train_end": _to_date(row["train_end"]),
+                "test_start": _to_date(row["test_start"]),
+                "test_end": _to_date(row["test_end"]),
+                "samples": int(row["samples"]),
+                "mae": float(row["mae"]),
+                "rmse": float(row["rmse"]),
+                "directional_accuracy": float(row["directional_accuracy"]),
+                "created_at": now
+            }
+            for row in rows
+        ]
+        
+        for start in range(0, len(values), BULK_CHUNK_SIZE):
+            stmt = pg_insert(BacktestResult).values(values[start:start + BULK_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[
+                    BacktestResult.run_id, BacktestResult.stock_id, BacktestResult.model_name,
+                    BacktestResult.fold, BacktestResult.horizon_days
+                ],
+                set_={
+                    **{column: stmt.excluded[column] for column in metric_columns},
+                    "created_at": stmt.excluded.created_at
+                }
+            )
+            db.execute(stmt)
+        
+        db.commit()
+        return len(values)
     except Exception as e:
         db.rollback()
         raise e
 
 
+def get_backtest_summary(db: Session, run_id: str) -> list:
+    """
+    Backtest metrics of a run averaged over stocks and folds (weighted by test samples).
+    
+    Returns:
+        [{"model_name", "horizon_days", "stocks", "samples", "mae", "rmse", "directional_accuracy"}]
+    """
+    weight = BacktestResult.samples
+    total = func.sum(weight)
+    stmt = (
+        select(
+            BacktestResult.model_name,
+            BacktestResult.horizon_days,
+            func.count(func.distinct(BacktestResult.stock_id)).label("stocks"),
+            total.label("samples"),
+            (func.sum(BacktestResult.mae * weight) / total).label("mae"),
+            # RMSE pools the squared errors, not the per-fold roots
+            func.sqrt(func.sum(BacktestResult.rmse * BacktestResult.rmse * weight) / total).label("rmse"),
+            (func.sum(BacktestResult.directional_accuracy * weight) / total).label("directional_accuracy"),
+        )
+        .where(BacktestResult.run_id == run_id)
+        .group_by(BacktestResult.model_name, BacktestResult.horizon_days)
+        .order_by(BacktestResult.model_name, BacktestResult.horizon_days)
+    )
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
 def add_prediction(
     db: Session,
     symbol: str,
@@ -83,60 +345,391 @@ def add_prediction(
     actual_price: Optional[float] = None
 ) -> Prediction:
     """
-    Add a new prediction record.
+    Add (or overwrite) a single prediction with one upsert statement.
+    Batch writers should use bulk_upsert_predictions().
     """
     stock = get_or_create_stock(db, symbol)
     
-    existing = db.query(Prediction).filter(
-        Prediction.stock_id == stock.id,
-        Prediction.prediction_date == prediction_date,
-        Prediction.target_date == target_date,
-        Prediction.model_name == model_name
-    ).first()
-    
-    if existing:
-        existing.predicted_price = predicted_price
-        existing.actual_price = actual_price
-        existing.confidence = confidence
-        db.commit()
-        return existing
-    
-    prediction = Prediction(
+    stmt = pg_insert(Prediction).values(
         stock_id=stock.id,
-        prediction_date=prediction_date,
-        target_date=target_date,
+        prediction_date=_to_date(prediction_date),
+        target_date=_to_date(target_date),
         predicted_price=predicted_price,
         actual_price=actual_price,
         model_name=model_name,
-        confidence=confidence
+        confidence=confidence,
+        created_at=datetime.utcnow()
     )
-    db.add(prediction)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            Prediction.stock_id, Prediction.prediction_date,
+            Prediction.target_date, Prediction.model_name
+        ],
+        set_={
+            "predicted_price": stmt.excluded.predicted_price,
+            "actual_price": stmt.excluded.actual_price,
+            "confidence": stmt.excluded.confidence
+        }
+    ).returning(Prediction)
+    
+    prediction = db.scalars(stmt, execution_options={"populate_existing": True}).one()
     db.commit()
-    db.refresh(prediction)
     return prediction
 
 
-def get_stock_prices(db: Session, symbol: str, limit: int = 100):
+PREDICTION_COLUMNS = (
+    Prediction.prediction_date, Prediction.target_date, Prediction.horizon_days,
+    Prediction.predicted_price, Prediction.actual_price, Prediction.confidence,
+    Prediction.model_name, Prediction.model_version
+)
+
+
+def _predictions_select(
+    symbol: str,
+    model_name: str,
+    prediction_date: Optional[date_type] = None,
+    max_horizon: Optional[int] = None,
+    horizons: Optional[Sequence[int]] = None
+):
+    stmt = select(*PREDICTION_COLUMNS).join(Stock, Stock.id == Prediction.stock_id).where(
+        Stock.symbol == symbol,
+        Prediction.model_name == model_name
+    )
+    if prediction_date is None:
+        latest = select(func.max(Prediction.prediction_date)).join(
+            Stock, Stock.id == Prediction.stock_id
+        ).where(Stock.symbol == symbol, Prediction.model_name == model_name).scalar_subquery()
+        stmt = stmt.where(Prediction.prediction_date == latest)
+    else:
+        stmt = stmt.where(Prediction.prediction_date == prediction_date)
+    if max_horizon is not None:
+        stmt = stmt.where(Prediction.horizon_days <= max_horizon)
+    if horizons is not None:
+        stmt = stmt.where(Prediction.horizon_days.in_(list(horizons)))
+    return stmt.order_by(Prediction.target_date)
+
+
+def get_predictions(
+    db: Session,
+    symbol: str,
+    model_name: str,
+    prediction_date: Optional[date_type] = None,
+    max_horizon: Optional[int] = None,
+    horizons: Optional[Sequence[int]] = None
+) -> list:
     """
-    Get historical prices for a stock.
+    One model's predictions for a stock from one run, ordered by target date.
+    A range scan of uq_predictions_stock_date_target_model - no inference here.
+    
+    Args:
+        prediction_date: run date (default: the latest run for this stock and model)
+        max_horizon: only targets up to this many trading days out (a path)
+        horizons: only these trading-day offsets (e.g. 1, 5, 21, 126)
+    
+    Returns:
+        List of dicts with the PREDICTION_COLUMNS keys
     """
-    stock = db.query(Stock).filter(Stock.symbol == symbol).first()
-    if not stock:
-        return []
+    stmt = _predictions_select(symbol, model_name, prediction_date, max_horizon, horizons)
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+async def get_predictions_async(
+    db: AsyncSession,
+    symbol: str,
+    model_name: str,
+    prediction_date: Optional[date_type] = None,
+    max_horizon: Optional[int] = None,
+    horizons: Optional[Sequence[int]] = None
+) -> list:
+    """
+    get_predictions() on an AsyncSession.
+    """
+    stmt = _predictions_select(symbol, model_name, prediction_date, max_horizon, horizons)
+    return [dict(row) for row in (await db.execute(stmt)).mappings()]
+
+
+def _latest_prediction_dates_select(model_name: str):
+    latest = select(func.max(Prediction.prediction_date)).where(
+        Prediction.stock_id == Stock.id,
+        Prediction.model_name == model_name
+    ).scalar_subquery()
+    return select(Stock.symbol, latest).order_by(Stock.symbol)
+
+
+def get_latest_prediction_dates(db: Session, model_name: str) -> dict:
+    """
+    {symbol: latest prediction_date} for every stock that has predictions from this model.
+    One index probe per stock instead of a scan of the whole predictions table.
+    """
+    rows = db.execute(_latest_prediction_dates_select(model_name)).all()
+    return {symbol: latest_date for symbol, latest_date in rows if latest_date is not None}
+
+
+async def get_latest_prediction_dates_async(db: AsyncSession, model_name: str) -> dict:
+    """
+    get_latest_prediction_dates() on an AsyncSession.
+    """
+    rows = (await db.execute(_latest_prediction_dates_select(model_name))).all()
+    return {symbol: latest_date for symbol, latest_date in rows if latest_date is not None}
+
+
+
+ACCURACY_SUMS = (
+    "predictions", "abs_error_sum", "squared_error_sum", "abs_pct_error_sum",
+    "direction_predictions", "direction_hits"
+)
+
+
+def _accuracy_sums(source, now: datetime):
+    """
+    SELECT of PredictionAccuracy rows (running sums) aggregated from `source`,
+    any selectable with the Prediction columns of matured predictions.
+    Direction compares both moves against the close on prediction_date.
+    """
+    base = aliased(StockPrice)
+    error = source.c.predicted_price - source.c.actual_price
+    right_direction = func.sign(source.c.predicted_price - base.close) == func.sign(source.c.actual_price - base.close)
+    return (
+        select(
+            source.c.stock_id, source.c.model_name, source.c.horizon_days,
+            func.count(),
+            func.sum(func.abs(error)),
+            func.sum(error * error),
+            func.sum(func.abs(error) / source.c.actual_price),
+            func.count(base.close),
+            func.sum(case((right_direction, 1), else_=0)),
+            func.max(source.c.target_date),
+            literal(now)
+        )
+        .select_from(source.outerjoin(
+            base, and_(base.stock_id == source.c.stock_id, base.date == source.c.prediction_date)
+        ))
+        .where(source.c.horizon_days.isnot(None), source.c.model_name.isnot(None))
+        .group_by(source.c.stock_id, source.c.model_name, source.c.horizon_days)
+    )
+
+
+_ACCURACY_INSERT_COLUMNS = ["stock_id", "model_name", "horizon_days", *ACCURACY_SUMS, "last_target_date", "updated_at"]
+
+
+def reconcile_predictions(db: Session) -> dict:
+    """
+    Fill actual_price for every matured prediction and add them to prediction_accuracy,
+    in one statement: UPDATE predictions ... FROM stock_prices RETURNING the filled rows,
+    aggregated per (stock, model, horizon) and upserted as running sums.
+    Only rows in ix_predictions_unfilled_target_date are touched, so a night costs
+    the newly matured predictions, not the table size.
+    
+    Returns:
+        {"filled": predictions filled, "groups": accuracy rows updated}
+    """
+    try:
+        filled = (
+            update(Prediction)
+            .where(
+                Prediction.actual_price.is_(None),
+                StockPrice.stock_id == Prediction.stock_id,
+                StockPrice.date == Prediction.target_date
+            )
+            .values(actual_price=StockPrice.close)
+            .returning(
+                Prediction.stock_id, Prediction.model_name, Prediction.horizon_days, Prediction.prediction_date,
+                Prediction.target_date, Prediction.predicted_price, Prediction.actual_price
+            )
+            .cte("filled")
+        )
+        stmt = pg_insert(PredictionAccuracy).from_select(_ACCURACY_INSERT_COLUMNS, _accuracy_sums(filled, datetime.utcnow()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PredictionAccuracy.stock_id, PredictionAccuracy.model_name, PredictionAccuracy.horizon_days],
+            set_={
+                **{column: PredictionAccuracy.__table__.c[column] + stmt.excluded[column] for column in ACCURACY_SUMS},
+                "last_target_date": func.greatest(PredictionAccuracy.last_target_date, stmt.excluded.last_target_date),
+                "updated_at": stmt.excluded.updated_at
+            }
+        )
+        upserted = stmt.returning(PredictionAccuracy.id).cte("upserted")
+        counts = select(
+            select(func.count()).select_from(filled).scalar_subquery(),
+            select(func.count()).select_from(upserted).scalar_subquery()
+        )
+        filled_count, groups = db.execute(counts).one()
+        db.commit()
+        return {"filled": filled_count, "groups": groups}
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def rebuild_prediction_accuracy(db: Session) -> int:
+    """
+    Recompute prediction_accuracy from every matured prediction (full scan).
+    Only needed after matured predictions were rewritten, e.g. a rerun of an old --date.
+    
+    Returns:
+        Number of accuracy rows
+    """
+    try:
+        matured = select(
+            Prediction.stock_id, Prediction.model_name, Prediction.horizon_days, Prediction.prediction_date,
+            Prediction.target_date, Prediction.predicted_price, Prediction.actual_price
+        ).where(Prediction.actual_price.isnot(None)).subquery("matured")
+        db.execute(delete(PredictionAccuracy))
+        result = db.execute(
+            pg_insert(PredictionAccuracy).from_select(_ACCURACY_INSERT_COLUMNS, _accuracy_sums(matured, datetime.utcnow()))
+        )
+        db.commit()
+        return result.rowcount
+    except Exception as e:
+        db.rollback()
+        raise e
+
+
+def _prediction_accuracy_select(symbol: str, horizon_days: int):
+    return (
+        select(PredictionAccuracy)
+        .join(Stock, Stock.id == PredictionAccuracy.stock_id)
+        .where(Stock.symbol == symbol, PredictionAccuracy.horizon_days == horizon_days)
+        .order_by(PredictionAccuracy.model_name)
+    )
+
+
+def _accuracy_rows(rows) -> list:
+    return [
+        {
+            "model_name": row.model_name,
+            "predictions": row.predictions,
+            "mae": row.abs_error_sum / row.predictions,
+            "rmse": (row.squared_error_sum / row.predictions) ** 0.5,
+            "mape": row.abs_pct_error_sum / row.predictions * 100,
+            "directional_accuracy": row.direction_hits / row.direction_predictions if row.direction_predictions else None,
+            "last_target_date": row.last_target_date,
+            "updated_at": row.updated_at
+        }
+        for row in rows
+        if row.predictions
+    ]
+
+
+def get_prediction_accuracy(db: Session, symbol: str, horizon_days: int) -> list:
+    """
+    Accuracy of every model's matured predictions for a stock at one horizon
+    (one index probe per model in prediction_accuracy).
+    
+    Returns:
+        [{"model_name", "predictions", "mae", "rmse", "mape", "directional_accuracy", "last_target_date", "updated_at"}]
+    """
+    return _accuracy_rows(db.execute(_prediction_accuracy_select(symbol, horizon_days)).scalars())
+
+
+async def get_prediction_accuracy_async(db: AsyncSession, symbol: str, horizon_days: int) -> list:
+    """
+    get_prediction_accuracy() on an AsyncSession.
+    """
+    return _accuracy_rows((await db.execute(_prediction_accuracy_select(symbol, horizon_days))).scalars())
+
+
+def _matured_predictions_select(symbol: str, model_name: str, horizon_days: int, limit: int):
+    return (
+        select(*PREDICTION_COLUMNS)
+        .join(Stock, Stock.id == Prediction.stock_id)
+        .where(
+            Stock.symbol == symbol,
+            Prediction.model_name == model_name,
+            Prediction.horizon_days == horizon_days,
+            Prediction.actual_price.isnot(None)
+        )
+        .order_by(Prediction.target_date.desc())
+        .limit(limit)
+    )
+
+
+def get_matured_predictions(db: Session, symbol: str, model_name: str, horizon_days: int, limit: int = 30) -> list:
+    """
+    The newest `limit` predictions with a known actual_price for one stock, model and horizon,
+    oldest first (for predicted-vs-actual charts).
     
-    return db.query(StockPrice).filter(
-        StockPrice.stock_id == stock.id
-    ).order_by(StockPrice.date.desc()).limit(limit).all()
+    Returns:
+        List of dicts with the PREDICTION_COLUMNS keys
+    """
+    stmt = _matured_predictions_select(symbol, model_name, horizon_days, limit)
+    return [dict(row) for row in db.execute(stmt).mappings()][::-1]
+
+
+async def get_matured_predictions_async(
+    db: AsyncSession, symbol: str, model_name: str, horizon_days: int, limit: int = 30
+) -> list:
+    """
+    get_matured_predictions() on an AsyncSession.
+    """
+    stmt = _matured_predictions_select(symbol, model_name, horizon_days, limit)
+    return [dict(row) for row in (await db.execute(stmt)).mappings()][::-1]
+
+
+def _stock_prices_select(
+    symbol: str,
+    limit: Optional[int] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    before: Optional[date_type] = None
+):
+    stmt = select(StockPrice).join(Stock, Stock.id == StockPrice.stock_id).where(
+        Stock.symbol == symbol
+    )
+    if start_date is not None:
+        stmt = stmt.where(StockPrice.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(StockPrice.date <= end_date)
+    if before is not None:
+        stmt = stmt.where(StockPrice.date < before)
+    
+    stmt = stmt.options(load_only(*PRICE_COLUMNS)).order_by(StockPrice.date.desc())
+    return stmt.limit(limit) if limit is not None else stmt
+
+
+def get_stock_prices(
+    db: Session,
+    symbol: str,
+    limit: int = 100,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    before: Optional[date_type] = None
+):
+    """
+    Get historical prices for a stock, newest first.
+    One joined query that range-scans ix_stock_prices_stock_date_covering.
+    
+    Args:
+        limit: max rows to return (page size)
+        start_date / end_date: inclusive date range
+        before: keyset cursor - only rows older than this date
+                (pass the last row's date to get the next page)
+    """
+    return db.scalars(_stock_prices_select(symbol, limit, start_date, end_date, before)).all()
+
+
+async def get_stock_prices_async(
+    db: AsyncSession,
+    symbol: str,
+    limit: int = 100,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    before: Optional[date_type] = None
+):
+    """
+    get_stock_prices() on an AsyncSession.
+    """
+    return (await db.scalars(_stock_prices_select(symbol, limit, start_date, end_date, before))).all()
 
 
 def get_latest_price(db: Session, symbol: str) -> Optional[StockPrice]:
     """
     Get the most recent price for a stock.
     """
-    stock = db.query(Stock).filter(Stock.symbol == symbol).first()
-    if not stock:
-        return None
-    
-    return db.query(StockPrice).filter(
-        StockPrice.stock_id == stock.id
-    ).order_by(StockPrice.date.desc()).first()
+    return db.scalars(_stock_prices_select(symbol, limit=1)).first()
+
+
+async def get_latest_price_async(db: AsyncSession, symbol: str) -> Optional[StockPrice]:
+    """
+    get_latest_price() on an AsyncSession.
+    """
+    return (await db.scalars(_stock_prices_select(symbol, limit=1))).first()
@@ -0,0 +1,99 @@
+"""
+DATABASE MIGRATIONS - Idempotent schema changes for existing databases
+- create_all() only creates missing tables, it never alters existing ones
+- Each migration is plain SQL that is safe to run on every startup
+- Called from init_db() right after create_all()
+- Add new migrations to the end of MIGRATIONS (never edit old ones)
+"""
+from sqlalchemy import text
+
+
+MIGRATIONS = [
+    (
+        "stock_prices_dedupe",
+        # Older databases could hold duplicate (stock_id, date) rows - keep the newest
+        """
+        DELETE FROM stock_prices a
+        USING stock_prices b
+        WHERE a.stock_id = b.stock_id
+          AND a.date = b.date
+          AND a.id < b.id
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_indexes WHERE indexname = 'uq_stock_prices_stock_date'
+          )
+        """,
+    ),
+    (
+        "stock_prices_unique_stock_date",
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_prices_stock_date
+        ON stock_prices (stock_id, date)
+        """,
+    ),
+    (
+        "stock_prices_covering_index",
+        """
+        CREATE INDEX IF NOT EXISTS ix_stock_prices_stock_date_covering
+        ON stock_prices (stock_id, date DESC)
+        INCLUDE (open, high, low, close, volume, id)
+        """,
+    ),
+    (
+        "stock_prices_drop_stock_id_index",
+        # Redundant - stock_id leads the covering index
+        "DROP INDEX IF EXISTS ix_stock_prices_stock_id",
+    ),
+    (
+        "predictions_dedupe",
+        # Per-row inserts could leave duplicate predictions behind - keep the newest
+        """
+        DELETE FROM predictions a
+        USING predictions b
+        WHERE a.stock_id = b.stock_id
+          AND a.prediction_date = b.prediction_date
+          AND a.target_date = b.target_date
+          AND a.model_name IS NOT DISTINCT FROM b.model_name
+          AND a.id < b.id
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_indexes WHERE indexname = 'uq_predictions_stock_date_target_model'
+          )
+        """,
+    ),
+    (
+        "predictions_unique_stock_date_target_model",
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_predictions_stock_date_target_model
+        ON predictions (stock_id, prediction_date, target_date, model_name)
+        """,
+    ),
+    (
+        "predictions_horizon_days",
+        "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS horizon_days INTEGER",
+    ),
+    (
+        "predictions_drop_stock_id_index",
+        # Redundant - stock_id leads the unique index
+        "DROP INDEX IF EXISTS ix_predictions_stock_id",
+    ),
+    (
+        "predictions_model_version",
+        "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS model_version VARCHAR",
+    ),
+    (
+        "predictions_unfilled_target_date_index",
+        """
+        CREATE INDEX IF NOT EXISTS ix_predictions_unfilled_target_date
+        ON predictions (target_date)
+        WHERE actual_price IS NULL
+        """,
+    ),
+]
+
+
+def run_migrations(engine):
+    """
+    Apply every migration in order inside one transaction.
+    """
+    with engine.begin() as conn:
+        for name, sql in MIGRATIONS:
+            conn.execute(text(sql))
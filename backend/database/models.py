@@ -2,10 +2,12 @@
 DATABASE MODELS - Defines the PostgreSQL table structure
 - Stock: stores symbol and company name (50 stocks)
 - StockPrice: stores OHLCV data (24,950 records currently)
-- Prediction: stores ML model predictions (future use)
+- Prediction: stores ML model predictions (nightly batch, services/ml_predictor.py)
+- PredictionAccuracy: running error sums per stock, model and horizon (matured predictions)
+- BacktestResult: walk-forward error metrics per run, stock, model, fold and horizon
 - These are the actual database tables
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -37,9 +39,14 @@ class StockPrice(Base):
     Stores daily stock price data (OHLCV)
     """
     __tablename__ = "stock_prices"
+    __table_args__ = (
+        # One bar per stock per day - lets bulk ingestion use ON CONFLICT upserts
+        UniqueConstraint("stock_id", "date", name="uq_stock_prices_stock_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False, index=True)
+    # Indexed by ix_stock_prices_stock_date_covering below (leading column)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
     date = Column(Date, index=True, nullable=False)
     open = Column(Float, nullable=False)
     high = Column(Float, nullable=False)
@@ -55,19 +62,40 @@ class StockPrice(Base):
         return f"<StockPrice(stock_id={self.stock_id}, date='{self.date}', close={self.close})>"
 
 
+# Newest-first range scans per stock; INCLUDE makes OHLCV reads index-only
+# (id is included too so ORM reads with load_only() never touch the heap)
+Index(
+    "ix_stock_prices_stock_date_covering",
+    StockPrice.stock_id,
+    StockPrice.date.desc(),
+    postgresql_include=["open", "high", "low", "close", "volume", "id"]
+)
+
+
 class Prediction(Base):
     """
     Stores ML model predictions for stock closing prices
     """
     __tablename__ = "predictions"
+    __table_args__ = (
+        # One prediction per stock, run date, target date and model - the nightly
+        # batch upserts with ON CONFLICT, and API reads range-scan this index
+        UniqueConstraint(
+            "stock_id", "prediction_date", "target_date", "model_name",
+            name="uq_predictions_stock_date_target_model"
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False, index=True)
+    # Indexed by uq_predictions_stock_date_target_model (leading column)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
     prediction_date = Column(Date, nullable=False)  # Date we made the prediction
     target_date = Column(Date, nullable=False)  # Date we're predicting for
+    horizon_days = Column(Integer)  # Trading days from prediction_date to target_date
     predicted_price = Column(Float, nullable=False)  # Predicted CLOSING price
-    actual_price = Column(Float)  # Actual CLOSING price (filled in later)
+    actual_price = Column(Float)  # Actual CLOSING price (filled nightly by crud.reconcile_predictions)
     model_name = Column(String)  # e.g., "LSTM", "Random Forest"
+    model_version = Column(String)  # Registry version (services/model_registry.py)
     confidence = Column(Float)  # Model confidence score (0-1)
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -76,3 +104,76 @@ class Prediction(Base):
     
     def __repr__(self):
         return f"<Prediction(stock_id={self.stock_id}, predicted_price={self.predicted_price})>"
+
+
+# Predictions still waiting for their actual close - the nightly backfill
+# (crud.reconcile_predictions) scans only these, not the whole table
+Index(
+    "ix_predictions_unfilled_target_date",
+    Prediction.target_date,
+    postgresql_where=Prediction.actual_price.is_(None)
+)
+
+
+class PredictionAccuracy(Base):
+    """
+    Accuracy summary of matured predictions per stock, model and horizon.
+    Holds running sums (not averages) so each night's newly matured predictions
+    are added without rescanning the predictions table.
+    """
+    __tablename__ = "prediction_accuracy"
+    __table_args__ = (
+        UniqueConstraint(
+            "stock_id", "model_name", "horizon_days",
+            name="uq_prediction_accuracy_stock_model_horizon"
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+    model_name = Column(String, nullable=False)
+    horizon_days = Column(Integer, nullable=False)
+    predictions = Column(Integer, nullable=False, default=0)  # Matured predictions counted
+    abs_error_sum = Column(Float, nullable=False, default=0)  # Σ |predicted - actual| ($)
+    squared_error_sum = Column(Float, nullable=False, default=0)  # Σ (predicted - actual)²
+    abs_pct_error_sum = Column(Float, nullable=False, default=0)  # Σ |predicted - actual| / actual
+    direction_predictions = Column(Integer, nullable=False, default=0)  # With a close on prediction_date
+    direction_hits = Column(Integer, nullable=False, default=0)  # Predicted move had the right sign
+    last_target_date = Column(Date)  # Newest matured target date included
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PredictionAccuracy(stock_id={self.stock_id}, model_name='{self.model_name}', horizon_days={self.horizon_days})>"
+
+
+class BacktestResult(Base):
+    """
+    Walk-forward backtest metrics (services/backtester.py) - one row per
+    run, stock, model, fold and horizon
+    """
+    __tablename__ = "backtest_results"
+    __table_args__ = (
+        # Re-running a fold (resumed run) overwrites its rows via ON CONFLICT
+        UniqueConstraint(
+            "run_id", "stock_id", "model_name", "fold", "horizon_days",
+            name="uq_backtest_results_run_stock_model_fold_horizon"
+        ),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, nullable=False)  # e.g. "wf-2024-06-01"
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+    model_name = Column(String, nullable=False)
+    fold = Column(Integer, nullable=False)
+    horizon_days = Column(Integer, nullable=False)
+    train_end = Column(Date)  # Last training window date
+    test_start = Column(Date)
+    test_end = Column(Date)
+    samples = Column(Integer)  # Test windows in the fold
+    mae = Column(Float)  # Of the cumulative log return
+    rmse = Column(Float)
+    directional_accuracy = Column(Float)  # Share of windows with the right sign (0-1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<BacktestResult(run_id='{self.run_id}', stock_id={self.stock_id}, model_name='{self.model_name}', fold={self.fold})>"
@@ -0,0 +1,234 @@
+"""
+PRICE STORE - Columnar (NumPy) reads of stock_prices
+- Returns OHLCV as one array per field instead of StockPrice ORM objects
+- Uses a Core select of just the indexed columns: no ORM hydration or
+  identity-map tracking, and reads stay index-only on
+  ix_stock_prices_stock_date_covering
+- PriceArrays.to_records() / to_frame() for JSON responses and pandas users
+- get_price_arrays_async() / get_price_arrays_many_async(): same queries on an
+  AsyncSession, for API handlers
+- Used by: /api/history, analytics services (risk, predictions, optimization)
+"""
+from datetime import date as date_type
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Stock, StockPrice
+
+
+PRICE_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "i8"),
+])
+
+
+class PriceArrays(NamedTuple):
+    """
+    OHLCV series for one symbol, one NumPy array per field (all the same length).
+    """
+    symbol: str
+    date: np.ndarray    # datetime64[D]
+    open: np.ndarray    # float64
+    high: np.ndarray    # float64
+    low: np.ndarray     # float64
+    close: np.ndarray   # float64
+    volume: np.ndarray  # int64
+
+    def __len__(self):
+        return len(self.date)
+
+    def take(self, index) -> "PriceArrays":
+        """
+        Subset every field with the same boolean mask, slice or index array.
+        """
+        return PriceArrays(self.symbol, *(values[index] for values in self[1:]))
+
+    @classmethod
+    def from_structured(cls, symbol: str, rows: np.ndarray) -> "PriceArrays":
+        return cls(symbol, *(rows[name] for name in PRICE_DTYPE.names))
+
+    def to_records(self, decimals: int = 2) -> list:
+        """
+        Rows as [{"date", "open", "high", "low", "close", "volume"}, ...] (the API format).
+        Rounding and date formatting are vectorized.
+        """
+        columns = zip(
+            self.date.astype(str).tolist(),
+            np.round(self.open, decimals).tolist(),
+            np.round(self.high, decimals).tolist(),
+            np.round(self.low, decimals).tolist(),
+            np.round(self.close, decimals).tolist(),
+            self.volume.tolist()
+        )
+        return [
+            {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for d, o, h, l, c, v in columns
+        ]
+
+    def to_frame(self):
+        """
+        pandas DataFrame indexed by date.
+        """
+        import pandas as pd
+        return pd.DataFrame(
+            {
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+                "volume": self.volume,
+            },
+            index=pd.DatetimeIndex(self.date, name="date")
+        )
+
+
+def _price_select(
+    symbol: str,
+    limit: Optional[int] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+):
+    stmt = select(
+        StockPrice.date, StockPrice.open, StockPrice.high,
+        StockPrice.low, StockPrice.close, StockPrice.volume
+    ).join(Stock, Stock.id == StockPrice.stock_id).where(Stock.symbol == symbol)
+
+    if start_date is not None:
+        stmt = stmt.where(StockPrice.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(StockPrice.date <= end_date)
+
+    stmt = stmt.order_by(StockPrice.date.asc() if ascending else StockPrice.date.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def get_price_arrays(
+    db: Session,
+    symbol: str,
+    limit: Optional[int] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+) -> PriceArrays:
+    """
+    Get a symbol's OHLCV history as NumPy arrays.
+
+    Args:
+        limit: max rows (most recent first unless ascending=True)
+        start_date / end_date: inclusive date range
+        ascending: oldest first (what rolling/return calculations want)
+
+    Returns:
+        PriceArrays (empty arrays if the symbol has no data)
+    """
+    # Execute on the raw connection - plain tuples, no ORM layer involved
+    rows = db.connection().execute(_price_select(symbol, limit, start_date, end_date, ascending)).all()
+    return _to_arrays(symbol, rows)
+
+
+async def get_price_arrays_async(
+    db: AsyncSession,
+    symbol: str,
+    limit: Optional[int] = None,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+) -> PriceArrays:
+    """
+    get_price_arrays() on an AsyncSession.
+    """
+    connection = await db.connection()
+    rows = (await connection.execute(_price_select(symbol, limit, start_date, end_date, ascending))).all()
+    return _to_arrays(symbol, rows)
+
+
+def _to_arrays(symbol: str, rows) -> PriceArrays:
+    records = np.fromiter(map(tuple, rows), dtype=PRICE_DTYPE, count=len(rows))
+    return PriceArrays.from_structured(symbol, records)
+
+
+def _price_select_many(
+    symbols: list,
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+):
+    date_order = StockPrice.date.asc() if ascending else StockPrice.date.desc()
+    stmt = select(
+        Stock.symbol, StockPrice.date, StockPrice.open, StockPrice.high,
+        StockPrice.low, StockPrice.close, StockPrice.volume
+    ).join(Stock, Stock.id == StockPrice.stock_id).where(Stock.symbol.in_(symbols))
+    if start_date is not None:
+        stmt = stmt.where(StockPrice.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(StockPrice.date <= end_date)
+    return stmt.order_by(Stock.symbol, date_order)
+
+
+def _group_arrays(rows) -> Dict[str, PriceArrays]:
+    """(symbol, date, open, ...) rows sorted by symbol → {symbol: PriceArrays}."""
+    arrays = {}
+    for symbol, group in groupby(rows, key=itemgetter(0)):
+        records = np.fromiter((tuple(row)[1:] for row in group), dtype=PRICE_DTYPE)
+        arrays[symbol] = PriceArrays.from_structured(symbol, records)
+    return arrays
+
+
+def get_price_arrays_many(
+    db: Session,
+    symbols: Iterable[str],
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+) -> Dict[str, PriceArrays]:
+    """
+    Get OHLCV arrays for several symbols with one WHERE symbol IN (...) query.
+
+    Returns:
+        {symbol: PriceArrays} for the symbols that have rows in the range
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+
+    rows = db.connection().execute(_price_select_many(symbols, start_date, end_date, ascending)).all()
+    return _group_arrays(rows)
+
+
+async def get_price_arrays_many_async(
+    db: AsyncSession,
+    symbols: Iterable[str],
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    ascending: bool = False
+) -> Dict[str, PriceArrays]:
+    """
+    get_price_arrays_many() on an AsyncSession.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return {}
+
+    connection = await db.connection()
+    rows = (await connection.execute(_price_select_many(symbols, start_date, end_date, ascending))).all()
+    return _group_arrays(rows)
+
+
+def get_price_frame(db: Session, symbol: str, **kwargs):
+    """
+    Same as get_price_arrays() but as a pandas DataFrame indexed by date.
+    """
+    return get_price_arrays(db, symbol, **kwargs).to_frame()
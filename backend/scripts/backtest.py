@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+BACKTEST SCRIPT - Walk-forward evaluation of the prediction models for all tracked stocks
+- Splits each stock's history into --folds test blocks; every (stock, model, fold)
+  is one task in a process pool (services/backtester.py)
+- Workers read one shared-memory snapshot of the feature store (build it first with
+  scripts/build_features.py) - no stock_prices query, nothing pickled per task
+- MAE / RMSE / directional accuracy per horizon are bulk-upserted to backtest_results
+- Interrupted runs resume from data/checkpoints/backtest_{run_id}.json (tasks are
+  recorded only after their rows are committed); the checkpoint is removed once a run
+  finishes, and without --run-id the newest unfinished run is resumed (else wf-<today>)
+- Run with: docker exec ml_trading_backend python scripts/backtest.py [--models drift,linear] [--workers 4]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import glob
+from datetime import date
+
+from config.stocks import get_all_stocks
+from database.db import SessionLocal, init_db
+from database.crud import bulk_upsert_backtest_results, get_backtest_summary
+from services.backtester import run_backtest, FIT_MODELS, DEFAULT_FOLDS
+from services.fetch_scheduler import Checkpoint, checkpoint_path, CHECKPOINT_DIR
+from services.ml_predictor import HORIZONS, horizon_type
+
+
+def unfinished_run_id():
+    """Run id of the newest backtest checkpoint left behind by an interrupted run, or None."""
+    paths = glob.glob(os.path.join(CHECKPOINT_DIR, "backtest_*.json"))
+    if not paths:
+        return None
+    newest = max(paths, key=os.path.getmtime)
+    return os.path.basename(newest)[len("backtest_"):-len(".json")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the prediction models")
+    parser.add_argument("--run-id", help="Result set name (default: the newest unfinished run, else wf-<today>)")
+    parser.add_argument("--models", default=",".join(FIT_MODELS), help=f"Comma-separated models ({', '.join(FIT_MODELS)})")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: all tracked stocks)")
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS, help="Walk-forward test blocks per stock")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    symbols = args.symbols.upper().split(",") if args.symbols else [s["symbol"] for s in get_all_stocks()]
+    model_names = args.models.split(",")
+
+    if args.run_id is None:
+        args.run_id = (not args.fresh and unfinished_run_id()) or f"wf-{date.today()}"
+    print(f"🏷️  Run id: {args.run_id} (if interrupted, rerun with --run-id {args.run_id} to resume)")
+
+    init_db()
+    checkpoint = Checkpoint(checkpoint_path(f"backtest_{args.run_id}"))
+    if args.fresh:
+        checkpoint.clear()
+    if checkpoint.completed:
+        print(f"↩️  Resuming {args.run_id}: {len(checkpoint.completed)} tasks already done")
+
+    start_time = time.time()
+    db = SessionLocal()
+
+    def save(keys, rows):
+        bulk_upsert_backtest_results(db, [dict(row, run_id=args.run_id) for row in rows])
+        checkpoint.mark_done_many(keys)
+
+    def report(done, total):
+        if done == total or done % max(total // 20, 1) == 0:
+            elapsed = time.time() - start_time
+            eta = elapsed / done * (total - done)
+            print(f"   {done}/{total} tasks ({done / total:.0%}) - {elapsed:.0f}s elapsed, ~{eta:.0f}s left")
+
+    try:
+        print(f"🔁 Backtesting {len(symbols)} stocks × {', '.join(model_names)} × {args.folds} folds on {args.workers} workers")
+        result = run_backtest(
+            symbols, model_names, folds=args.folds, workers=args.workers,
+            skip=checkpoint.completed, on_results=save, progress=report
+        )
+        summary = get_backtest_summary(db, args.run_id)
+        checkpoint.clear()
+    except Exception as e:
+        print(f"❌ Backtest failed: {e}")
+        print(f"   Resume with: python scripts/backtest.py --run-id {args.run_id}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ {result['tasks']} tasks, {result['rows']:,} result rows ({result['skipped']} skipped from checkpoint)")
+    print(f"\n{'model':<10} {'horizon':<8} {'stocks':>6} {'samples':>9} {'MAE':>8} {'RMSE':>8} {'direction':>10}")
+    for row in summary:
+        if row["horizon_days"] in HORIZONS.values():
+            print(
+                f"{row['model_name']:<10} {horizon_type(row['horizon_days']):<8} {row['stocks']:>6} {row['samples']:>9,} "
+                f"{row['mae']:>8.4f} {row['rmse']:>8.4f} {row['directional_accuracy']:>10.1%}"
+            )
+    print(f"Time: {time.time() - start_time:.1f}s")
@@ -0,0 +1,86 @@
+"""
+CACHE SERIALIZATION BENCHMARK - Bytes stored and encode/decode time per period
+- Builds synthetic history payloads shaped like /api/history responses
+- Compares legacy json.dumps, orjson, columnar and columnar + compression
+- No Redis or database needed
+- Run with: python scripts/bench_cache_serialization.py [--repeat 200]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from services.data_fetcher import PERIOD_DAYS
+from services.serializers import Serializer, CODEC_ORJSON, CODEC_COLUMNAR, _COMPRESSORS, _COMPRESSION_NAMES
+
+
+class LegacyJson:
+    """What set_cache stored before services/serializers.py existed."""
+
+    @staticmethod
+    def encode(value):
+        return json.dumps(value).encode()
+
+    @staticmethod
+    def decode(raw):
+        return json.loads(raw)
+
+
+def make_history(symbol: str, period: str) -> dict:
+    """Random-walk OHLCV rows, one per weekday, newest first."""
+    days = PERIOD_DAYS[period]
+    rows = []
+    price = 100.0
+    day = date.today()
+    while len(rows) < days * 252 // 365 or not rows:
+        if day.weekday() < 5:
+            price *= 1 + random.gauss(0, 0.015)
+            rows.append({
+                "date": day.isoformat(),
+                "open": round(price * 0.995, 2),
+                "high": round(price * 1.01, 2),
+                "low": round(price * 0.99, 2),
+                "close": round(price, 2),
+                "volume": random.randint(1_000_000, 80_000_000)
+            })
+        day -= timedelta(days=1)
+    return {"symbol": symbol, "period": period, "data": rows, "count": len(rows), "status": "success"}
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark cache serializers for history payloads")
+    parser.add_argument("--repeat", type=int, default=200, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    serializers = {
+        "json (legacy)": LegacyJson,
+        "orjson": Serializer(CODEC_ORJSON),
+        "columnar": Serializer(CODEC_COLUMNAR),
+    }
+    for name, flag in _COMPRESSION_NAMES.items():
+        if flag in _COMPRESSORS:
+            serializers[f"columnar+{name}"] = Serializer(CODEC_COLUMNAR, compression=name)
+
+    print(f"{'period':<6} {'format':<16} {'bytes':>10} {'encode µs':>11} {'decode µs':>11}")
+    for period in PERIOD_DAYS:
+        payload = make_history("AAPL", period)
+        for name, serializer in serializers.items():
+            raw = serializer.encode(payload)
+            assert serializer.decode(raw) == payload, f"{name} round trip mismatch"
+            encode_us = time_per_call(lambda: serializer.encode(payload), args.repeat)
+            decode_us = time_per_call(lambda: serializer.decode(raw), args.repeat)
+            print(f"{period:<6} {name:<16} {len(raw):>10,} {encode_us:>11,.1f} {decode_us:>11,.1f}")
+        print()
@@ -0,0 +1,111 @@
+"""
+COMPUTE OFFLOAD BENCHMARK - /api/price latency while heavy analytics run
+- Phase 1 (baseline): --light clients loop GET /api/price for --seconds
+- Phase 2 (loaded): the same, plus --heavy clients looping uncached analytics:
+  * GET /api/risk/portfolio?simulate=true (no seed → a fresh Monte Carlo run each time)
+  * POST /api/portfolio/optimize in frontier mode (random max_weight → never memoized)
+- Reports /api/price req/s and p50/p99/max for both phases, and how the heavy
+  requests ended (200 / 503 saturated / 504 timed out)
+- Run it against one uvicorn worker started twice to compare:
+  COMPUTE_WORKERS=0 (jobs in threads, sharing the GIL with the event loop)
+  and the default pool (jobs in separate processes)
+- Run with: python scripts/bench_compute_offload.py --url http://localhost:8000 --heavy 8 --light 16
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from config.stocks import get_all_stocks
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def light_client(client: httpx.AsyncClient, symbols, deadline: float, latencies: list, offset: int):
+    i = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get("/api/price", params={"symbol": symbols[i % len(symbols)]})
+        latencies.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+async def heavy_client(client: httpx.AsyncClient, symbols, deadline: float, outcomes: dict, args, rng: random.Random):
+    while time.perf_counter() < deadline:
+        basket = rng.sample(symbols, args.basket)
+        try:
+            if rng.random() < 0.5:
+                response = await client.get("/api/risk/portfolio", params={
+                    "symbols": ",".join(basket), "simulate": "true", "paths": args.paths, "horizon": 10
+                })
+            else:
+                response = await client.post("/api/portfolio/optimize", json={
+                    "symbols": basket, "mode": "frontier", "points": args.points,
+                    "max_weight": round(rng.uniform(0.3, 1.0), 4)
+                })
+            status = response.status_code
+        except httpx.HTTPError:
+            status = "error"
+        outcomes[status] = outcomes.get(status, 0) + 1
+
+
+async def run_phase(client: httpx.AsyncClient, symbols, args, heavy: int):
+    latencies, outcomes = [], {}
+    rng = random.Random(args.seed)
+    deadline = time.perf_counter() + args.seconds
+    wall_start = time.perf_counter()
+    await asyncio.gather(
+        *(light_client(client, symbols, deadline, latencies, i) for i in range(args.light)),
+        *(heavy_client(client, symbols, deadline, outcomes, args, rng) for _ in range(heavy))
+    )
+    wall = time.perf_counter() - wall_start
+    return len(latencies) / wall, latencies, outcomes
+
+
+async def run(args):
+    symbols = [s["symbol"] for s in get_all_stocks()]
+    connections = args.light + args.heavy + 4
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        # Warm the price cache so /api/price is a pure event-loop request
+        await asyncio.gather(*(client.get("/api/price", params={"symbol": s}) for s in symbols))
+        stats = (await client.get("/api/compute/stats")).json() if args.stats else {}
+        print(f"Compute pool: {stats.get('mode', '?')} ({stats.get('workers', '?')} workers) - "
+              f"{args.light} /api/price clients, {args.heavy} analytics clients, {args.seconds:.0f}s per phase\n")
+
+        print(f"{'phase':<9} {'price req/s':>12} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  analytics")
+        for phase, heavy in (("baseline", 0), ("loaded", args.heavy)):
+            rate, latencies, outcomes = await run_phase(client, symbols, args, heavy)
+            print(f"{phase:<9} {rate:>12,.0f} {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f} "
+                  f"{max(latencies):>8.1f}  {outcomes or '-'}")
+
+        if args.stats:
+            print(f"\nCompute stats: {(await client.get('/api/compute/stats')).json()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /api/price latency under heavy analytics load")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--light", type=int, default=16, help="Concurrent /api/price clients")
+    parser.add_argument("--heavy", type=int, default=8, help="Concurrent analytics clients")
+    parser.add_argument("--seconds", type=float, default=20, help="Seconds per phase")
+    parser.add_argument("--basket", type=int, default=10, help="Symbols per analytics request")
+    parser.add_argument("--paths", type=int, default=200_000, help="Monte Carlo paths per risk request")
+    parser.add_argument("--points", type=int, default=50, help="Frontier points per optimize request")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the request mix")
+    parser.add_argument("--no-stats", dest="stats", action="store_false",
+                        help="Don't read /api/compute/stats (servers without the endpoint)")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
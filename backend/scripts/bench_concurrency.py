@@ -0,0 +1,99 @@
+"""
+CONCURRENCY BENCHMARK - throughput vs concurrent clients on one worker
+- For each level in --levels, runs that many clients in a closed loop for --seconds,
+  each sending its next GET as soon as the previous one returns
+- The default path, /api/predictions/{symbol}, isn't cached, so every request is a
+  database read - the part that used to block the event loop
+- Reports req/s, p50/p99 latency, speedup over one client and the async pool's
+  connections in use at the end of each level (from /api/db/stats)
+- Throughput should grow with clients until the pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+  or Postgres saturates; a server that blocks the loop stays flat at 1 client's rate
+- Run it against a server built from the old and the new code to compare,
+  with one uvicorn worker (--workers 1)
+- Run with: python scripts/bench_concurrency.py --url http://localhost:8000 --levels 1,2,4,8,16,32,64
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from config.stocks import get_all_stocks
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def pool_in_use(client: httpx.AsyncClient):
+    try:
+        return (await client.get("/api/db/stats")).json()["async"]["checked_out"]
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None  # older servers don't have the endpoint
+
+
+async def run_level(client: httpx.AsyncClient, path: str, symbols, clients: int, seconds: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset: int):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            symbol = symbols[i % len(symbols)]
+            i += clients
+            start = time.perf_counter()
+            try:
+                response = await client.get(path.format(symbol=symbol), params={"symbol": symbol})
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    workers = [asyncio.create_task(worker(i)) for i in range(clients)]
+    await asyncio.sleep(seconds * 0.9)
+    in_use = await pool_in_use(client)
+    await asyncio.gather(*workers)
+    wall = time.perf_counter() - wall_start
+    return len(latencies) / wall, latencies, errors, in_use
+
+
+async def run(args):
+    symbols = [s["symbol"] for s in get_all_stocks()]
+    levels = [int(level) for level in args.levels.split(",")]
+    limits = httpx.Limits(max_connections=max(levels) + 1, max_keepalive_connections=max(levels) + 1)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        # Warm-up: open connections and load anything lazily initialized server-side
+        await asyncio.gather(*(
+            client.get(args.path.format(symbol=s), params={"symbol": s}) for s in symbols[:max(levels)]
+        ))
+        print(f"{args.path} - {args.seconds:.0f}s per level\n")
+        print(f"{'clients':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'pool in use':>12}")
+
+        baseline = None
+        for clients in levels:
+            rate, latencies, errors, in_use = await run_level(client, args.path, symbols, clients, args.seconds)
+            baseline = baseline or rate
+            print(f"{clients:>7} {rate:>9,.0f} {rate / baseline:>7.1f}x {percentile(latencies, 50):>8.1f} "
+                  f"{percentile(latencies, 99):>8.1f} {errors:>7} {in_use if in_use is not None else '-':>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark throughput vs concurrent clients")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", default="/api/predictions/{symbol}", help="Endpoint path ({symbol} is filled in)")
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64", help="Comma-separated client counts")
+    parser.add_argument("--seconds", type=float, default=10, help="Seconds per level")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
@@ -0,0 +1,57 @@
+"""
+COVARIANCE BENCHMARK - Per-request recompute vs the cached packed matrix
+- Recompute: estimate the covariance from a (lookback × 50) return matrix per request
+- Cached: decode the packed cov:* entry and take a submatrix for the requested symbols
+- Also prints stored bytes for the packed format vs orjson
+- Synthetic returns, no database or Redis needed
+- Run with: python scripts/bench_covariance.py [--symbols 50 --lookback 756]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import numpy as np
+
+from services.covariance import ESTIMATORS, estimate_covariance, submatrix
+from services.serializers import Serializer, MATRIX_SERIALIZER, CODEC_ORJSON
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark covariance recompute vs cached submatrix")
+    parser.add_argument("--symbols", type=int, default=50, help="Universe size")
+    parser.add_argument("--lookback", type=int, default=756, help="Trading days")
+    parser.add_argument("--subset", type=int, default=10, help="Symbols per request")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per measurement")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    market = rng.normal(0.0004, 0.01, size=(args.lookback, 1))
+    returns = market * rng.uniform(0.5, 1.5, size=args.symbols) + rng.normal(0, 0.015, size=(args.lookback, args.symbols))
+    symbols = [f"SYM{i:02d}" for i in range(args.symbols)]
+    requested = symbols[::max(1, args.symbols // args.subset)][:args.subset]
+
+    estimate_covariance(returns, "ledoit_wolf")  # import scikit-learn outside the timing
+    print(f"{args.symbols} symbols × {args.lookback} days, {len(requested)}-symbol requests\n")
+    print(f"{'estimator':<12} {'recompute ms':>13} {'cached ms':>10} {'packed B':>9} {'orjson B':>9}")
+    for estimator in ESTIMATORS:
+        mean, covariance = estimate_covariance(returns, estimator)
+        payload = {"estimator": estimator, "symbols": symbols, "mean": mean, "matrix": covariance}
+        packed = MATRIX_SERIALIZER.encode(payload)
+        as_json = Serializer(CODEC_ORJSON).encode(payload)
+        assert np.allclose(Serializer.decode(packed)["matrix"], covariance)
+
+        recompute_ms = time_per_call(lambda: estimate_covariance(returns, estimator), args.repeat)
+        cached_ms = time_per_call(lambda: submatrix(Serializer.decode(packed), requested), args.repeat)
+        print(f"{estimator:<12} {recompute_ms:>13.3f} {cached_ms:>10.3f} {len(packed):>9,} {len(as_json):>9,}")
+    print("\nRecompute excludes the stock_prices read (~10⁴-10⁵ rows) a request would also need.")
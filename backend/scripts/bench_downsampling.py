@@ -0,0 +1,87 @@
+"""
+DOWNSAMPLING BENCHMARK - /api/history payloads for a 5y period, raw vs downsampled
+- Synthetic 5 years of daily bars (1,260 rows), same row format as the history cache
+- Per view: rows, JSON bytes and encode time as FastAPI does it (jsonable_encoder +
+  json.dumps), time to compute the view, and how far the drawn line strays from the
+  raw closes (max error of the view's close line interpolated at every raw bar,
+  as % of the price range)
+- Views: raw daily, weekly / monthly candles (interval), LTTB to --points (max_points)
+- Run with: python scripts/bench_downsampling.py [--days 1260 --points 300]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from services.downsampling import downsample_rows
+
+
+def synthetic_rows(days: int, seed: int = 11) -> list:
+    """Newest-first daily OHLCV rows, like a cached history series."""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64("2020-01-02"), np.arange(days), roll="forward").astype(str)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, days)))
+    open_ = close * np.exp(rng.normal(0, 0.005, days))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, days))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, days))
+    volume = rng.integers(1_000_000, 50_000_000, days)
+    rows = [
+        {"date": dates[i], "open": round(open_[i], 2), "high": round(high[i], 2), "low": round(low[i], 2),
+         "close": round(close[i], 2), "volume": int(volume[i])}
+        for i in range(days)
+    ]
+    return rows[::-1]
+
+
+def best_ms(fn, repeat: int = 20):
+    """Result of fn and its best wall time in ms over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return result, best
+
+
+def line_error_pct(raw: list, view: list) -> float:
+    """Max |raw close - view close line| at every raw date, as % of the raw price range."""
+    raw_x = np.array([r["date"] for r in raw[::-1]], dtype="datetime64[D]").astype(float)
+    raw_y = np.array([r["close"] for r in raw[::-1]])
+    view_x = np.array([r["date"] for r in view[::-1]], dtype="datetime64[D]").astype(float)
+    view_y = np.array([r["close"] for r in view[::-1]])
+    drawn = np.interp(raw_x, view_x, view_y)
+    return float(np.abs(drawn - raw_y).max() / (raw_y.max() - raw_y.min()) * 100)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history downsampling")
+    parser.add_argument("--days", type=int, default=1260, help="Trading days (5y = 1260)")
+    parser.add_argument("--points", type=int, default=300, help="max_points for the LTTB view")
+    args = parser.parse_args()
+
+    raw = synthetic_rows(args.days)
+    views = {
+        "raw (1d)": ("1d", None),
+        "interval=1w": ("1w", None),
+        "interval=1mo": ("1mo", None),
+        f"max_points={args.points}": ("1d", args.points),
+        f"max_points={args.points // 2}": ("1d", args.points // 2),
+    }
+
+    print(f"📊 {args.days} daily bars\n")
+    print(f"{'view':<16} {'rows':>6} {'JSON KB':>8} {'encode ms':>10} {'compute ms':>11} {'line error':>11}")
+    for label, (interval, max_points) in views.items():
+        rows, compute_ms = best_ms(lambda: downsample_rows(raw, interval, max_points))
+        payload = {"symbol": "SYN", "period": "5y", "data": {"data": rows, "count": len(rows)}}
+        body, encode_ms = best_ms(lambda: json.dumps(jsonable_encoder(payload)).encode())
+        print(
+            f"{label:<16} {len(rows):>6} {len(body) / 1024:>8.1f} {encode_ms:>10.2f} {compute_ms:>11.2f} "
+            f"{line_error_pct(raw, rows):>10.2f}%"
+        )
+    print(f"\nCached views skip the compute column; the frontend draws `rows` points instead of {args.days}.")
@@ -0,0 +1,81 @@
+"""
+FEATURE STORE BENCHMARK - Recompute-per-run vs the memory-mapped feature store
+- Full build: compute_features() for N symbols × 5 years (what every training run did)
+- Daily append: recompute the TAIL_BARS warm-up tail and append one new date
+- Read: memory-map every partition and slice out a 60-row inference window / all rows
+- Checks the appended row matches a full recompute (EMA warm-up error)
+- Synthetic prices in a temporary DATA_DIR, no database needed
+- Run with: python scripts/bench_feature_store.py [--symbols 50 --days 1260]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from database.price_store import PriceArrays
+import services.feature_store as feature_store
+
+
+def synthetic_arrays(symbols: int, days: int, seed: int = 3) -> dict:
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64("2019-01-02"), np.arange(days), roll="forward")
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, size=(days, symbols)), axis=0))
+    volumes = rng.integers(1_000_000, 50_000_000, size=(days, symbols))
+    return {
+        f"SYM{j:02d}": PriceArrays(f"SYM{j:02d}", dates, closes[:, j], closes[:, j], closes[:, j], closes[:, j], volumes[:, j])
+        for j in range(symbols)
+    }
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the feature store")
+    parser.add_argument("--symbols", type=int, default=50, help="Number of symbols")
+    parser.add_argument("--days", type=int, default=1260, help="Trading days of history")
+    args = parser.parse_args()
+
+    arrays = synthetic_arrays(args.symbols, args.days)
+    history = {s: a.take(slice(0, -1)) for s, a in arrays.items()}
+    tail = {s: a.take(slice(-(feature_store.TAIL_BARS + 1), None)) for s, a in arrays.items()}
+
+    with tempfile.TemporaryDirectory() as directory:
+        feature_store.FEATURE_DIR = directory
+
+        (dates, symbols, features, has_bar), compute_ms = timed_ms(lambda: feature_store.compute_features(history))
+        _, write_ms = timed_ms(lambda: feature_store._store(symbols, dates, features, has_bar, {}))
+
+        def append():
+            last = {s: history[s].date[-1] for s in symbols}
+            tail_dates, tail_symbols, tail_features, tail_has_bar = feature_store.compute_features(tail)
+            return feature_store._store(tail_symbols, tail_dates, tail_features, tail_has_bar, last)
+        _, append_ms = timed_ms(append)
+
+        frames, open_ms = timed_ms(lambda: [feature_store.read_features(s) for s in symbols])
+        _, window_ms = timed_ms(lambda: np.stack([np.asarray(f.values[-60:]) for f in frames]))
+        _, all_rows_ms = timed_ms(lambda: sum(float(np.nansum(f.values)) for f in frames))
+
+        full = feature_store.compute_features(arrays)[2][-1]
+        appended = np.stack([np.asarray(f.values[-1]) for f in frames])
+        # Per column, relative to the column's magnitude (MACD histogram etc. cross zero)
+        error = np.nanmax(np.nanmax(np.abs(appended - full), axis=0) / np.nanmax(np.abs(full), axis=0))
+
+        size_mb = sum(os.path.getsize(os.path.join(directory, s, "values.bin")) for s in symbols) / 1e6
+
+    print(f"{args.symbols} symbols × {args.days} days, {len(feature_store.FEATURE_COLUMNS)} features ({size_mb:.1f} MB on disk)\n")
+    print(f"{'full compute (every training run before)':<44} {compute_ms:>9.1f} ms")
+    print(f"{'write all partitions':<44} {write_ms:>9.1f} ms")
+    print(f"{'daily append (tail recompute + 1 row)':<44} {append_ms:>9.1f} ms")
+    print(f"{'open memmaps':<44} {open_ms:>9.1f} ms")
+    print(f"{'read last 60 rows of every symbol':<44} {window_ms:>9.1f} ms")
+    print(f"{'scan every stored row':<44} {all_rows_ms:>9.1f} ms")
+    print(f"\nAppended row vs full recompute: max error {error:.2e} of the column's scale")
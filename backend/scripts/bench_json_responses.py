@@ -0,0 +1,112 @@
+"""
+JSON RESPONSE BENCHMARK - requests/sec for /api/history?period=5y cache hits
+- Warms the cache for --symbols symbols, then fires --requests GETs with
+  --concurrency in flight, rotating through them, once per mode:
+  * identity - full JSON body (Accept-Encoding: identity)
+  * gzip / br - compressed body (compressed once per ETag, then served from memory)
+  * 304      - If-None-Match with the ETag from the warm-up (no body)
+- Reports req/s, p50/p99 latency and bytes per response for each mode, plus server
+  CPU per request (from /api/stream/stats) and the req/s one core could serve at that
+  cost - the client competes for CPU on small machines, so that's the figure to compare
+- Run it against a server built from the old and the new code to compare
+  (old servers ignore Accept-Encoding / If-None-Match, so every mode is a full body)
+- Run one uvicorn worker for a per-core figure
+- Run with: python scripts/bench_json_responses.py --url http://localhost:8000 --requests 5000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from config.stocks import get_all_stocks
+
+
+MODES = {
+    "identity": {"accept-encoding": "identity"},
+    "gzip": {"accept-encoding": "gzip"},
+    "br": {"accept-encoding": "br"},
+    "304": {"accept-encoding": "br, gzip"},
+}
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def server_cpu(client: httpx.AsyncClient) -> float:
+    return (await client.get("/api/stream/stats")).json()["cpu_seconds"]
+
+
+async def run_mode(client: httpx.AsyncClient, args, symbols, headers_for):
+    latencies = []
+    sizes = []
+    statuses = {}
+    queue = iter(range(args.requests))
+
+    async def worker():
+        for i in queue:
+            symbol = symbols[i % len(symbols)]
+            start = time.perf_counter()
+            # Raw stream so httpx doesn't spend client CPU decompressing
+            async with client.stream(
+                "GET", args.path, params={"symbol": symbol, "period": args.period}, headers=headers_for(symbol)
+            ) as response:
+                body = b"".join([chunk async for chunk in response.aiter_raw()])
+            latencies.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(body))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    cpu_start = await server_cpu(client)
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - wall_start
+    cpu_per_request = (await server_cpu(client) - cpu_start) / len(latencies)
+    return len(latencies) / wall, cpu_per_request, latencies, sum(sizes) / len(sizes), statuses
+
+
+async def run(args):
+    symbols = [s["symbol"] for s in get_all_stocks()][:args.symbols]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        # Warm-up: load every series into the cache and remember the br ETags
+        etags = {}
+        for symbol in symbols:
+            for _ in range(2):
+                response = await client.get(
+                    args.path, params={"symbol": symbol, "period": args.period}, headers=MODES["304"]
+                )
+            etags[symbol] = response.headers.get("etag", "")
+        print(f"🔥 Warmed {len(symbols)} symbols ({args.period}); "
+              f"{args.requests} requests per mode, concurrency {args.concurrency}\n")
+
+        print(f"{'mode':<9} {'req/s':>8} {'p50 ms':>7} {'p99 ms':>7} {'bytes/resp':>11} "
+              f"{'server µs/req':>14} {'req/s/core':>11}  status")
+        for mode, headers in MODES.items():
+            if mode == "304":
+                headers_for = lambda symbol: dict(headers, **{"if-none-match": etags[symbol]})
+            else:
+                headers_for = lambda symbol, headers=headers: headers
+            rate, cpu, latencies, size, statuses = await run_mode(client, args, symbols, headers_for)
+            print(f"{mode:<9} {rate:>8,.0f} {percentile(latencies, 50):>7.1f} {percentile(latencies, 99):>7.1f} "
+                  f"{size:>11,.0f} {cpu * 1e6:>14,.0f} {1 / max(cpu, 1e-9):>11,.0f}  {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /api/history cache-hit throughput")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", default="/api/history", help="Endpoint path")
+    parser.add_argument("--period", default="5y", help="History period")
+    parser.add_argument("--symbols", type=int, default=20, help="Symbols to rotate through")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
@@ -0,0 +1,69 @@
+"""
+PRICE LATENCY BENCHMARK - p50/p99 of /api/price under concurrent load
+- Fires `--concurrency` simultaneous GET /api/price requests, `--rounds` times
+- Rotates through tracked symbols so requests spread across cache keys
+- Run it against a server built from the old and the new code to compare
+  (clear price:current:* keys in Redis first to exercise the upstream path)
+- Run with: python scripts/bench_price_latency.py --url http://localhost:8000 --concurrency 50
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from config.stocks import get_all_stocks
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run(url: str, concurrency: int, rounds: int, path: str):
+    symbols = [s["symbol"] for s in get_all_stocks()]
+    latencies = []
+    errors = 0
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+
+        async def one(symbol):
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, params={"symbol": symbol})
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        wall_start = time.perf_counter()
+        for r in range(rounds):
+            batch = [symbols[(r * concurrency + i) % len(symbols)] for i in range(concurrency)]
+            await asyncio.gather(*(one(symbol) for symbol in batch))
+        wall = time.perf_counter() - wall_start
+
+    print(f"Requests: {len(latencies)} ({errors} errors) in {wall:.2f}s "
+          f"-> {len(latencies) / wall:,.0f} req/s")
+    print(f"p50: {percentile(latencies, 50):.1f} ms | p99: {percentile(latencies, 99):.1f} ms | "
+          f"mean: {statistics.mean(latencies):.1f} ms | max: {max(latencies):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /api/price latency under concurrency")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--path", default="/api/price", help="Endpoint path")
+    parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous requests per round")
+    parser.add_argument("--rounds", type=int, default=20, help="Number of rounds")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.concurrency, args.rounds, args.path))
@@ -0,0 +1,156 @@
+"""
+PRICE QUERY BENCHMARK - Plans and timings for stock_prices reads
+- Builds a synthetic 50-symbol × 20-year table in a scratch schema (bench_prices)
+- Old layout: single-column indexes on stock_id and date, two-step reads
+  (look up Stock, then ORDER BY date DESC LIMIT n)
+- New layout: covering (stock_id, date DESC) INCLUDE (OHLCV) index,
+  single joined query + keyset pagination
+- Prints EXPLAIN (ANALYZE, BUFFERS) and mean latency for each query, then drops the schema
+- Run with: docker exec ml_trading_backend python scripts/bench_price_queries.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from database.db import engine
+
+
+SCHEMA = "bench_prices"
+
+SETUP_SQL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.stocks (
+        id SERIAL PRIMARY KEY,
+        symbol VARCHAR UNIQUE NOT NULL
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.stock_prices (
+        id SERIAL PRIMARY KEY,
+        stock_id INTEGER NOT NULL REFERENCES {SCHEMA}.stocks (id),
+        date DATE NOT NULL,
+        open FLOAT NOT NULL,
+        high FLOAT NOT NULL,
+        low FLOAT NOT NULL,
+        close FLOAT NOT NULL,
+        volume INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT now()
+    )
+    """,
+    f"CREATE INDEX ix_bench_stock_id ON {SCHEMA}.stock_prices (stock_id)",
+    f"CREATE INDEX ix_bench_date ON {SCHEMA}.stock_prices (date)",
+]
+
+LOAD_SQL = f"""
+INSERT INTO {SCHEMA}.stock_prices (stock_id, date, open, high, low, close, volume)
+SELECT s.id, d::date,
+       100 + random() * 50, 150 + random() * 10, 90 + random() * 10, 100 + random() * 50,
+       (random() * 50000000)::int
+FROM {SCHEMA}.stocks s
+CROSS JOIN generate_series(current_date - interval '{{years}} years', current_date, interval '1 day') d
+WHERE extract(isodow FROM d) < 6
+"""
+
+NEW_INDEX_SQL = [
+    f"CREATE UNIQUE INDEX uq_bench_stock_date ON {SCHEMA}.stock_prices (stock_id, date)",
+    f"""
+    CREATE INDEX ix_bench_stock_date_covering ON {SCHEMA}.stock_prices (stock_id, date DESC)
+    INCLUDE (open, high, low, close, volume, id)
+    """,
+    f"DROP INDEX {SCHEMA}.ix_bench_stock_id",
+]
+
+QUERIES = {
+    # What crud.get_stock_prices used to run (after a separate Stock lookup)
+    "two-step latest N": (
+        f"SELECT * FROM {SCHEMA}.stock_prices "
+        f"WHERE stock_id = (SELECT id FROM {SCHEMA}.stocks WHERE symbol = :symbol) "
+        "ORDER BY date DESC LIMIT :limit"
+    ),
+    "joined latest N": (
+        f"SELECT sp.date, sp.open, sp.high, sp.low, sp.close, sp.volume "
+        f"FROM {SCHEMA}.stock_prices sp JOIN {SCHEMA}.stocks s ON s.id = sp.stock_id "
+        "WHERE s.symbol = :symbol ORDER BY sp.date DESC LIMIT :limit"
+    ),
+    "joined keyset page": (
+        f"SELECT sp.date, sp.open, sp.high, sp.low, sp.close, sp.volume "
+        f"FROM {SCHEMA}.stock_prices sp JOIN {SCHEMA}.stocks s ON s.id = sp.stock_id "
+        "WHERE s.symbol = :symbol AND sp.date < current_date - 3650 "
+        "ORDER BY sp.date DESC LIMIT :limit"
+    ),
+    "joined date range": (
+        f"SELECT sp.date, sp.open, sp.high, sp.low, sp.close, sp.volume "
+        f"FROM {SCHEMA}.stock_prices sp JOIN {SCHEMA}.stocks s ON s.id = sp.stock_id "
+        "WHERE s.symbol = :symbol AND sp.date BETWEEN current_date - 1825 AND current_date "
+        "ORDER BY sp.date DESC LIMIT :limit"
+    ),
+}
+
+
+def vacuum_analyze():
+    """Index-only scans need an up-to-date visibility map (VACUUM can't run in a transaction)."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.stock_prices"))
+
+
+def run_queries(conn, label: str, symbols, iterations: int, limit: int):
+    print(f"\n{'=' * 70}\n{label}\n{'=' * 70}")
+    for name, sql in QUERIES.items():
+        params = {"symbol": symbols[0], "limit": limit}
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params).scalars().all()
+        print(f"\n-- {name}")
+        print("\n".join(plan))
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            params["symbol"] = random.choice(symbols)
+            conn.execute(text(sql), params).fetchall()
+        mean_ms = (time.perf_counter() - start) / iterations * 1000
+        print(f">> {name}: {mean_ms:.3f} ms/query over {iterations} runs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark stock_prices read queries")
+    parser.add_argument("--symbols", type=int, default=50, help="Number of synthetic symbols")
+    parser.add_argument("--years", type=int, default=20, help="Years of daily bars per symbol")
+    parser.add_argument("--limit", type=int, default=252, help="Rows per query")
+    parser.add_argument("--iterations", type=int, default=500, help="Timed runs per query")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+
+    with engine.connect() as conn:
+        print(f"Building {SCHEMA}: {args.symbols} symbols × {args.years} years...")
+        for sql in SETUP_SQL:
+            conn.execute(text(sql))
+        conn.execute(
+            text(f"INSERT INTO {SCHEMA}.stocks (symbol) VALUES (:symbol)"),
+            [{"symbol": s} for s in symbols]
+        )
+        load_start = time.perf_counter()
+        rows = conn.execute(text(LOAD_SQL.format(years=args.years))).rowcount
+        conn.commit()
+        print(f"Loaded {rows:,} rows in {time.perf_counter() - load_start:.1f}s")
+        vacuum_analyze()
+
+        run_queries(conn, "BEFORE: single-column indexes", symbols, args.iterations, args.limit)
+
+        for sql in NEW_INDEX_SQL:
+            conn.execute(text(sql))
+        conn.commit()
+        vacuum_analyze()
+
+        run_queries(conn, "AFTER: covering (stock_id, date DESC) index", symbols, args.iterations, args.limit)
+
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            conn.commit()
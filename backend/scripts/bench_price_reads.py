@@ -0,0 +1,72 @@
+"""
+PRICE READ BENCHMARK - rows/sec of ORM reads vs the columnar price store
+- ORM: crud.get_stock_prices() + a rounded dict per row (the old /api/history path)
+- Arrays: database/price_store.get_price_arrays() (Core select → NumPy)
+- Arrays + records: the same, serialized with PriceArrays.to_records()
+- Needs a populated database (run populate_db.py first)
+- Run with: docker exec ml_trading_backend python scripts/bench_price_reads.py --symbol AAPL
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from database.db import SessionLocal
+from database.crud import get_stock_prices
+from database.price_store import get_price_arrays
+
+
+def orm_rows(db, symbol, limit):
+    return [
+        {
+            "date": str(price.date),
+            "open": round(price.open, 2),
+            "high": round(price.high, 2),
+            "low": round(price.low, 2),
+            "close": round(price.close, 2),
+            "volume": price.volume
+        }
+        for price in get_stock_prices(db, symbol, limit=limit)
+    ]
+
+
+def array_rows(db, symbol, limit):
+    return get_price_arrays(db, symbol, limit=limit)
+
+
+def array_records(db, symbol, limit):
+    return get_price_arrays(db, symbol, limit=limit).to_records()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark stock_prices read paths")
+    parser.add_argument("--symbol", default="AAPL", help="Symbol to read")
+    parser.add_argument("--limit", type=int, default=1825, help="Rows per read")
+    parser.add_argument("--iterations", type=int, default=50, help="Reads per path")
+    args = parser.parse_args()
+
+    paths = {
+        "ORM + dicts": orm_rows,
+        "arrays": array_rows,
+        "arrays + to_records": array_records,
+    }
+
+    db = SessionLocal()
+    try:
+        for name, read in paths.items():
+            rows = len(read(db, args.symbol, args.limit))  # warm up
+            if rows == 0:
+                print(f"No rows for {args.symbol} - populate the database first")
+                break
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                read(db, args.symbol, args.limit)
+                # Fresh identity map each time, like a new request
+                db.expunge_all()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<22} {rows:>6} rows  {elapsed / args.iterations * 1000:8.2f} ms/read  "
+                  f"{rows * args.iterations / elapsed:>12,.0f} rows/s")
+    finally:
+        db.close()
@@ -0,0 +1,155 @@
+"""
+PRICE STREAM LOAD TEST - 1,000 live subscribers on /ws/prices (and /api/stream/prices)
+- Opens --subscribers connections (a --sse-share of them as SSE), each subscribed to
+  --symbols-per-client random tracked symbols, and holds them open
+- Idle phase: server CPU while just holding the connections (--hold seconds)
+- Fan-out phase: publishes --updates rounds of one synthetic update per symbol straight
+  to the prices:updates Redis channel (i.e. acts as the producer) every --interval
+  seconds; every client timestamps what it receives
+- Reports delivered vs expected messages (the rest were conflated for slow clients),
+  fan-out latency p50/p99/max (publish → client received) and server CPU per phase
+  from /api/stream/stats (one worker - run uvicorn with --workers 1 for exact CPU)
+- Compare: the same clients polling /api/price every 60s per symbol is
+  subscribers × symbols-per-client / 60 requests/s through cache → DB → API
+- The client runs in this process; raise `ulimit -n` for the server as well
+- Run with: python scripts/bench_price_stream.py --url http://localhost:8000 --subscribers 1000
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import random
+import resource
+import time
+
+import httpx
+import orjson
+import websockets
+
+from config.stocks import get_all_stocks
+from services.price_stream import async_redis_client, encode_price, PRICE_CHANNEL
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Client:
+    """One simulated subscriber: records the latency of every synthetic update."""
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.ready = asyncio.Event()
+        self.latencies = []
+        self.errors = 0
+
+    def on_message(self, text: str):
+        message = orjson.loads(text)
+        if message.get("type") == "subscribed":
+            self.ready.set()
+        elif message.get("source") == "loadtest":
+            self.latencies.append((time.time() - message["published_at"]) * 1000)
+
+    async def run_ws(self, url: str):
+        try:
+            async with websockets.connect(f"{url}/ws/prices?symbols={','.join(self.symbols)}", max_queue=None) as ws:
+                async for text in ws:
+                    self.on_message(text)
+        except Exception:
+            self.errors += 1
+            self.ready.set()
+
+    async def run_sse(self, client: httpx.AsyncClient):
+        try:
+            async with client.stream("GET", "/api/stream/prices", params={"symbols": ",".join(self.symbols)}) as response:
+                self.ready.set()
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        self.on_message(line[6:])
+        except Exception:
+            self.errors += 1
+            self.ready.set()
+
+
+async def server_stats(http: httpx.AsyncClient) -> dict:
+    return (await http.get("/api/stream/stats")).json()
+
+
+async def run(args):
+    symbols = [s["symbol"] for s in get_all_stocks()]
+    rng = random.Random(7)
+    clients = [Client(rng.sample(symbols, args.symbols_per_client)) for _ in range(args.subscribers)]
+    sse_count = int(args.subscribers * args.sse_share)
+    ws_url = args.url.replace("http", "ws", 1)
+
+    limits = httpx.Limits(max_connections=sse_count + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=httpx.Timeout(30, read=None), limits=limits) as http:
+        start = time.perf_counter()
+        tasks = []
+        for i, client in enumerate(clients):
+            tasks.append(asyncio.create_task(client.run_sse(http) if i < sse_count else client.run_ws(ws_url)))
+            if i % 50 == 49:
+                await asyncio.sleep(0)  # let handshakes progress
+        await asyncio.wait_for(asyncio.gather(*(c.ready.wait() for c in clients)), timeout=120)
+        connected = sum(1 for c in clients if not c.errors)
+        print(f"🔌 {connected}/{len(clients)} subscribers connected "
+              f"({sse_count} SSE) in {time.perf_counter() - start:.1f}s, {args.symbols_per_client} symbols each")
+
+        before = await server_stats(http)
+        await asyncio.sleep(args.hold)
+        idle = await server_stats(http)
+        idle_cpu = idle["cpu_seconds"] - before["cpu_seconds"]
+        print(f"😴 Idle {args.hold:.0f}s: server CPU {idle_cpu:.2f}s ({idle_cpu / args.hold:.1%}), "
+              f"{idle['connections']} connections on this worker")
+
+        subscribers_per_symbol = {s: sum(1 for c in clients if s in c.symbols and not c.errors) for s in symbols}
+        publish_start = time.perf_counter()
+        for round_number in range(args.updates):
+            for symbol in symbols:
+                message = encode_price(
+                    symbol, {"symbol": symbol, "close": 100 + round_number, "status": "success"}, "loadtest"
+                )
+                await async_redis_client.publish(PRICE_CHANNEL, message)
+            await asyncio.sleep(args.interval)
+        await asyncio.sleep(2)  # drain
+        busy_seconds = time.perf_counter() - publish_start
+        after = await server_stats(http)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await async_redis_client.aclose()
+
+    latencies = [latency for c in clients for latency in c.latencies]
+    expected = args.updates * sum(subscribers_per_symbol.values())
+    fanout_cpu = after["cpu_seconds"] - idle["cpu_seconds"]
+    print(f"📣 {args.updates} rounds × {len(symbols)} symbols published, "
+          f"{len(latencies):,}/{expected:,} deliveries ({after['conflated'] - idle['conflated']:,} conflated)")
+    if latencies:
+        print(f"   fan-out latency p50 {percentile(latencies, 50):.1f} ms | p99 {percentile(latencies, 99):.1f} ms "
+              f"| max {max(latencies):.1f} ms")
+    print(f"   server CPU {fanout_cpu:.2f}s over {busy_seconds:.1f}s ({fanout_cpu / busy_seconds:.1%}), "
+          f"{fanout_cpu / max(len(latencies), 1) * 1e6:.0f} µs per delivered message")
+    polling = args.subscribers * args.symbols_per_client / 60
+    print(f"   (polling /api/price every 60s instead: {polling:,.0f} requests/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the live price stream")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--subscribers", type=int, default=1000, help="Simulated clients")
+    parser.add_argument("--symbols-per-client", type=int, default=5, help="Symbols each client subscribes to")
+    parser.add_argument("--sse-share", type=float, default=0.0, help="Share of clients using SSE instead of WebSocket")
+    parser.add_argument("--hold", type=float, default=10, help="Seconds to hold idle connections")
+    parser.add_argument("--updates", type=int, default=10, help="Rounds of synthetic updates")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between rounds")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    asyncio.run(run(args))
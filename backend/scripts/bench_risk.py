@@ -0,0 +1,134 @@
+"""
+RISK ENGINE BENCHMARK - All-symbol vectorized pass vs a per-symbol loop
+- Vectorized: services/risk_calculator.compute_risk_metrics() on the (dates × symbols) matrix
+- Baseline: one symbol at a time, walking the daily bars in Python
+  (how the metrics would be computed without the return matrix)
+- Checks that both produce the same numbers, then prints timings
+- Synthetic returns by default (no database needed), or --db to use stock_prices
+- Run with: python scripts/bench_risk.py [--symbols 50 --days 1260] [--db --period 5y]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import math
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from services.risk_calculator import (
+    compute_risk_metrics, equal_weight_returns, TRADING_DAYS, DEFAULT_CONFIDENCE, RISK_FREE_RATE
+)
+
+
+def synthetic_returns(symbols: int, days: int, missing: float = 0.01, seed: int = 7) -> np.ndarray:
+    """Correlated daily returns with a few missing bars."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0004, 0.01, size=(days, 1))
+    returns = market * rng.uniform(0.5, 1.5, size=symbols) + rng.normal(0, 0.015, size=(days, symbols))
+    returns[rng.random((days, symbols)) < missing] = np.nan
+    return returns
+
+
+def db_returns(period: str) -> np.ndarray:
+    from config.stocks import get_all_stocks
+    from database.db import SessionLocal
+    from services.data_fetcher import PERIOD_DAYS
+    from services.risk_calculator import load_return_matrix
+
+    db = SessionLocal()
+    try:
+        matrix = load_return_matrix(db, [s["symbol"] for s in get_all_stocks()], PERIOD_DAYS[period])
+    finally:
+        db.close()
+    return matrix.returns
+
+
+def per_symbol_risk(series, benchmark, confidence=DEFAULT_CONFIDENCE, risk_free_rate=RISK_FREE_RATE) -> dict:
+    """Baseline: plain Python over one symbol's bars."""
+    bars = [r for r in series if not math.isnan(r)]
+    n = len(bars)
+    mean = sum(bars) / n
+    std = math.sqrt(sum((r - mean) ** 2 for r in bars) / (n - 1))
+    alpha = 1 - confidence
+
+    ordered = sorted(bars)
+    position = alpha * (n - 1)
+    lower = int(position)
+    quantile = ordered[lower] + (ordered[min(lower + 1, n - 1)] - ordered[lower]) * (position - lower)
+    tail = [r for r in bars if r <= quantile]
+
+    z = NormalDist().inv_cdf(alpha)
+    annual_return = mean * TRADING_DAYS
+    volatility = std * math.sqrt(TRADING_DAYS)
+    rf_daily = risk_free_rate / TRADING_DAYS
+    downside_dev = math.sqrt(sum(min(r - rf_daily, 0) ** 2 for r in bars) / n) * math.sqrt(TRADING_DAYS)
+
+    pairs = [(r, b) for r, b in zip(series, benchmark) if not math.isnan(r) and not math.isnan(b)]
+    r_mean = sum(r for r, _ in pairs) / len(pairs)
+    b_mean = sum(b for _, b in pairs) / len(pairs)
+    covariance = sum(r * b for r, b in pairs) / len(pairs) - r_mean * b_mean
+    benchmark_var = sum(b * b for _, b in pairs) / len(pairs) - b_mean ** 2
+
+    wealth, peak, max_drawdown = 1.0, 1.0, 0.0
+    for r in series:
+        if not math.isnan(r):
+            wealth *= 1 + r
+        peak = max(peak, wealth)
+        max_drawdown = max(max_drawdown, 1 - wealth / peak)
+
+    return {
+        "annual_return": annual_return,
+        "volatility": volatility,
+        "var_historical": -quantile,
+        "cvar_historical": -sum(tail) / len(tail),
+        "var_parametric": -(mean + z * std),
+        "cvar_parametric": -(mean - std * NormalDist().pdf(z) / alpha),
+        "sharpe": (annual_return - risk_free_rate) / volatility,
+        "sortino": (annual_return - risk_free_rate) / downside_dev,
+        "beta": covariance / benchmark_var,
+        "max_drawdown": max_drawdown,
+    }
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Milliseconds per call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized risk engine")
+    parser.add_argument("--symbols", type=int, default=50, help="Synthetic symbols")
+    parser.add_argument("--days", type=int, default=1260, help="Synthetic trading days (1260 ≈ 5y)")
+    parser.add_argument("--db", action="store_true", help="Use stock_prices instead of synthetic data")
+    parser.add_argument("--period", default="5y", help="Lookback for --db")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per path")
+    args = parser.parse_args()
+
+    returns = db_returns(args.period) if args.db else synthetic_returns(args.symbols, args.days)
+    benchmark = equal_weight_returns(returns)
+    print(f"Return matrix: {returns.shape[0]} days × {returns.shape[1]} symbols")
+
+    def vectorized():
+        return compute_risk_metrics(returns, benchmark=benchmark)
+
+    def loop():
+        columns = returns.T.tolist()
+        bench = benchmark.tolist()
+        return [per_symbol_risk(column, bench) for column in columns]
+
+    fast, slow = vectorized(), loop()
+    for name in slow[0]:
+        expected = np.array([row[name] for row in slow])
+        assert np.allclose(fast[name], expected, equal_nan=True), f"{name} mismatch"
+    print("✅ Vectorized metrics match the per-symbol loop")
+
+    vectorized_ms = time_per_call(vectorized, args.repeat)
+    loop_ms = time_per_call(loop, max(1, args.repeat // 4))
+    print(f"{'per-symbol loop':<18} {loop_ms:10.2f} ms")
+    print(f"{'vectorized':<18} {vectorized_ms:10.2f} ms   ({loop_ms / vectorized_ms:.1f}x faster)")
@@ -0,0 +1,97 @@
+"""
+STARTUP BENCHMARK - API import time and memory with lazy vs eager model loading
+- lazy (registry): import app.main, which is what a uvicorn worker does at startup
+- eager: import app.main, import TensorFlow and load every stored model, i.e. what
+  loading models at module import would cost every worker
+- Each case runs in a fresh interpreter (--runs times, best run reported) with peak RSS
+- Then, in-process: first load_model() (cold) vs the LRU hit, and one batched predict
+  for a 50-symbol tensor
+- Run with: python scripts/bench_startup.py [--runs 3]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import subprocess
+import time
+
+import numpy as np
+
+from services.model_registry import list_models, load_model, model_cache
+from services.ml_predictor import SERVING_MODELS, WINDOW, FEATURES
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = """
+import json, resource, sys, time
+sys.path.insert(0, {backend!r})
+start = time.perf_counter()
+import app.main
+{extra}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+EAGER = """
+try:
+    import tensorflow
+except ImportError:
+    pass
+from services.model_registry import list_models, load_model
+for name, versions in list_models().items():
+    for version in versions:
+        load_model(name, version, fallback=False)
+"""
+
+
+def measure(extra: str, runs: int) -> dict:
+    """Best (fastest) of `runs` fresh interpreters."""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(backend=BACKEND_DIR, extra=extra)],
+            capture_output=True, text=True, cwd=BACKEND_DIR
+        )
+        if output.returncode != 0:
+            raise RuntimeError(output.stderr.strip().splitlines()[-1])
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return min(results, key=lambda r: r["seconds"])
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API startup with and without eager model loading")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per case")
+    args = parser.parse_args()
+
+    try:
+        import tensorflow  # noqa: F401
+        have_tensorflow = True
+    except ImportError:
+        have_tensorflow = False
+
+    stored = list_models()
+    print(f"Stored models: {', '.join(f'{n} ({len(v)})' for n, v in stored.items())}")
+    print(f"TensorFlow installed: {'yes' if have_tensorflow else 'no (eager case skips its import)'}\n")
+
+    print(f"{'startup':<18} {'seconds':>8} {'peak RSS MB':>12}")
+    for label, extra in (("lazy (registry)", ""), ("eager", EAGER)):
+        result = measure(extra, args.runs)
+        print(f"{label:<18} {result['seconds']:>8.2f} {result['rss_mb']:>12.0f}")
+
+    print(f"\n{'model':<24} {'cold load ms':>13} {'LRU hit ms':>11} {'predict 50 ms':>14}")
+    features = np.random.default_rng(0).normal(0, 0.02, size=(50, WINDOW, len(FEATURES))).astype(np.float32)
+    for name in SERVING_MODELS:
+        model_cache.clear()
+        model, cold_ms = timed_ms(lambda: load_model(name))
+        _, hit_ms = timed_ms(lambda: load_model(name))
+        _, predict_ms = timed_ms(lambda: model.predict(features))
+        print(f"{model.name + ':' + model.version:<24} {cold_ms:>13.2f} {hit_ms:>11.3f} {predict_ms:>14.2f}")
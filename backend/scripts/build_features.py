@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+BUILD FEATURES SCRIPT - Create or extend the on-disk feature store
+- Default: append rows for new dates only (what daily_update.py runs after new bars)
+- --rebuild: rewrite every partition from full history (after changing FEATURE_COLUMNS)
+- --status: print rows and date range per symbol (reads meta.json only)
+- Store: data/features/{symbol}/ (services/feature_store.py)
+- Run with: docker exec ml_trading_backend python scripts/build_features.py [--rebuild] [--symbols AAPL,MSFT]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from database.db import SessionLocal, init_db
+from services.feature_store import (
+    build_feature_store, update_feature_store, feature_store_status, FEATURE_DIR
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the feature store")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: all tracked stocks)")
+    parser.add_argument("--rebuild", action="store_true", help="Rewrite partitions from full history")
+    parser.add_argument("--status", action="store_true", help="Only print what is stored")
+    args = parser.parse_args()
+    symbols = args.symbols.upper().split(",") if args.symbols else None
+
+    if args.status:
+        status = feature_store_status(symbols)
+        print(f"{FEATURE_DIR}: {len(status)} symbols")
+        for symbol, meta in status.items():
+            print(f"  {symbol:<6} {meta['rows']:>6} rows  {meta['first_date']} → {meta['last_date']}")
+        sys.exit(0)
+
+    init_db()
+    start_time = time.time()
+    db = SessionLocal()
+    try:
+        written = build_feature_store(db, symbols) if args.rebuild else update_feature_store(db, symbols)
+    except Exception as e:
+        print(f"❌ Feature store {'rebuild' if args.rebuild else 'update'} failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"✅ {sum(written.values()):,} rows written for {len(written)} symbols → {FEATURE_DIR}")
+    print(f"Time: {time.time() - start_time:.1f}s")
@@ -2,25 +2,51 @@
 """
 DAILY UPDATE SCRIPT - Keeps database current (run daily via cron)
 - Checks for new trading day data (runs after market close 4:30 PM ET)
-- Adds today's prices if not already in database
+- Adds any bars newer than the latest DB date in one bulk upsert
 - Prevents duplicate entries by checking latest DB date first
-- Run with: docker exec ml_trading_backend python scripts/daily_update.py
-- Uses: database/crud.py to save, services/data_fetcher.py to fetch
+- Requests are paced by services/fetch_scheduler.py (token bucket, --rpm budget)
+- A rerun on the same day resumes from data/checkpoints/daily_update_<date>.json; the
+  file is removed once every symbol and post-step is done (earlier days' leftovers are
+  never resumed, so they're removed at startup)
+- Run with: docker exec ml_trading_backend python scripts/daily_update.py [--rpm 5]
+- Afterwards pushes the new bars into the cached rolling stats (services/rolling_stats.py)
+  and rebuilds the day's covariance matrices (services/covariance.py),
+  appends the new dates to the feature store (services/feature_store.py),
+  fills actual_price for matured predictions and adds them to prediction_accuracy
+  (one set-based statement, crud.reconcile_predictions),
+  then runs the nightly batch predictions (services/ml_predictor.py)
+- Each of those post-steps is recorded in the day's checkpoint (post:<step>) once it
+  succeeds, so a rerun after a crash finishes the ones left over - even when every
+  symbol's bars were already written by the interrupted run
+- Uses: database/crud.py to save, services/fetch_scheduler.py to fetch
 """
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from datetime import datetime
+import argparse
+import glob
+import asyncio
+import threading
 import time
 from database.db import SessionLocal, init_db
-from database.crud import add_stock_price, get_or_create_stock
+from database.crud import bulk_upsert_stock_prices, reconcile_predictions, rebuild_prediction_accuracy
 from services.data_fetcher import get_historical_data
+from services.rolling_stats import update_rolling_stats
+from services.covariance import build_covariances
+from services.feature_store import update_feature_store
+from services.ml_predictor import run_batch_predictions
+from services.fetch_scheduler import (
+    FetchScheduler, checkpoint_path, CHECKPOINT_DIR, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_CONCURRENCY
+)
 from config.stocks import get_all_stocks
 from database.models import Stock, StockPrice
 from sqlalchemy import func
 
 
+POST_STEPS = ("rolling", "covariance", "features", "accuracy", "predictions")
+
 def get_latest_db_date(db, symbol: str):
     """Get most recent date in DB for this stock."""
     stock = db.query(Stock).filter(Stock.symbol == symbol).first()
@@ -29,42 +55,31 @@ def get_latest_db_date(db, symbol: str):
     return db.query(func.max(StockPrice.date)).filter(StockPrice.stock_id == stock.id).scalar()
 
 
-def update_stock(symbol: str, name: str = None):
-    """Fetch latest price and add to DB if not already present."""
+def save_new_bars(symbol: str, name: str, response: dict):
+    """Upsert the bars in a 1w history response that aren't already in the DB."""
+    if response.get("status") != "success":
+        return False, response.get('error', 'API error')
+    
+    data = response.get("data", [])
+    if not data:
+        return False, "No data"
+    
     db = SessionLocal()
     try:
         latest_db_date = get_latest_db_date(db, symbol)
         
-        # Get last week of data
-        response = get_historical_data(symbol, "1w")
-        if response.get("status") != "success":
-            return False, response.get('error', 'API error')
-        
-        data = response.get("data", [])
-        if not data:
-            return False, "No data"
-        
-        # Get most recent trading day
-        data.sort(key=lambda x: x['date'], reverse=True)
-        latest = data[0]
-        latest_date = datetime.strptime(latest['date'], '%Y-%m-%d').date()
-        
-        # Skip if already have this date
-        if latest_db_date and latest_date <= latest_db_date:
+        # Keep every bar newer than what's in the DB (catches up after missed runs)
+        new_bars = [
+            bar for bar in data
+            if not latest_db_date
+            or datetime.strptime(bar['date'], '%Y-%m-%d').date() > latest_db_date
+        ]
+        if not new_bars:
             return True, "current"
         
-        # Add new price
-        get_or_create_stock(db, symbol, name)
-        add_stock_price(
-            db=db,
-            symbol=symbol,
-            date=datetime.combine(latest_date, datetime.min.time()),
-            open_price=float(latest['open']),
-            high=float(latest['high']),
-            low=float(latest['low']),
-            close=float(latest['close']),
-            volume=int(latest['volume'])
-        )
+        # Write them in one transaction
+        bulk_upsert_stock_prices(db, symbol, new_bars, name)
+        latest_date = max(datetime.strptime(bar['date'], '%Y-%m-%d').date() for bar in new_bars)
         
         return True, latest_date.strftime('%Y-%m-%d')
         
@@ -74,25 +89,175 @@ def update_stock(symbol: str, name: str = None):
         db.close()
 
 
+def update_rolling(symbols):
+    """Incrementally extend the cached rolling series with today's bars."""
+    db = SessionLocal()
+    try:
+        updated = update_rolling_stats(db, symbols)
+        print(f"Rolling stats: {updated} cached series extended")
+        return True
+    except Exception as e:
+        print(f"Rolling stats update error: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def update_covariances():
+    """Build today's sample / Ledoit-Wolf / EWMA matrices for every configured lookback."""
+    db = SessionLocal()
+    try:
+        start = time.time()
+        built = build_covariances(db)
+        print(f"Covariance: {len(built)} matrices built in {time.time() - start:.2f}s")
+        return True
+    except Exception as e:
+        print(f"Covariance build error: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def update_features():
+    """Append today's rows to every symbol's feature partition (warm-up tail only)."""
+    db = SessionLocal()
+    try:
+        start = time.time()
+        written = update_feature_store(db)
+        print(f"Features: {sum(written.values())} rows appended for {len(written)} stocks in {time.time() - start:.2f}s")
+        return True
+    except Exception as e:
+        print(f"Feature store update error: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def update_accuracy(rebuild: bool = False):
+    """Fill actual prices of matured predictions and fold them into the accuracy summary."""
+    db = SessionLocal()
+    try:
+        start = time.time()
+        result = reconcile_predictions(db)
+        print(f"Accuracy: {result['filled']} predictions matured, {result['groups']} summaries updated in {time.time() - start:.2f}s")
+        if rebuild:
+            print(f"Accuracy: rebuilt {rebuild_prediction_accuracy(db)} summaries from every matured prediction")
+        return True
+    except Exception as e:
+        print(f"Accuracy update error: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def update_predictions():
+    """Predict every horizon for every stock from today's bars (one batched pass per model)."""
+    db = SessionLocal()
+    try:
+        result = run_batch_predictions(db)
+        if result["status"] == "success":
+            print(f"Predictions: {result['rows']} rows for {result['symbols']} stocks in {sum(result['timings'].values()):.2f}s")
+        else:
+            print(f"Predictions skipped: {result['message']}")
+        return True
+    except Exception as e:
+        print(f"Prediction run error: {e}")
+        return False
+    finally:
+        db.close()
+
+
+def run_post_steps(checkpoint, symbols, rebuild_accuracy: bool = False):
+    """
+    Run the post-steps the day's checkpoint doesn't have yet, recording each one that succeeds.
+    """
+    steps = {
+        # All symbols, not just the updated ones - the benchmark is the whole universe
+        "rolling": lambda: update_rolling(symbols),
+        "covariance": update_covariances,
+        "features": update_features,
+        "accuracy": lambda: update_accuracy(rebuild_accuracy),
+        "predictions": update_predictions,
+    }
+    for step in POST_STEPS:
+        key = f"post:{step}"
+        if checkpoint.is_done(key):
+            continue
+        if steps[step]():
+            checkpoint.mark_done(key)
+            if step == "accuracy":
+                rebuild_accuracy = False  # done as part of the step
+    if rebuild_accuracy:
+        update_accuracy(rebuild=True)
+
+
+def remove_old_checkpoints(today_path: str):
+    """Delete daily_update checkpoints of earlier days (only today's is ever resumed)."""
+    for path in glob.glob(os.path.join(CHECKPOINT_DIR, "daily_update_*.json")):
+        if path != today_path:
+            os.remove(path)
+
+
+def update_stock(symbol: str, name: str = None):
+    """Fetch the last week of bars and upsert the ones not already in the DB."""
+    return save_new_bars(symbol, name, get_historical_data(symbol, "1w"))
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add the latest trading days for all tracked stocks")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help="Polygon.io requests per minute budget")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Max requests in flight")
+    parser.add_argument("--rebuild-accuracy", action="store_true",
+                        help="Recompute prediction_accuracy from scratch (after rerunning old prediction dates)")
+    args = parser.parse_args()
+    
     init_db()
     
     stocks = [(s["symbol"], s["name"]) for s in get_all_stocks()]
-    updated = 0
+    names = dict(stocks)
+    updated = []
     failed = []
+    lock = threading.Lock()  # on_result runs in the scheduler's worker threads
+    start_time = time.time()
     
     print(f"{datetime.now().strftime('%Y-%m-%d %H:%M')} - Checking {len(stocks)} stocks")
     
-    for symbol, name in stocks:
-        success, result = update_stock(symbol, name)
+    def on_result(symbol: str, response: dict) -> bool:
+        success, result = save_new_bars(symbol, names[symbol], response)
         
         if success and result != "current":
             print(f"  {symbol}: added {result}")
-            updated += 1
+            with lock:
+                updated.append(symbol)
         elif not success:
             print(f"  {symbol}: ERROR - {result}")
-            failed.append(symbol)
-        
-        time.sleep(15)  # Rate limit
+            with lock:
+                failed.append(symbol)
+        return success
+    
+    today_checkpoint = checkpoint_path(f"daily_update_{datetime.now().strftime('%Y-%m-%d')}")
+    remove_old_checkpoints(today_checkpoint)
+    scheduler = FetchScheduler(
+        requests_per_minute=args.rpm,
+        concurrency=args.concurrency,
+        checkpoint=today_checkpoint
+    )
+    summary = asyncio.run(scheduler.run([(symbol, "1w") for symbol, _ in stocks], on_result=on_result))
+    
+    # Decided from the day's checkpoint, not this run's writes: an earlier run today may
+    # have written the bars and died before (or during) the post-steps
+    if summary["completed"] or summary["skipped"]:
+        run_post_steps(scheduler.checkpoint, [symbol for symbol, _ in stocks], args.rebuild_accuracy)
+    elif args.rebuild_accuracy:
+        update_accuracy(rebuild=True)
+    
+    # Nothing left to resume today
+    if not summary["failed"] and all(scheduler.checkpoint.is_done(f"post:{step}") for step in POST_STEPS):
+        scheduler.checkpoint.clear()
     
-    print(f"Done: {updated} updated, {len(stocks) - updated - len(failed)} current, {len(failed)} failed")
+    current = len(stocks) - len(updated) - len(failed) - len(summary["skipped"])
+    print(f"Done: {len(updated)} updated, {current} current, {len(summary['skipped'])} done earlier today, "
+          f"{len(failed)} failed")
+    print(f"Time: {time.time() - start_time:.1f}s")
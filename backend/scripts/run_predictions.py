@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+RUN PREDICTIONS SCRIPT - Nightly batch inference for all tracked stocks
+- Brings the feature store up to date first (appends new dates only), then
+  memory-maps every symbol's last window - one batched forward pass per model
+- Writes all horizons (1..126 trading days) with one bulk upsert (reruns overwrite)
+- Also run at the end of scripts/daily_update.py when new bars arrived
+- Run with: docker exec ml_trading_backend python scripts/run_predictions.py [--models linear,drift] [--date 2024-06-28]
+- Models are the newest registry versions (services/model_registry.py, train with scripts/train_models.py)
+- Uses: services/ml_predictor.py
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import datetime
+
+from database.db import SessionLocal, init_db
+from services.feature_store import update_feature_store
+from services.ml_predictor import run_batch_predictions, SERVING_MODELS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict every horizon for all tracked stocks")
+    parser.add_argument("--symbols", help="Comma-separated symbols (default: all tracked stocks)")
+    parser.add_argument("--models", help=f"Comma-separated registry models (default: {','.join(SERVING_MODELS)} with fallbacks)")
+    parser.add_argument("--date", help="Predict from data up to this date, YYYY-MM-DD (default: latest bar)")
+    args = parser.parse_args()
+
+    init_db()
+    start_time = time.time()
+    db = SessionLocal()
+    try:
+        update_feature_store(db)
+        result = run_batch_predictions(
+            db,
+            symbols=args.symbols.upper().split(",") if args.symbols else None,
+            model_names=args.models.split(",") if args.models else None,
+            asof=datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else None
+        )
+    except Exception as e:
+        print(f"❌ Prediction run failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    if result["status"] != "success":
+        print(f"❌ {result['message']}")
+        sys.exit(1)
+
+    print(f"✅ {result['rows']:,} predictions for {result['symbols']} stocks ({', '.join(result['models'])})")
+    if result["skipped"]:
+        print(f"⚠️  Not enough history: {', '.join(result['skipped'])}")
+    print("   " + ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["timings"].items()))
+    print(f"Time: {time.time() - start_time:.1f}s")
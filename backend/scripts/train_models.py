@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+TRAIN MODELS SCRIPT - Fit a prediction model and store it as a new registry version
+- Samples every 60-day window of every tracked stock from the memory-mapped feature
+  store (services/feature_store.py - no stock_prices query; build it first with
+  scripts/build_features.py), as strided views
+- Targets are the next 126 trading days' cumulative log returns (all horizons at once)
+- Time-based split: windows ending in the last --holdout share of dates are validation only;
+  training stops MAX_HORIZON trading days before that (purge gap, as in services/backtester.py),
+  so no training target reaches into the validation period
+- linear: closed-form ridge regression (NumPy, seconds)
+- lstm: Keras LSTM (TensorFlow is only imported for this option)
+- Writes models/{name}/{version}/ with validation metrics in metadata.json;
+  the next run_predictions.py picks the newest version up
+- Run with: docker exec ml_trading_backend python scripts/train_models.py [--model linear] [--years 5]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from config.stocks import get_all_stocks
+from services.feature_store import read_features
+from services.ml_predictor import training_windows, HORIZONS, MAX_HORIZON, WINDOW, FEATURES
+from services.model_registry import fit_linear_model, save_linear_model, save_keras_model, LinearModel, PATH_DAYS
+
+
+def load_training_set(years: int, window: int, stride: int):
+    """Stack every symbol's training windows. Returns (features, targets, dates)."""
+    since = np.datetime64(date.today() - timedelta(days=365 * years), "D")
+    parts = []
+    for stock in get_all_stocks():
+        frame = read_features(stock["symbol"])
+        if frame is None:
+            continue
+        part = training_windows(frame.take(slice(int(np.searchsorted(frame.dates, since)), None)), window, stride)
+        if len(part[0]):
+            parts.append(part)
+    if not parts:
+        return None
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def validation_metrics(predicted: np.ndarray, actual: np.ndarray) -> dict:
+    """MAE of the log return and directional accuracy per frontend horizon."""
+    return {
+        name: {
+            "mae": round(float(np.abs(predicted[:, days - 1] - actual[:, days - 1]).mean()), 5),
+            "directional_accuracy": round(float((np.sign(predicted[:, days - 1]) == np.sign(actual[:, days - 1])).mean()), 4)
+        }
+        for name, days in HORIZONS.items()
+    }
+
+
+def train_lstm(x_train, y_train, x_valid, y_valid, epochs: int):
+    import tensorflow as tf  # only this option needs it
+    network = tf.keras.Sequential([
+        tf.keras.layers.Input(shape=x_train.shape[1:]),
+        tf.keras.layers.LSTM(32),
+        tf.keras.layers.Dense(PATH_DAYS)
+    ])
+    network.compile(optimizer="adam", loss="mse")
+    network.fit(x_train, y_train, validation_data=(x_valid, y_valid), epochs=epochs, batch_size=256, verbose=2)
+    return network
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a prediction model into the model registry")
+    parser.add_argument("--model", choices=["linear", "lstm"], default="linear", help="Model type (also its registry name)")
+    parser.add_argument("--years", type=int, default=5, help="Years of history to sample")
+    parser.add_argument("--stride", type=int, default=1, help="Keep every n-th window")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of the latest dates kept for validation")
+    parser.add_argument("--alpha", type=float, default=10.0, help="Ridge penalty (linear)")
+    parser.add_argument("--epochs", type=int, default=5, help="Training epochs (lstm)")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    data = load_training_set(args.years, WINDOW, args.stride)
+    if data is None:
+        print("❌ No stored features to train on. Run scripts/build_features.py first.")
+        sys.exit(1)
+    features, targets, dates = data
+
+    cutoff = np.quantile(dates.astype("int64"), 1 - args.holdout).astype("datetime64[D]")
+    # Purge: a window's targets cover the next MAX_HORIZON trading days after its last date
+    trading_days = np.unique(dates)
+    purge_start = trading_days[max(int(np.searchsorted(trading_days, cutoff)) - MAX_HORIZON, 0)]
+    train, valid = dates < purge_start, dates >= cutoff
+    print(f"📊 {len(features):,} windows ({train.sum():,} train / {valid.sum():,} validation, "
+          f"train before {purge_start}, validation from {cutoff})")
+
+    if args.model == "linear":
+        coef, intercept, _ = fit_linear_model(features[train], targets[train], args.alpha)
+        predicted, _ = LinearModel("linear", "candidate", WINDOW, coef, intercept, np.zeros(PATH_DAYS)).predict(features[valid])
+        residual_std = (targets[valid] - predicted).std(axis=0)
+        metrics = validation_metrics(predicted, targets[valid])
+        metadata = save_linear_model(
+            "linear", WINDOW, coef, intercept, residual_std,
+            {"features": list(FEATURES), "alpha": args.alpha, "samples": int(train.sum()), "validation": metrics}
+        )
+    else:
+        try:
+            network = train_lstm(features[train], targets[train], features[valid], targets[valid], args.epochs)
+        except ImportError:
+            print("❌ TensorFlow is not installed - pip install tensorflow or use --model linear")
+            sys.exit(1)
+        predicted = network.predict(features[valid], batch_size=4096, verbose=0)
+        residual_std = (targets[valid] - predicted).std(axis=0)
+        metrics = validation_metrics(predicted, targets[valid])
+        metadata = save_keras_model(
+            "lstm", WINDOW, network, residual_std,
+            {"features": list(FEATURES), "epochs": args.epochs, "samples": int(train.sum()), "validation": metrics}
+        )
+
+    print(f"✅ Saved {metadata['name']} version {metadata['version']}")
+    for horizon, values in metrics.items():
+        print(f"   {horizon:<8} MAE {values['mae']:.4f}  direction {values['directional_accuracy']:.1%}")
+    print(f"Time: {time.time() - start_time:.1f}s")
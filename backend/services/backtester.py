@@ -0,0 +1,248 @@
+"""
+BACKTESTER SERVICE - Parallel walk-forward evaluation of the prediction models
+- One task per (symbol, model, fold); tasks run in a process pool
+- The feature store is snapshotted once into a shared-memory block (values + dates,
+  with per-symbol offsets); workers attach to it by name in their initializer,
+  so tasks carry a few ints instead of pickled price arrays
+- Walk-forward folds: after an initial MIN_TRAIN_SHARE of a symbol's samples, the
+  rest is split into equal test blocks; each fold trains on everything before its block
+  minus a MAX_HORIZON-day purge gap (training targets never overlap the test period)
+- Per fold and frontend horizon: MAE / RMSE of the predicted cumulative log return
+  and directional accuracy, written in bulk to backtest_results
+- Models: drift (no fitting) and linear (ridge refit per fold), see FIT_MODELS
+- Used by: scripts/backtest.py
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from services.feature_store import FeatureFrame, FEATURE_COLUMNS, VALUE_DTYPE, read_features
+from services.ml_predictor import HORIZONS, MAX_HORIZON, WINDOW, training_windows
+from services.model_registry import DriftModel, LinearModel, fit_linear_model
+
+
+DEFAULT_FOLDS = 5
+MIN_TRAIN_SHARE = 0.4
+LINEAR_ALPHA = 10.0
+
+
+def _fit_linear(features: np.ndarray, targets: np.ndarray):
+    coef, intercept, residual_std = fit_linear_model(features, targets, LINEAR_ALPHA)
+    return LinearModel("linear", "backtest", WINDOW, coef, intercept, residual_std)
+
+
+# name → fit(train features, train targets) → model with .predict()
+FIT_MODELS: Dict[str, Callable] = {
+    "drift": lambda features, targets: DriftModel(),
+    "linear": _fit_linear,
+}
+
+
+class SharedFeatures(NamedTuple):
+    """
+    Names and layout of the shared-memory snapshot (cheap to pickle).
+    """
+    values_name: str
+    dates_name: str
+    symbols: list
+    offsets: list  # symbol i owns rows offsets[i]:offsets[i + 1]
+
+
+# ============================================================================
+# SHARED MEMORY
+# ============================================================================
+
+def share_feature_store(symbols: Sequence[str]):
+    """
+    Copy every symbol's stored features into two shared-memory blocks.
+
+    Returns:
+        (SharedFeatures, [SharedMemory blocks] - the caller must close() and unlink() them)
+    """
+    frames = [frame for frame in (read_features(s) for s in symbols) if frame is not None and len(frame)]
+    offsets = np.concatenate([[0], np.cumsum([len(f) for f in frames])]).astype(int).tolist()
+    total = offsets[-1]
+
+    values_block = shared_memory.SharedMemory(create=True, size=max(total * len(FEATURE_COLUMNS) * np.dtype(VALUE_DTYPE).itemsize, 1))
+    dates_block = shared_memory.SharedMemory(create=True, size=max(total * 8, 1))
+    values = np.ndarray((total, len(FEATURE_COLUMNS)), dtype=VALUE_DTYPE, buffer=values_block.buf)
+    dates = np.ndarray((total,), dtype=np.int64, buffer=dates_block.buf)
+    for i, frame in enumerate(frames):
+        values[offsets[i]:offsets[i + 1]] = frame.values
+        dates[offsets[i]:offsets[i + 1]] = frame.dates.astype(np.int64)
+
+    layout = SharedFeatures(values_block.name, dates_block.name, [f.symbol for f in frames], offsets)
+    return layout, [values_block, dates_block]
+
+
+_worker_blocks = []
+_worker_layout: Optional[SharedFeatures] = None
+
+
+def _attach(layout: SharedFeatures):
+    """Process pool initializer: map the shared blocks once per worker."""
+    global _worker_layout
+    _worker_layout = layout
+    _worker_blocks[:] = [
+        shared_memory.SharedMemory(name=layout.values_name),
+        shared_memory.SharedMemory(name=layout.dates_name),
+    ]
+
+
+def _frame(index: int) -> FeatureFrame:
+    layout = _worker_layout
+    total = layout.offsets[-1]
+    values = np.ndarray((total, len(FEATURE_COLUMNS)), dtype=VALUE_DTYPE, buffer=_worker_blocks[0].buf)
+    dates = np.ndarray((total,), dtype=np.int64, buffer=_worker_blocks[1].buf)
+    rows = slice(layout.offsets[index], layout.offsets[index + 1])
+    return FeatureFrame(layout.symbols[index], dates[rows].view("datetime64[D]"), values[rows])
+
+
+# ============================================================================
+# WALK-FORWARD
+# ============================================================================
+
+def fold_bounds(samples: int, folds: int) -> List[tuple]:
+    """
+    (train_end, test_start, test_end) sample indices per fold, test blocks after MIN_TRAIN_SHARE.
+    Training uses samples [0, train_end), purged MAX_HORIZON before the test block.
+    """
+    first_test = int(samples * MIN_TRAIN_SHARE)
+    edges = np.linspace(first_test, samples, folds + 1).astype(int)
+    return [
+        (max(start - MAX_HORIZON, 0), start, end)
+        for start, end in zip(edges[:-1], edges[1:])
+        if end > start
+    ]
+
+
+def evaluate(predicted: np.ndarray, actual: np.ndarray) -> Dict[int, dict]:
+    """{horizon_days: {"mae", "rmse", "directional_accuracy"}} on cumulative log returns."""
+    metrics = {}
+    for days in HORIZONS.values():
+        error = predicted[:, days - 1] - actual[:, days - 1]
+        metrics[days] = {
+            "mae": float(np.abs(error).mean()),
+            "rmse": float(np.sqrt((error ** 2).mean())),
+            "directional_accuracy": float((np.sign(predicted[:, days - 1]) == np.sign(actual[:, days - 1])).mean()),
+        }
+    return metrics
+
+
+def run_task(task: tuple) -> List[dict]:
+    """
+    One (symbol index, model, fold) walk-forward step inside a worker.
+
+    Returns:
+        Result rows, one per horizon ([] if the fold has no training data)
+    """
+    index, model_name, fold, folds = task
+    frame = _frame(index)
+    features, targets, dates = training_windows(frame)
+    bounds = fold_bounds(len(features), folds)
+    if fold >= len(bounds):
+        return []
+    train_end, test_start, test_end = bounds[fold]
+    if train_end < 2 or test_end <= test_start:
+        return []
+
+    model = FIT_MODELS[model_name](features[:train_end], targets[:train_end])
+    predicted, _ = model.predict(features[test_start:test_end])
+    return [
+        dict(
+            symbol=frame.symbol, model_name=model_name, fold=fold, horizon_days=days,
+            train_end=dates[train_end - 1].item(), test_start=dates[test_start].item(),
+            test_end=dates[test_end - 1].item(), samples=test_end - test_start, **values
+        )
+        for days, values in evaluate(predicted, targets[test_start:test_end]).items()
+    ]
+
+
+def task_key(symbol: str, model_name: str, fold: int) -> str:
+    return f"{symbol}:{model_name}:{fold}"
+
+
+def run_backtest(
+    symbols: Sequence[str],
+    model_names: Sequence[str],
+    folds: int = DEFAULT_FOLDS,
+    workers: int = 1,
+    skip: Iterable[str] = (),
+    on_results: Optional[Callable[[List[str], List[dict]], None]] = None,
+    flush_every: int = 50,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Run every (symbol, model, fold) task not in `skip` across a process pool.
+
+    Args:
+        skip: task keys already done (resume)
+        on_results: called with (finished task keys, result rows) every flush_every tasks
+                    and at the end - write the rows, then record the keys as done
+        progress: called with (finished, total) after every task
+
+    Returns:
+        {"tasks", "skipped", "rows", "elapsed_s"}
+    """
+    unknown = [name for name in model_names if name not in FIT_MODELS]
+    if unknown:
+        raise ValueError(f"Unknown model(s): {', '.join(unknown)}. Use: {', '.join(FIT_MODELS)}")
+
+    start = time.perf_counter()
+    layout, blocks = share_feature_store(symbols)
+    try:
+        skip = set(skip)
+        tasks = [
+            (index, model_name, fold, folds)
+            for index, symbol in enumerate(layout.symbols)
+            for model_name in model_names
+            for fold in range(folds)
+            if task_key(symbol, model_name, fold) not in skip
+        ]
+        pending_keys, pending_rows, rows_total = [], [], 0
+
+        def flush():
+            nonlocal pending_keys, pending_rows, rows_total
+            if on_results and pending_keys:
+                on_results(pending_keys, pending_rows)
+            rows_total += len(pending_rows)
+            pending_keys, pending_rows = [], []
+
+        def finished(task, rows):
+            pending_keys.append(task_key(layout.symbols[task[0]], task[1], task[2]))
+            pending_rows.extend(rows)
+            if len(pending_keys) >= flush_every:
+                flush()
+            if progress:
+                progress(done, len(tasks))
+
+        done = 0
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(layout,)) as pool:
+                futures = {pool.submit(run_task, task): task for task in tasks}
+                for future in as_completed(futures):
+                    done += 1
+                    finished(futures[future], future.result())
+        else:
+            _attach(layout)
+            for task in tasks:
+                done += 1
+                finished(task, run_task(task))
+        flush()
+    finally:
+        for block in _worker_blocks:
+            block.close()
+        _worker_blocks.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return {
+        "tasks": len(tasks),
+        "skipped": len(skip),
+        "rows": rows_total,
+        "elapsed_s": round(time.perf_counter() - start, 2),
+    }
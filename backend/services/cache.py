@@ -3,34 +3,253 @@ REDIS CACHE SERVICE - Caching layer to reduce API calls
 - Stores API responses temporarily in Redis (in-memory storage)
 - Reduces Polygon.io API usage (5 req/min limit on free tier)
 - Current price cached 5 min, historical data cached 1 hour
+- Two tiers: a small in-process LRU (L1) in front of Redis (L2), so hot keys
+  like price:current:AAPL are served without a network round trip
+- L1 TTL is capped at the key's remaining Redis TTL
+- Writes/deletes are broadcast on Redis pub/sub so every worker drops its L1 copy
+- History is cached once per symbol (history:<symbol>:series) and extended in
+  place when new bars are written, instead of once per period
+- Values are encoded by services/serializers.py (orjson, columnar for history:* keys)
+- The client is sync; async code calls the *_async variants, which answer L1 hits
+  inline and run anything that talks to Redis in a worker thread (run_cache(),
+  at most CACHE_THREADS at once). Every command is bounded by REDIS_SOCKET_TIMEOUT
+- Pre-encoded /api/history bodies live in one hash per symbol (history:<symbol>:body,
+  one field per view) and are dropped whenever that symbol's series is written; the
+  hash restarts holding the new series version, and a body is only stored if it was
+  cut from that version (a slow request can't re-insert a body from an older series)
 - Used by: API endpoints to speed up repeated requests
 """
+import anyio
+import anyio.to_thread
+import functools
 import redis
 import json
 import os
-from typing import Optional, Any
-from datetime import timedelta
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Optional, Any, Tuple
+from datetime import date, timedelta
+
+from services.serializers import Serializer, serializer_for_key
+
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 2))          # seconds per command
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', 2))        # seconds to connect
+CACHE_THREADS = int(os.getenv('CACHE_THREADS', 16))  # concurrent Redis calls from async code
 
 redis_client = redis.Redis(
     host=os.getenv('REDIS_HOST', 'redis'),
     port=int(os.getenv('REDIS_PORT', 6379)),
     db=0,
-    decode_responses=True
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    decode_responses=False  # values are binary (see services/serializers.py)
 )
 
+L1_MAX_ENTRIES = int(os.getenv('CACHE_L1_MAX_ENTRIES', 1024))
+L1_MAX_TTL = float(os.getenv('CACHE_L1_TTL', 30))  # seconds, 0 disables L1
+
+# The canonical history series covers the longest period (5y)
+HISTORY_SERIES_DAYS = 1825
+
+# Field of history:<symbol>:body holding the version of the series its bodies were cut from
+HISTORY_VERSION_FIELD = "_version"
+
+# Write a body field only if the hash still holds the version it was cut from
+_SET_HISTORY_BODY_SCRIPT = """
+if redis.call('hget', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('hset', KEYS[1], ARGV[3], ARGV[4])
+redis.call('pexpire', KEYS[1], ARGV[5])
+return 1
+"""
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+INSTANCE_ID = uuid.uuid4().hex  # lets a worker ignore its own broadcasts
+
+
+class LocalCache:
+    """
+    Thread-safe in-process LRU with per-entry expiry.
+    Values are shared objects - callers must treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (l1_expires_at, redis_expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Returns (value, redis_expires_at) or (None, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None, None
+            self._entries.move_to_end(key)
+            return entry[2], entry[1]
+
+    def set(self, key: str, value: Any, redis_ttl: Optional[float]):
+        if self.max_entries <= 0 or L1_MAX_TTL <= 0:
+            return
+        now = time.monotonic()
+        l1_ttl = min(L1_MAX_TTL, redis_ttl) if redis_ttl else L1_MAX_TTL
+        redis_expires_at = now + redis_ttl if redis_ttl else None
+        with self._lock:
+            self._entries[key] = (now + l1_ttl, redis_expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_pattern(self, pattern: str):
+        with self._lock:
+            for key in [k for k in self._entries if fnmatchcase(k, pattern)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+local_cache = LocalCache(L1_MAX_ENTRIES)
+
+_stats = {"l1_hits": 0, "l1_misses": 0, "redis_hits": 0, "redis_misses": 0}
+_listener = None
+_thread_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def get_cache_stats() -> dict:
+    """
+    Hit/miss counters per tier for this worker.
+    """
+    stats = dict(_stats)
+    stats["l1_entries"] = len(local_cache)
+    stats["l1_listener"] = _listener is not None and _listener.is_alive()
+    return stats
+
+
+def _publish_invalidation(keys=None, pattern: str = None):
+    """Tell other workers to drop keys from their L1."""
+    try:
+        message = {"origin": INSTANCE_ID, "keys": keys or [], "pattern": pattern}
+        redis_client.publish(INVALIDATION_CHANNEL, json.dumps(message))
+    except Exception as e:
+        print(f"Cache publish error: {e}")
+
+
+def _handle_invalidation(message):
+    try:
+        payload = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    if payload.get("origin") == INSTANCE_ID:
+        return
+    for key in payload.get("keys", []):
+        local_cache.delete(key)
+        _drop_local_dependents(key)
+    if payload.get("pattern"):
+        local_cache.delete_pattern(payload["pattern"])
+
+
+def start_invalidation_listener():
+    """
+    Subscribe to L1 invalidations in a background thread.
+    Call this once per worker on app startup.
+    """
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return
+
+    def on_error(e, pubsub, thread):
+        # Redis went away - drop L1 so we don't serve values we can't invalidate
+        print(f"Cache listener error: {e}")
+        local_cache.clear()
+        pubsub.close()
+        thread.stop()
+
+    try:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{INVALIDATION_CHANNEL: _handle_invalidation})
+        _listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=on_error)
+    except Exception as e:
+        print(f"Cache listener start error: {e}")
+
+
+def stop_invalidation_listener():
+    """
+    Stop the L1 invalidation thread. Call this on app shutdown.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
 def get_cache(key: str) -> Optional[Any]:
     """
-    Get value from Redis cache.
+    Get value from cache (L1 first, then Redis).
     Returns None if key doesn't exist or is expired.
     """
+    value, _ = get_cache_with_ttl(key)
+    return value
+
+
+def get_cache_with_ttl(key: str) -> Tuple[Optional[Any], Optional[float]]:
+    """
+    Get value and its remaining Redis TTL (seconds) in one round trip,
+    or none at all on an L1 hit.
+    Returns (None, None) if key doesn't exist or is expired.
+    """
+    value, redis_expires_at = local_cache.get(key)
+    if value is not None:
+        _stats["l1_hits"] += 1
+        return value, (redis_expires_at - time.monotonic() if redis_expires_at else None)
+    _stats["l1_misses"] += 1
+
     try:
-        value = redis_client.get(key)
-        if value:
-            return json.loads(value)
-        return None
+        pipe = redis_client.pipeline()
+        pipe.get(key)
+        pipe.pttl(key)
+        raw, ttl_ms = pipe.execute()
+        if raw:
+            _stats["redis_hits"] += 1
+            ttl = ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None
+            value = Serializer.decode(raw)
+            local_cache.set(key, value, ttl)
+            return value, ttl
+        _stats["redis_misses"] += 1
+        return None, None
     except Exception as e:
         print(f"Cache get error: {e}")
+        return None, None
+
+
+def get_ttl(key: str) -> Optional[float]:
+    """
+    Remaining Redis TTL in seconds, without fetching the value (from L1 if it's there).
+    Returns None if the key doesn't exist or never expires.
+    """
+    value, redis_expires_at = local_cache.get(key)
+    if value is not None:
+        return redis_expires_at - time.monotonic() if redis_expires_at else None
+    try:
+        ttl_ms = redis_client.pttl(key)
+        return ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None
+    except Exception as e:
+        print(f"Cache ttl error: {e}")
         return None
 
 
@@ -40,11 +259,72 @@ def set_cache(key: str, value: Any, expire_seconds: int = 300):
     Default: 5 minutes (300 seconds)
     """
     try:
-        redis_client.setex(
-            key,
-            timedelta(seconds=expire_seconds),
-            json.dumps(value)
-        )
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.setex(key, timedelta(seconds=expire_seconds), serializer_for_key(key).encode(value))
+        _reset_dependents(pipe, {key: value}, expire_seconds)
+        pipe.execute()
+        local_cache.set(key, value, expire_seconds)
+        _drop_local_dependents(key)
+        _publish_invalidation(keys=[key])
+        return True
+    except Exception as e:
+        print(f"Cache set error: {e}")
+        return False
+
+
+def get_cache_many(keys) -> dict:
+    """
+    Get several keys at once: L1 first, then one Redis round trip for the rest.
+    Returns {key: value} for the keys that were found.
+    """
+    found = {}
+    missing = []
+    for key in keys:
+        value, _ = local_cache.get(key)
+        if value is not None:
+            _stats["l1_hits"] += 1
+            found[key] = value
+        else:
+            _stats["l1_misses"] += 1
+            missing.append(key)
+    if not missing:
+        return found
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.mget(missing)
+        for key in missing:
+            pipe.pttl(key)
+        raw_values, *ttls_ms = pipe.execute()
+        for key, raw, ttl_ms in zip(missing, raw_values, ttls_ms):
+            if raw:
+                _stats["redis_hits"] += 1
+                value = Serializer.decode(raw)
+                local_cache.set(key, value, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+                found[key] = value
+            else:
+                _stats["redis_misses"] += 1
+    except Exception as e:
+        print(f"Cache get error: {e}")
+    return found
+
+
+def set_cache_many(values: dict, expire_seconds: int = 300):
+    """
+    Set several keys with the same expiration in one pipelined round trip.
+    """
+    if not values:
+        return True
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, timedelta(seconds=expire_seconds), serializer_for_key(key).encode(value))
+        _reset_dependents(pipe, values, expire_seconds)
+        pipe.execute()
+        for key, value in values.items():
+            local_cache.set(key, value, expire_seconds)
+            _drop_local_dependents(key)
+        _publish_invalidation(keys=list(values))
         return True
     except Exception as e:
         print(f"Cache set error: {e}")
@@ -53,16 +333,169 @@ def set_cache(key: str, value: Any, expire_seconds: int = 300):
 
 def delete_cache(key: str):
     """
-    Delete a key from cache.
+    Delete a key from cache (every worker's L1 too).
     """
+    local_cache.delete(key)
+    _drop_local_dependents(key)
     try:
-        redis_client.delete(key)
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.delete(key)
+        _delete_dependents(pipe, [key])
+        pipe.execute()
+        _publish_invalidation(keys=[key])
         return True
     except Exception as e:
         print(f"Cache delete error: {e}")
         return False
 
 
+def history_series_key(symbol: str) -> str:
+    """
+    Cache key for a symbol's canonical history series (every period is a slice of it).
+    """
+    return f"history:{symbol}:series"
+
+
+def history_body_key(symbol: str) -> str:
+    """
+    Cache key of the hash holding a symbol's pre-encoded /api/history bodies (one field per view).
+    """
+    return f"history:{symbol}:body"
+
+
+def _dependent_key(key: str) -> Optional[str]:
+    """The key derived from `key` that must be dropped whenever `key` is written."""
+    if key.startswith("history:") and key.endswith(":series"):
+        return history_body_key(key[len("history:"):-len(":series")])
+    return None
+
+
+def history_series_version(series: dict) -> str:
+    """Changes whenever the cached series gains or revises its newest bar."""
+    rows = series.get("data") or []
+    return f"{rows[0]['date']}:{rows[0]['close']}:{len(rows)}" if rows else ""
+
+
+def _delete_dependents(pipe, keys):
+    dependents = [d for d in map(_dependent_key, keys) if d]
+    if dependents:
+        pipe.delete(*dependents)
+
+
+def _reset_dependents(pipe, values: dict, expire_seconds):
+    """Drop the keys derived from written keys; a body hash restarts with the new series version."""
+    for key, value in values.items():
+        dependent = _dependent_key(key)
+        if not dependent:
+            continue
+        pipe.delete(dependent)
+        if isinstance(value, dict):
+            pipe.hset(dependent, HISTORY_VERSION_FIELD, history_series_version(value))
+            pipe.expire(dependent, timedelta(seconds=expire_seconds))
+
+
+def _drop_local_dependents(key: str):
+    dependent = _dependent_key(key)
+    if dependent:
+        local_cache.delete_pattern(f"{dependent}:*")
+
+
+def get_history_body(symbol: str, view: str) -> Optional[bytes]:
+    """
+    Pre-encoded /api/history body for one view (L1 first, then Redis), as stored - never decoded.
+    Returns None if it isn't cached.
+    """
+    key = history_body_key(symbol)
+    value, _ = local_cache.get(f"{key}:{view}")
+    if value is not None:
+        _stats["l1_hits"] += 1
+        return value
+    _stats["l1_misses"] += 1
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hget(key, view)
+        pipe.pttl(key)
+        raw, ttl_ms = pipe.execute()
+        if raw:
+            _stats["redis_hits"] += 1
+            local_cache.set(f"{key}:{view}", raw, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else None)
+            return raw
+        _stats["redis_misses"] += 1
+        return None
+    except Exception as e:
+        print(f"Cache get error: {e}")
+        return None
+
+
+def set_history_body(symbol: str, view: str, body: bytes, expire_seconds: float, version: str):
+    """
+    Store a pre-encoded /api/history body for at most expire_seconds, if the cached
+    series is still at `version` (history_series_version() of the series it was cut from).
+    Every field is cut from the same series and shares its freshness deadline,
+    so resetting the hash's expiry on each write doesn't extend older fields.
+    Returns False if the series has moved on (or the write failed).
+    """
+    key = history_body_key(symbol)
+    # L1 first: an invalidation landing after the check below then drops it as usual
+    local_cache.set(f"{key}:{view}", body, expire_seconds)
+    try:
+        stored = redis_client.eval(
+            _SET_HISTORY_BODY_SCRIPT, 1, key,
+            HISTORY_VERSION_FIELD, version, view, body, int(expire_seconds * 1000)
+        )
+        if not stored:
+            local_cache.delete(f"{key}:{view}")
+            return False
+        _publish_invalidation(keys=[f"{key}:{view}"])
+        return True
+    except Exception as e:
+        local_cache.delete(f"{key}:{view}")
+        print(f"Cache set error: {e}")
+        return False
+
+
+def history_view_key(symbol: str, period: str, interval: str, max_points) -> str:
+    """
+    Cache key for a downsampled slice of the history series (services/downsampling.py).
+    """
+    return f"history:{symbol}:view:{period}:{interval}:{max_points or 'all'}"
+
+
+def extend_history_series(symbol: str, bars) -> bool:
+    """
+    Merge new/updated daily bars into a cached history series, in place.
+    Does nothing if the series isn't cached (the next read loads it in full).
+    
+    Args:
+        bars: dicts with date/open/high/low/close/volume (date as str, date or datetime)
+    """
+    key = history_series_key(symbol)
+    series, ttl = get_cache_with_ttl(key)
+    if not series or not bars:
+        return False
+    
+    merged = {row["date"]: row for row in series["data"]}
+    for bar in bars:
+        bar_date = bar["date"]
+        bar_date = bar_date.isoformat()[:10] if hasattr(bar_date, "isoformat") else str(bar_date)[:10]
+        merged[bar_date] = {
+            "date": bar_date,
+            "open": round(float(bar["open"]), 2),
+            "high": round(float(bar["high"]), 2),
+            "low": round(float(bar["low"]), 2),
+            "close": round(float(bar["close"]), 2),
+            "volume": int(bar["volume"])
+        }
+    
+    # Newest first, same as the DB and API paths, trimmed to the series window
+    data = [merged[d] for d in sorted(merged, reverse=True)]
+    oldest = (date.fromisoformat(data[0]["date"]) - timedelta(days=HISTORY_SERIES_DAYS)).isoformat()
+    data = [row for row in data if row["date"] > oldest]
+    updated = dict(series, data=data, count=len(data))
+    return set_cache(key, updated, expire_seconds=max(int(ttl or 0), 60))
+
+
 def get_current_price_cached(symbol: str):
     """
     Get current price with 5-minute cache.
@@ -105,7 +538,103 @@ def clear_stock_cache(symbol: str):
     """
     Clear all cache entries for a specific stock.
     """
-    pattern = f"*:{symbol}:*"
-    for key in redis_client.scan_iter(match=pattern):
-        redis_client.delete(key)
+    # Keys either end with the symbol (price:current:AAPL) or have it in the middle
+    for pattern in (f"*:{symbol}", f"*:{symbol}:*"):
+        local_cache.delete_pattern(pattern)
+        for key in redis_client.scan_iter(match=pattern):
+            redis_client.delete(key)
+        _publish_invalidation(pattern=pattern)
     print(f"Cleared cache for {symbol}")
+
+
+# ============================================================================
+# ASYNC VARIANTS - L1 hits inline, Redis round trips in a worker thread
+# ============================================================================
+
+async def run_cache(func, *args, **kwargs):
+    """
+    Run a sync call that talks to Redis in a worker thread, so the event loop
+    never waits on the network. At most CACHE_THREADS run at once.
+    """
+    global _thread_limiter
+    if _thread_limiter is None:
+        _thread_limiter = anyio.CapacityLimiter(CACHE_THREADS)
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_thread_limiter)
+
+
+async def get_cache_with_ttl_async(key: str) -> Tuple[Optional[Any], Optional[float]]:
+    """
+    get_cache_with_ttl() from async code.
+    """
+    value, redis_expires_at = local_cache.get(key)
+    if value is not None:
+        _stats["l1_hits"] += 1
+        return value, (redis_expires_at - time.monotonic() if redis_expires_at else None)
+    return await run_cache(get_cache_with_ttl, key)
+
+
+async def get_cache_async(key: str) -> Optional[Any]:
+    """
+    get_cache() from async code.
+    """
+    value, _ = await get_cache_with_ttl_async(key)
+    return value
+
+
+async def get_ttl_async(key: str) -> Optional[float]:
+    """
+    get_ttl() from async code.
+    """
+    value, redis_expires_at = local_cache.get(key)
+    if value is not None:
+        return redis_expires_at - time.monotonic() if redis_expires_at else None
+    return await run_cache(get_ttl, key)
+
+
+async def get_cache_many_async(keys) -> dict:
+    """
+    get_cache_many() from async code (inline only if every key is in L1).
+    """
+    keys = list(keys)
+    found = {}
+    for key in keys:
+        value, _ = local_cache.get(key)
+        if value is None:
+            return await run_cache(get_cache_many, keys)
+        found[key] = value
+    _stats["l1_hits"] += len(found)
+    return found
+
+
+async def set_cache_async(key: str, value: Any, expire_seconds: int = 300):
+    """
+    set_cache() from async code.
+    """
+    return await run_cache(set_cache, key, value, expire_seconds)
+
+
+async def set_cache_many_async(values: dict, expire_seconds: int = 300):
+    """
+    set_cache_many() from async code.
+    """
+    if not values:
+        return True
+    return await run_cache(set_cache_many, values, expire_seconds)
+
+
+async def get_history_body_async(symbol: str, view: str) -> Optional[bytes]:
+    """
+    get_history_body() from async code.
+    """
+    value, _ = local_cache.get(f"{history_body_key(symbol)}:{view}")
+    if value is not None:
+        _stats["l1_hits"] += 1
+        return value
+    return await run_cache(get_history_body, symbol, view)
+
+
+async def set_history_body_async(symbol: str, view: str, body: bytes, expire_seconds: float, version: str):
+    """
+    set_history_body() from async code.
+    """
+    return await run_cache(set_history_body, symbol, view, body, expire_seconds, version)
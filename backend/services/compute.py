@@ -0,0 +1,374 @@
+"""
+COMPUTE EXECUTOR - Process pool for the CPU-heavy analytics endpoints
+- One managed ProcessPoolExecutor per API worker, started at app startup
+  (COMPUTE_WORKERS processes, "spawn" so no sockets or DB pools are inherited)
+- Shared prices: the parent reads every tracked stock's price arrays once (one IN query)
+  into a multiprocessing.shared_memory block and reloads it after COMPUTE_PRICE_TTL
+  seconds; processes attach to it by name (at startup, and again when a job carries a
+  newer snapshot), so jobs build their return matrices from memory without a DB read
+  or a per-process copy
+- Bounded queue: at most COMPUTE_WORKERS + COMPUTE_QUEUE_SIZE jobs queued or running;
+  past that run() raises ComputeBusy right away (the API answers 503 + Retry-After)
+- Per-job timeout (ComputeTimeout, the API answers 504); a job that's already running
+  keeps its slot until its process finishes, so the bound stays true
+- COMPUTE_WORKERS=0 runs jobs in the sync threadpool (database.db.run_sync) instead,
+  with the prices loaded in-process - the "without" side of scripts/bench_compute_offload.py
+- Jobs are module-level functions (picklable): risk_calculator.universe_risk_job /
+  portfolio_risk_job, covariance.build_covariance_job, portfolio_optimizer.optimize_job
+- Used by: /api/risk/*, /api/analysis/correlation, /api/portfolio/optimize
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from config.stocks import get_all_stocks
+from database.db import SessionLocal, run_sync
+from database.price_store import PRICE_DTYPE, PriceArrays, get_price_arrays_many
+
+
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+COMPUTE_QUEUE_SIZE = int(os.getenv("COMPUTE_QUEUE_SIZE", 8))      # waiting jobs on top of the running ones
+COMPUTE_TIMEOUT = float(os.getenv("COMPUTE_TIMEOUT", 30))        # seconds per job
+COMPUTE_PRICE_TTL = float(os.getenv("COMPUTE_PRICE_TTL", 900))   # reload preloaded prices after this
+COMPUTE_START_METHOD = os.getenv("COMPUTE_START_METHOD", "spawn")
+
+# Calendar days of prices kept in each process - covers the longest risk period (5y)
+PRELOAD_DAYS = 1825 + 10
+
+
+class ComputeBusy(RuntimeError):
+    """Every compute process is busy and the queue is full."""
+
+
+class ComputeTimeout(TimeoutError):
+    """A job didn't finish within its timeout."""
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+_in_worker = False
+_prices: Optional[Dict[str, PriceArrays]] = None
+_prices_loaded_at = 0.0
+_prices_lock = threading.Lock()
+
+_shared_prices: Optional[Dict[str, PriceArrays]] = None
+_shared_layout: Optional["SharedPrices"] = None
+_shared_blocks: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedPrices(NamedTuple):
+    """
+    Name and layout of a shared-memory price snapshot (cheap to pickle).
+    """
+    name: str
+    symbols: list
+    offsets: list  # symbol i owns rows offsets[i]:offsets[i + 1]
+
+
+def load_preload_prices() -> Dict[str, PriceArrays]:
+    """{symbol: PriceArrays (oldest first)} for every tracked stock over the last PRELOAD_DAYS."""
+    db = SessionLocal()
+    try:
+        return get_price_arrays_many(
+            db, [s["symbol"] for s in get_all_stocks()],
+            start_date=date.today() - timedelta(days=PRELOAD_DAYS),
+            ascending=True
+        )
+    finally:
+        db.close()
+
+
+def share_prices(prices: Dict[str, PriceArrays]):
+    """
+    Copy price arrays into one shared-memory block of PRICE_DTYPE rows.
+
+    Returns:
+        (SharedPrices, SharedMemory block - the caller must close() and unlink() it)
+    """
+    symbols = list(prices)
+    offsets = np.concatenate([[0], np.cumsum([len(prices[s]) for s in symbols])]).astype(int).tolist()
+    block = shared_memory.SharedMemory(create=True, size=max(offsets[-1] * PRICE_DTYPE.itemsize, 1))
+    rows = np.ndarray((offsets[-1],), dtype=PRICE_DTYPE, buffer=block.buf)
+    for i, symbol in enumerate(symbols):
+        for field in PRICE_DTYPE.names:
+            rows[field][offsets[i]:offsets[i + 1]] = getattr(prices[symbol], field)
+    del rows
+    return SharedPrices(block.name, symbols, offsets), block
+
+
+def in_compute_worker() -> bool:
+    """True inside a compute process (jobs must not start process pools of their own)."""
+    return _in_worker
+
+
+def preloaded_price_arrays() -> Dict[str, PriceArrays]:
+    """
+    {symbol: PriceArrays (oldest first)} for every tracked stock over the last PRELOAD_DAYS.
+    In a compute process: views into the parent's shared snapshot. Otherwise (thread mode,
+    or a process started while the parent couldn't load it): loaded here once and
+    refreshed every COMPUTE_PRICE_TTL seconds.
+    """
+    global _prices, _prices_loaded_at
+    if _shared_prices is not None:
+        return _shared_prices
+    with _prices_lock:
+        if _prices is None or time.monotonic() - _prices_loaded_at > COMPUTE_PRICE_TTL:
+            _prices = load_preload_prices()
+            _prices_loaded_at = time.monotonic()
+        return _prices
+
+
+def _attach_prices(layout: Optional[SharedPrices]):
+    """Map a price snapshot by name (once per snapshot) and close older ones."""
+    global _shared_prices, _shared_layout
+    if layout is None or layout == _shared_layout:
+        return
+    block = shared_memory.SharedMemory(name=layout.name)
+    rows = np.ndarray((layout.offsets[-1],), dtype=PRICE_DTYPE, buffer=block.buf)
+    _shared_prices = {
+        symbol: PriceArrays.from_structured(symbol, rows[layout.offsets[i]:layout.offsets[i + 1]])
+        for i, symbol in enumerate(layout.symbols)
+    }
+    _shared_layout = layout
+    for name, old in list(_shared_blocks.items()):
+        try:
+            old.close()
+            del _shared_blocks[name]
+        except BufferError:
+            pass  # a job still holds arrays from it - retried on the next swap
+    _shared_blocks[layout.name] = block
+
+
+def _init_worker(layout: Optional[SharedPrices]):
+    """Process initializer - attach to the parent's price snapshot before the first job arrives."""
+    global _in_worker
+    _in_worker = True
+    try:
+        _attach_prices(layout)
+        print(f"Compute worker {os.getpid()} ready: {len(layout.symbols) if layout else 0} shared symbols")
+    except Exception as e:
+        # Jobs carry the snapshot too (and fall back to loading it), so this isn't fatal
+        print(f"Compute worker {os.getpid()} attach error: {e}")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _run_job(layout: Optional[SharedPrices], func: Callable, args: tuple, kwargs: dict):
+    try:
+        _attach_prices(layout)
+    except FileNotFoundError:
+        pass  # replaced twice while the job was queued - keep the snapshot already mapped
+    return func(*args, **kwargs)
+
+
+# ============================================================================
+# PARENT SIDE
+# ============================================================================
+
+class ComputeExecutor:
+    """
+    ProcessPoolExecutor with a bounded queue, per-job timeouts and a shared price snapshot.
+    run() is awaited from the event loop; completion callbacks arrive on the
+    pool's management thread, hence the lock around the counters.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0, "restarts": 0}
+        self._snapshot: Optional[SharedPrices] = None
+        self._snapshot_at = 0.0
+        self._snapshot_block: Optional[shared_memory.SharedMemory] = None
+        # The snapshot before the current one - jobs still queued may carry its name
+        self._retired_block: Optional[shared_memory.SharedMemory] = None
+        self._snapshot_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _snapshot_stale(self) -> bool:
+        return self._snapshot is None or time.monotonic() - self._snapshot_at > COMPUTE_PRICE_TTL
+
+    def price_snapshot(self) -> Optional[SharedPrices]:
+        """
+        The shared price snapshot, rebuilt once it's older than COMPUTE_PRICE_TTL.
+        Blocking (one DB read) - run() calls it through run_sync. None if it was never
+        loaded (the processes then load their own copy).
+        """
+        with self._snapshot_lock:
+            if not self._snapshot_stale():
+                return self._snapshot
+            try:
+                layout, block = share_prices(load_preload_prices())
+            except Exception as e:
+                print(f"Compute price snapshot error: {e}")
+                return self._snapshot
+            _release_block(self._retired_block)
+            self._retired_block, self._snapshot_block = self._snapshot_block, block
+            self._snapshot, self._snapshot_at = layout, time.monotonic()
+            return layout
+
+    def start(self):
+        if not self.enabled or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(COMPUTE_START_METHOD),
+            initializer=_init_worker,
+            initargs=(self._snapshot,)
+        )
+        # Spawns every process now, so the warm-up isn't paid by the first requests
+        for _ in range(self.workers):
+            self._pool.submit(_ping)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def close(self):
+        """shutdown() and free the price snapshots."""
+        self.shutdown()
+        with self._snapshot_lock:
+            _release_block(self._retired_block)
+            _release_block(self._snapshot_block)
+            self._retired_block = self._snapshot_block = self._snapshot = None
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        """Replace a pool whose process died (once, however many jobs saw it break)."""
+        if self._pool is not broken:
+            return
+        print("Compute pool broken (a worker died) - restarting")
+        self.shutdown()
+        self._stats["restarts"] += 1
+        self.start()
+
+    def _submit(self, layout: Optional[SharedPrices], func: Callable, args: tuple, kwargs: dict) -> Future:
+        pool = self._pool
+        try:
+            future = pool.submit(_run_job, layout, func, args, kwargs)
+        except BrokenProcessPool:
+            self._restart(pool)
+            pool = self._pool
+            future = pool.submit(_run_job, layout, func, args, kwargs)
+        future.pool = pool
+        return future
+
+    def _finished(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in a compute process and return its result.
+        Raises ComputeBusy if the queue is full, ComputeTimeout after `timeout` seconds
+        (default COMPUTE_TIMEOUT); exceptions raised by func propagate unchanged.
+        """
+        if not self.enabled:
+            return await run_sync(func, *args, **kwargs)
+        layout = await run_sync(self.price_snapshot) if self._snapshot_stale() else self._snapshot
+        if self._pool is None:
+            self.start()
+
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                self._stats["rejected"] += 1
+                raise ComputeBusy(f"All {self.workers} compute workers are busy, try again shortly.")
+            self._pending += 1
+            self._stats["submitted"] += 1
+        try:
+            future = self._submit(layout, func, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._finished)
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # wait_for cancelled the job if it was still queued; a running one
+            # finishes in the background and keeps its slot until then
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise ComputeTimeout(f"{func.__name__} took longer than {timeout:g}s")
+        except BrokenProcessPool:
+            self._restart(future.pool)
+            raise RuntimeError("A compute worker died while running the job")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                workers=self.workers,
+                queue_size=self.queue_size,
+                pending=self._pending,
+                mode="process" if self.enabled else "thread",
+                shared_symbols=len(self._snapshot.symbols) if self._snapshot else 0
+            )
+
+
+def _release_block(block: Optional[shared_memory.SharedMemory]):
+    if block is None:
+        return
+    block.close()
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+
+executor = ComputeExecutor(COMPUTE_WORKERS, COMPUTE_QUEUE_SIZE, COMPUTE_TIMEOUT)
+
+
+def start_compute_executor():
+    """
+    Load the shared price snapshot and start the compute processes (call on app startup).
+    """
+    if executor.enabled:
+        executor.price_snapshot()
+    executor.start()
+
+
+def stop_compute_executor():
+    """
+    Stop the compute processes and free the price snapshot (call on app shutdown).
+    """
+    executor.close()
+
+
+async def run_compute(func: Callable, *args, **kwargs) -> Any:
+    """
+    executor.run() - see ComputeExecutor.run.
+    """
+    return await executor.run(func, *args, **kwargs)
+
+
+def get_compute_stats() -> dict:
+    """
+    Compute pool counters for this API worker.
+    """
+    return executor.stats()
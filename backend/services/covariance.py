@@ -0,0 +1,212 @@
+"""
+COVARIANCE SERVICE - Daily covariance/correlation matrices for the whole universe
+- Estimators: sample, Ledoit-Wolf (shrunk toward scaled identity, scikit-learn)
+  and EWMA (RiskMetrics, lambda = COVARIANCE_EWMA_LAMBDA)
+- Built once per trading day for every lookback in COVARIANCE_LOOKBACKS (trading days),
+  from one return-matrix read, by scripts/daily_update.py (or on first request)
+- Stored in Redis as packed float arrays (MATRIX_SERIALIZER) under
+  cov:{estimator}:{lookback}:{asof}, with cov:{estimator}:{lookback}:latest → {"asof"}
+- Lookbacks outside COVARIANCE_LOOKBACKS are only built on request, and the nightly job
+  doesn't refresh them: their latest pointer expires at the next daily update
+  (DAILY_UPDATE_UTC), so the first request after it rebuilds from the new bars
+- Any symbol subset is a submatrix (np.ix_) of the cached 50×50, no recomputation
+- Symbols with < MIN_COVERAGE of the lookback's days are left out; their remaining
+  gaps are filled with the column mean (zero deviation) so matrices stay PSD
+- build_covariance_job: a missing matrix is built in the compute pool (services/compute.py)
+- Used by: GET /api/analysis/correlation, portfolio optimization and risk
+"""
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config.stocks import get_all_stocks
+from services.cache import get_cache, set_cache
+from services.risk_calculator import TRADING_DAYS, ReturnMatrix, load_return_matrix
+
+
+ESTIMATORS = ("sample", "ledoit_wolf", "ewma")
+DEFAULT_ESTIMATOR = "ledoit_wolf"
+COVARIANCE_LOOKBACKS = tuple(int(x) for x in os.getenv("COVARIANCE_LOOKBACKS", "60,252,756").split(","))
+DEFAULT_LOOKBACK = 252
+EWMA_LAMBDA = float(os.getenv("COVARIANCE_EWMA_LAMBDA", "0.94"))
+MIN_COVERAGE = 0.8
+COVARIANCE_CACHE_TTL = 3 * 24 * 3600  # dated keys - keep a few days around for as-of lookups
+# By when scripts/daily_update.py has run (cron: 16:30 ET, i.e. 20:30/21:30 UTC)
+DAILY_UPDATE_UTC = os.getenv("DAILY_UPDATE_UTC", "21:30")
+
+
+def covariance_key(estimator: str, lookback: int, asof: str) -> str:
+    return f"cov:{estimator}:{lookback}:{asof}"
+
+
+def latest_key(estimator: str, lookback: int) -> str:
+    return f"cov:{estimator}:{lookback}:latest"
+
+
+def _seconds_until_daily_update(now: Optional[datetime] = None) -> int:
+    """Seconds until the next DAILY_UPDATE_UTC (at least a minute)."""
+    now = now or datetime.now(timezone.utc)
+    hour, minute = (int(x) for x in DAILY_UPDATE_UTC.split(":"))
+    next_update = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_update <= now:
+        next_update += timedelta(days=1)
+    return max(60, int((next_update - now).total_seconds()))
+
+
+def _calendar_days(lookback: int) -> int:
+    """Calendar days that cover `lookback` trading days (plus holidays)."""
+    return int(lookback * 365 / TRADING_DAYS) + 10
+
+
+def prepare_returns(matrix: ReturnMatrix, lookback: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Last `lookback` rows of the return matrix, without sparse symbols and with no NaNs.
+
+    Returns:
+        (symbols, (T × N) returns)
+    """
+    returns = matrix.returns[-lookback:]
+    coverage = (~np.isnan(returns)).mean(axis=0) if len(returns) else np.zeros(len(matrix.symbols))
+    keep = np.flatnonzero(coverage >= MIN_COVERAGE)
+    returns = returns[:, keep]
+    column_mean = np.nanmean(returns, axis=0)
+    returns = np.where(np.isnan(returns), column_mean, returns)
+    return [matrix.symbols[j] for j in keep], returns
+
+
+def estimate_covariance(returns: np.ndarray, estimator: str = DEFAULT_ESTIMATOR) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Daily mean vector and covariance matrix of a (T × N) return matrix with no NaNs.
+
+    Args:
+        estimator: "sample", "ledoit_wolf" or "ewma"
+
+    Returns:
+        (mean (N,), covariance (N × N))
+    """
+    if estimator == "sample":
+        return returns.mean(axis=0), np.cov(returns, rowvar=False)
+
+    if estimator == "ledoit_wolf":
+        from sklearn.covariance import ledoit_wolf
+        covariance, _ = ledoit_wolf(returns)
+        return returns.mean(axis=0), covariance
+
+    if estimator == "ewma":
+        # Newest row weighs 1, each older row lambda times less, normalized to sum to 1
+        weights = EWMA_LAMBDA ** np.arange(len(returns) - 1, -1, -1, dtype=np.float64)
+        weights /= weights.sum()
+        mean = weights @ returns
+        scaled = (returns - mean) * np.sqrt(weights)[:, None]
+        return mean, scaled.T @ scaled
+
+    raise ValueError(f"Unknown estimator {estimator}. Use one of: {', '.join(ESTIMATORS)}")
+
+
+def build_covariances(
+    db: Session,
+    asof: Optional[date] = None,
+    lookbacks: Sequence[int] = COVARIANCE_LOOKBACKS,
+    estimators: Sequence[str] = ESTIMATORS,
+    symbols: Optional[Sequence[str]] = None
+) -> Dict[Tuple[str, int], dict]:
+    """
+    Compute and cache every (estimator, lookback) matrix from one return-matrix read.
+
+    Args:
+        asof: last date included (default: today - the stored as-of is the last trading day)
+        symbols: universe (default: every tracked stock)
+
+    Returns:
+        {(estimator, lookback): payload}
+    """
+    symbols = list(symbols or [s["symbol"] for s in get_all_stocks()])
+    matrix = load_return_matrix(db, symbols, _calendar_days(max(lookbacks)), end_date=asof)
+    if len(matrix.dates) == 0:
+        return {}
+
+    asof_str = str(matrix.dates[-1])
+    built = {}
+    for lookback in lookbacks:
+        lookback_symbols, returns = prepare_returns(matrix, lookback)
+        if len(lookback_symbols) < 2 or len(returns) < 2:
+            continue
+        # Nothing rebuilds an on-demand lookback nightly, so its pointer can't outlive the next update
+        pointer_ttl = COVARIANCE_CACHE_TTL if lookback in COVARIANCE_LOOKBACKS else _seconds_until_daily_update()
+        for estimator in estimators:
+            mean, covariance = estimate_covariance(returns, estimator)
+            payload = {
+                "estimator": estimator,
+                "lookback": lookback,
+                "asof": asof_str,
+                "observations": len(returns),
+                "symbols": lookback_symbols,
+                "mean": mean,
+                "matrix": covariance,
+                "status": "success"
+            }
+            set_cache(covariance_key(estimator, lookback, asof_str), payload, expire_seconds=COVARIANCE_CACHE_TTL)
+            set_cache(latest_key(estimator, lookback), {"asof": asof_str}, expire_seconds=pointer_ttl)
+            built[(estimator, lookback)] = payload
+    return built
+
+
+def get_covariance(estimator: str, lookback: int, asof: Optional[str] = None) -> Optional[dict]:
+    """
+    Cached payload for (estimator, lookback), at `asof` or the latest build. None if not cached.
+    """
+    if asof is None:
+        pointer = get_cache(latest_key(estimator, lookback))
+        if not pointer:
+            return None
+        asof = pointer["asof"]
+    return get_cache(covariance_key(estimator, lookback, asof))
+
+
+def get_or_build_covariance(db_factory, estimator: str = DEFAULT_ESTIMATOR, lookback: int = DEFAULT_LOOKBACK) -> Optional[dict]:
+    """
+    Latest cached payload, building (only) this estimator/lookback if it isn't cached yet.
+
+    Args:
+        db_factory: callable returning a Session (only opened on a cache miss)
+    """
+    payload = get_covariance(estimator, lookback)
+    if payload is not None:
+        return payload
+    db = db_factory()
+    try:
+        return build_covariances(db, lookbacks=[lookback], estimators=[estimator]).get((estimator, lookback))
+    finally:
+        db.close()
+
+
+def build_covariance_job(estimator: str = DEFAULT_ESTIMATOR, lookback: int = DEFAULT_LOOKBACK) -> Optional[dict]:
+    """
+    get_or_build_covariance() with the process's own sessions (a compute pool job).
+    """
+    from database.db import SessionLocal
+    return get_or_build_covariance(SessionLocal, estimator, lookback)
+
+
+def submatrix(payload: dict, symbols: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Mean vector and covariance for a subset of symbols (those missing from the payload are skipped).
+
+    Returns:
+        (found symbols, mean (k,), covariance (k × k))
+    """
+    index = {s: i for i, s in enumerate(payload["symbols"])}
+    found = [s for s in symbols if s in index]
+    positions = [index[s] for s in found]
+    return found, payload["mean"][positions], payload["matrix"][np.ix_(positions, positions)]
+
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(covariance))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = covariance / np.outer(std, std)
+    np.fill_diagonal(correlation, 1.0)
+    return np.clip(correlation, -1.0, 1.0)
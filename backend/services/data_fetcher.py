@@ -3,16 +3,120 @@ DATA FETCHER SERVICE - External API integration
 - Fetches live stock prices from Polygon.io API
 - get_current_price() - latest trading day OHLCV data
 - get_historical_data() - time series data (1d to 5y)
+- *_async() variants for FastAPI handlers (don't block the event loop)
+- Sync calls share a keep-alive requests.Session, async calls share one
+  pooled httpx.AsyncClient (HTTP/2 when the h2 package is installed)
 - Used by: API endpoints, populate_db.py, daily_update.py
 - Rate limit: 5 requests/minute on free tier
 """
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
 from datetime import datetime, timedelta
+from typing import Optional
 import os
 
 
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY", "Ap9RmA9ycqGkmLS6E3HvpyU5UeVDmseQ")
-BASE_URL = "https://api.polygon.io"
+BASE_URL = os.getenv("POLYGON_BASE_URL", "https://api.polygon.io")
+
+PERIOD_DAYS = {
+    "1d": 1, "1w": 7, "1mo": 30, "3mo": 90,
+    "6mo": 180, "1y": 365, "2y": 730, "5y": 1825
+}
+
+REQUEST_TIMEOUT = 10
+
+# Every call goes to the same Polygon host, so pool limits are per-host limits
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 10))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+
+try:
+    import h2  # noqa: F401 - only needed for httpx HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared keep-alive session for sync callers (scripts, thread pools)
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_MAX_CONNECTIONS))
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_MAX_CONNECTIONS))
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Get the shared pooled async client (created on first use).
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    return _async_client
+
+
+async def close_async_client():
+    """
+    Close the shared async client. Call this on app shutdown.
+    """
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def build_current_price_request(symbol: str, base_url: str = None):
+    """
+    Build the Polygon.io open/close URL and query params for the last trading day.
+    
+    Returns:
+        (url, params) tuple
+    """
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    
+    url = f"{base_url or BASE_URL}/v1/open-close/{symbol}/{yesterday}"
+    params = {"apiKey": POLYGON_API_KEY}
+    return url, params
+
+
+def parse_current_price_response(symbol: str, data: dict) -> dict:
+    """
+    Turn a raw Polygon.io open/close response into our price format.
+    """
+    if data.get("status") == "NOT_FOUND":
+        return {
+            "symbol": symbol.upper(),
+            "error": "Invalid symbol or no data available",
+            "status": "error"
+        }
+    
+    if data.get("status") == "ERROR":
+        return {
+            "symbol": symbol.upper(),
+            "error": data.get("message", "API error"),
+            "status": "error"
+        }
+    
+    return {
+        "symbol": symbol.upper(),
+        "date": data.get("from"),
+        "open": round(data.get("open", 0), 2),
+        "high": round(data.get("high", 0), 2),
+        "low": round(data.get("low", 0), 2),
+        "close": round(data.get("close", 0), 2),
+        "volume": data.get("volume", 0),
+        "timestamp": datetime.now().isoformat(),
+        "status": "success"
+    }
 
 
 def get_current_price(symbol: str) -> dict:
@@ -26,39 +130,28 @@ def get_current_price(symbol: str) -> dict:
         Dictionary with latest trading day's price data
     """
     try:
-        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-        
-        url = f"{BASE_URL}/v1/open-close/{symbol}/{yesterday}"
-        params = {"apiKey": POLYGON_API_KEY}
+        url, params = build_current_price_request(symbol)
         
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        if data.get("status") == "NOT_FOUND":
-            return {
-                "symbol": symbol.upper(),
-                "error": "Invalid symbol or no data available",
-                "status": "error"
-            }
-        
-        if data.get("status") == "ERROR":
-            return {
-                "symbol": symbol.upper(),
-                "error": data.get("message", "API error"),
-                "status": "error"
-            }
+        response = _session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        return parse_current_price_response(symbol, response.json())
         
+    except Exception as e:
         return {
             "symbol": symbol.upper(),
-            "date": data.get("from"),
-            "open": round(data.get("open", 0), 2),
-            "high": round(data.get("high", 0), 2),
-            "low": round(data.get("low", 0), 2),
-            "close": round(data.get("close", 0), 2),
-            "volume": data.get("volume", 0),
-            "timestamp": datetime.now().isoformat(),
-            "status": "success"
+            "error": f"Failed to fetch data: {str(e)}",
+            "status": "error"
         }
+
+
+async def get_current_price_async(symbol: str) -> dict:
+    """
+    Async version of get_current_price() using the shared connection pool.
+    """
+    try:
+        url, params = build_current_price_request(symbol)
+        
+        response = await get_async_client().get(url, params=params)
+        return parse_current_price_response(symbol, response.json())
         
     except Exception as e:
         return {
@@ -68,6 +161,130 @@ def get_current_price(symbol: str) -> dict:
         }
 
 
+def parse_grouped_daily_response(data: dict, symbols=None) -> dict:
+    """
+    Turn a Polygon.io grouped daily response into {symbol: price data}
+    (same format as get_current_price), optionally only for `symbols`.
+    """
+    wanted = {s.upper() for s in symbols} if symbols else None
+    prices = {}
+    for item in data.get("results") or []:
+        symbol = item.get("T")
+        if not symbol or (wanted is not None and symbol not in wanted):
+            continue
+        prices[symbol] = {
+            "symbol": symbol,
+            "date": datetime.fromtimestamp(item.get("t", 0) / 1000).strftime('%Y-%m-%d'),
+            "open": round(item.get("o", 0), 2),
+            "high": round(item.get("h", 0), 2),
+            "low": round(item.get("l", 0), 2),
+            "close": round(item.get("c", 0), 2),
+            "volume": int(item.get("v", 0)),
+            "timestamp": datetime.now().isoformat(),
+            "status": "success"
+        }
+    return prices
+
+
+async def get_grouped_daily_async(symbols=None, max_days_back: int = 4) -> dict:
+    """
+    Latest trading day's OHLCV for the whole market in one request
+    (Polygon.io grouped daily endpoint). Walks back over weekends/holidays.
+    
+    Args:
+        symbols: only return these symbols (default: all)
+        max_days_back: how many calendar days to try before giving up
+    
+    Returns:
+        {symbol: price data} - empty if nothing was found
+    """
+    client = get_async_client()
+    for days_back in range(1, max_days_back + 1):
+        day = (datetime.now() - timedelta(days=days_back)).strftime('%Y-%m-%d')
+        url = f"{BASE_URL}/v2/aggs/grouped/locale/us/market/stocks/{day}"
+        params = {"apiKey": POLYGON_API_KEY, "adjusted": "true"}
+        try:
+            response = await client.get(url, params=params)
+            data = response.json()
+        except Exception as e:
+            print(f"Grouped daily error ({day}): {e}")
+            return {}
+        if data.get("status") == "ERROR":
+            print(f"Grouped daily error ({day}): {data.get('error', data.get('message'))}")
+            return {}
+        if data.get("resultsCount", 0) > 0:
+            return parse_grouped_daily_response(data, symbols)
+    return {}
+
+
+def build_historical_request(symbol: str, period: str = "1mo", base_url: str = None):
+    """
+    Build the Polygon.io aggregates URL and query params for a period.
+    Shared by the sync fetcher and services/fetch_scheduler.py.
+    
+    Returns:
+        (url, params) tuple
+    """
+    days = PERIOD_DAYS.get(period, 30)
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    url = f"{base_url or BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}"
+    params = {
+        "apiKey": POLYGON_API_KEY,
+        "adjusted": "true",
+        "sort": "desc"
+    }
+    return url, params
+
+
+def parse_historical_response(symbol: str, period: str, data: dict) -> dict:
+    """
+    Turn a raw Polygon.io aggregates response into our history format.
+    """
+    if data.get("status") == "ERROR":
+        error_msg = data.get("error", data.get("message", "API error"))
+        return {
+            "symbol": symbol.upper(),
+            "error": f"API Error: {error_msg}",
+            "status": "error",
+            "response": data
+        }
+    
+    if data.get("resultsCount", 0) == 0:
+        return {
+            "symbol": symbol.upper(),
+            "error": f"No data available for this period. Response: {data}",
+            "status": "error",
+            "response": data
+        }
+    
+    results = data.get("results", [])
+    
+    data_list = []
+    for item in results:
+        timestamp_ms = item.get("t")
+        date = datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d')
+        
+        data_list.append({
+            "date": date,
+            "open": round(item.get("o", 0), 2),
+            "high": round(item.get("h", 0), 2),
+            "low": round(item.get("l", 0), 2),
+            "close": round(item.get("c", 0), 2),
+            "volume": int(item.get("v", 0))
+        })
+    
+    return {
+        "symbol": symbol.upper(),
+        "period": period,
+        "data": data_list,
+        "count": len(data_list),
+        "status": "success"
+    }
+
+
 def get_historical_data(symbol: str, period: str = "1mo") -> dict:
     """
     Get historical stock data from Polygon.io
@@ -80,65 +297,28 @@ def get_historical_data(symbol: str, period: str = "1mo") -> dict:
         Dictionary with historical price data
     """
     try:
-        period_days = {
-            "1d": 1, "1w": 7, "1mo": 30, "3mo": 90,
-            "6mo": 180, "1y": 365, "2y": 730, "5y": 1825
-        }
-        days = period_days.get(period, 30)
+        url, params = build_historical_request(symbol, period)
         
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        url = f"{BASE_URL}/v2/aggs/ticker/{symbol}/range/1/day/{start_date.strftime('%Y-%m-%d')}/{end_date.strftime('%Y-%m-%d')}"
-        params = {
-            "apiKey": POLYGON_API_KEY,
-            "adjusted": "true",
-            "sort": "desc"
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        if data.get("status") == "ERROR":
-            error_msg = data.get("error", data.get("message", "API error"))
-            return {
-                "symbol": symbol.upper(),
-                "error": f"API Error: {error_msg}",
-                "status": "error",
-                "response": data
-            }
-        
-        if data.get("resultsCount", 0) == 0:
-            return {
-                "symbol": symbol.upper(),
-                "error": f"No data available for this period. Response: {data}",
-                "status": "error",
-                "response": data
-            }
-        
-        results = data.get("results", [])
-        
-        data_list = []
-        for item in results:
-            timestamp_ms = item.get("t")
-            date = datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d')
-            
-            data_list.append({
-                "date": date,
-                "open": round(item.get("o", 0), 2),
-                "high": round(item.get("h", 0), 2),
-                "low": round(item.get("l", 0), 2),
-                "close": round(item.get("c", 0), 2),
-                "volume": int(item.get("v", 0))
-            })
+        response = _session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        return parse_historical_response(symbol, period, response.json())
         
+    except Exception as e:
         return {
             "symbol": symbol.upper(),
-            "period": period,
-            "data": data_list,
-            "count": len(data_list),
-            "status": "success"
+            "error": str(e),
+            "status": "error"
         }
+
+
+async def get_historical_data_async(symbol: str, period: str = "1mo") -> dict:
+    """
+    Async version of get_historical_data() using the shared connection pool.
+    """
+    try:
+        url, params = build_historical_request(symbol, period)
+        
+        response = await get_async_client().get(url, params=params)
+        return parse_historical_response(symbol, period, response.json())
         
     except Exception as e:
         return {
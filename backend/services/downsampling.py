@@ -0,0 +1,145 @@
+"""
+DOWNSAMPLING SERVICE - Fewer points for long history charts
+- OHLC resampling to weekly / monthly candles: bucket ids from the datetime64 dates,
+  then open/high/low/close/volume per bucket with ufunc.reduceat (no per-bar loop)
+- Largest-Triangle-Three-Buckets (LTTB) for line charts: keeps the first and last bar
+  plus, per bucket, the bar forming the largest triangle with its neighbours - peaks
+  and troughs survive, unlike taking every n-th bar
+- Works on history payload rows (newest first, like every /api/history response)
+  and returns rows in the same shape; LTTB keeps whole original bars
+- Used by: GET /api/history (interval / max_points), cached per view by app/main.py
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+INTERVALS = ("1d", "1w", "1mo")
+MIN_POINTS = 3        # LTTB keeps the first and last point plus at least one bucket
+MAX_POINTS = 5000
+
+
+def _columns(rows: List[dict]) -> Dict[str, np.ndarray]:
+    """Newest-first rows → oldest-first arrays."""
+    rows = rows[::-1]
+    return {
+        "date": np.array([row["date"] for row in rows], dtype="datetime64[D]"),
+        "open": np.array([row["open"] for row in rows], dtype=float),
+        "high": np.array([row["high"] for row in rows], dtype=float),
+        "low": np.array([row["low"] for row in rows], dtype=float),
+        "close": np.array([row["close"] for row in rows], dtype=float),
+        "volume": np.array([row["volume"] for row in rows], dtype=np.int64),
+    }
+
+
+def _rows(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Oldest-first arrays → newest-first rows."""
+    dates = columns["date"].astype(str).tolist()
+    prices = {field: np.round(columns[field], 2).tolist() for field in ("open", "high", "low", "close")}
+    volumes = columns["volume"].tolist()
+    return [
+        {
+            "date": dates[i],
+            "open": prices["open"][i],
+            "high": prices["high"][i],
+            "low": prices["low"][i],
+            "close": prices["close"][i],
+            "volume": volumes[i]
+        }
+        for i in range(len(dates) - 1, -1, -1)
+    ]
+
+
+def resample_ohlc(rows: List[dict], interval: str) -> List[dict]:
+    """
+    Daily bars → weekly (Monday-based) or monthly candles.
+    Each candle is dated by its first trading day.
+
+    Args:
+        rows: history rows, newest first
+        interval: "1w" or "1mo" ("1d" returns rows unchanged)
+
+    Returns:
+        Candle rows, newest first
+    """
+    if interval == "1d" or not rows:
+        return rows
+    columns = _columns(rows)
+    dates = columns["date"]
+    if interval == "1w":
+        day_number = dates.astype(np.int64)
+        bucket = day_number - (day_number + 3) % 7  # 1970-01-01 was a Thursday
+    elif interval == "1mo":
+        bucket = dates.astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"Unknown interval {interval!r}. Use one of: {', '.join(INTERVALS)}")
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    return _rows({
+        "date": dates[starts],
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(columns["volume"], starts),
+    })
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps (ascending).
+
+    Args:
+        x, y: the series, x ascending
+        threshold: number of points to keep (>= MIN_POINTS)
+    """
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    # Bucket edges for the n - 2 interior points
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket's average (the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        if i + 2 >= len(edges):
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the triangle area for every candidate in this bucket at once
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def lttb_rows(rows: List[dict], max_points: int) -> List[dict]:
+    """
+    Keep at most max_points rows (newest first) by LTTB on the close, over trading-day index.
+    """
+    if len(rows) <= max_points:
+        return rows
+    ordered = rows[::-1]
+    close = np.array([row["close"] for row in ordered], dtype=float)
+    keep = lttb_indices(np.arange(len(close), dtype=float), close, max_points)
+    return [ordered[i] for i in keep[::-1]]
+
+
+def downsample_rows(rows: List[dict], interval: str = "1d", max_points: Optional[int] = None) -> List[dict]:
+    """
+    Resample to `interval` candles, then LTTB down to max_points if there are still more.
+    """
+    rows = resample_ohlc(rows, interval)
+    if max_points is not None:
+        rows = lttb_rows(rows, max_points)
+    return rows
@@ -0,0 +1,283 @@
+"""
+FEATURE STORE - Technical features for every stock, on disk, memory-mapped for ML
+- Features: close, return, log return, 20-day volatility, RSI(14), MACD(12, 26, 9),
+  Bollinger bands (20, 2σ) and %B, 20-day volume z-score
+- Computed for all symbols at once on aligned (dates × symbols) pandas frames
+  (rolling / ewm run column-wise in C, no per-symbol loops)
+- Stored under data/features/{symbol}/ (DATA_DIR): dates.bin (int64 days) and
+  values.bin (float64 rows × FEATURE_COLUMNS), both append-only, plus meta.json
+- meta.json is replaced atomically after the data is appended and holds the committed
+  row count - readers never see a half-written row; a crashed append is truncated away
+- Daily updates only append new dates: features are recomputed over a TAIL_BARS
+  warm-up tail (EMA weights that far back are < 1e-9), not the whole history
+- Training and inference read np.memmap views - no stock_prices query
+- Used by: scripts/build_features.py, scripts/daily_update.py, services/ml_predictor.py
+"""
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config.stocks import get_all_stocks
+from database.price_store import PriceArrays, get_price_arrays_many
+from services.fetch_scheduler import DATA_DIR
+from services.risk_calculator import TRADING_DAYS
+
+
+FEATURE_DIR = os.path.join(DATA_DIR, "features")
+FEATURE_COLUMNS = (
+    "close", "return", "log_return", "volatility_20", "rsi_14",
+    "macd", "macd_signal", "macd_hist",
+    "bb_middle", "bb_upper", "bb_lower", "bb_percent_b", "volume_z_20",
+)
+VALUE_DTYPE = np.float64
+TAIL_BARS = 300  # warm-up bars recomputed before appending (longest EMA memory: RSI's 1/14)
+
+
+class FeatureFrame(NamedTuple):
+    """
+    One symbol's stored features. dates / values are read-only memmaps.
+    """
+    symbol: str
+    dates: np.ndarray   # datetime64[D] (T,)
+    values: np.ndarray  # (T, len(FEATURE_COLUMNS))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def take(self, index) -> "FeatureFrame":
+        """
+        Subset dates and values with the same mask, slice or index array.
+        """
+        return FeatureFrame(self.symbol, self.dates[index], self.values[index])
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, FEATURE_COLUMNS.index(name)]
+
+
+# ============================================================================
+# COMPUTATION
+# ============================================================================
+
+def _aligned(arrays: Dict[str, PriceArrays], field: str, dates: np.ndarray, symbols: list) -> np.ndarray:
+    matrix = np.full((len(dates), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        matrix[np.searchsorted(dates, arrays[symbol].date), j] = getattr(arrays[symbol], field)
+    return matrix
+
+
+def compute_features(arrays: Dict[str, PriceArrays]):
+    """
+    Every feature for every symbol in one pass over aligned close / volume frames.
+    A symbol's missing bars are forward-filled for the calculation, then dropped.
+
+    Args:
+        arrays: {symbol: PriceArrays}, oldest first
+
+    Returns:
+        (dates (T,), symbols, features (T × N × len(FEATURE_COLUMNS)), has_bar (T × N) bool)
+    """
+    import pandas as pd
+
+    symbols = [symbol for symbol, prices in arrays.items() if len(prices)]
+    if not symbols:
+        return np.array([], dtype="datetime64[D]"), [], np.empty((0, 0, len(FEATURE_COLUMNS))), np.empty((0, 0), bool)
+
+    dates = np.unique(np.concatenate([arrays[s].date for s in symbols]))
+    raw_close = _aligned(arrays, "close", dates, symbols)
+    has_bar = ~np.isnan(raw_close)
+    close = pd.DataFrame(raw_close).ffill()
+    volume = pd.DataFrame(_aligned(arrays, "volume", dates, symbols)).ffill()
+
+    log_return = np.log(close).diff()
+    delta = close.diff()
+    average_gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    average_loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    rsi = 100 - 100 / (1 + average_gain / average_loss)
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+
+    bb_middle = close.rolling(20).mean()
+    bb_width = 2 * close.rolling(20).std(ddof=0)
+    bb_upper, bb_lower = bb_middle + bb_width, bb_middle - bb_width
+
+    volume_z = (volume - volume.rolling(20).mean()) / volume.rolling(20).std()
+
+    columns = {
+        "close": close,
+        "return": close.pct_change(fill_method=None),
+        "log_return": log_return,
+        "volatility_20": log_return.rolling(20).std() * np.sqrt(TRADING_DAYS),
+        "rsi_14": rsi,
+        "macd": macd,
+        "macd_signal": macd_signal,
+        "macd_hist": macd - macd_signal,
+        "bb_middle": bb_middle,
+        "bb_upper": bb_upper,
+        "bb_lower": bb_lower,
+        "bb_percent_b": (close - bb_lower) / (bb_upper - bb_lower),
+        "volume_z_20": volume_z,
+    }
+    features = np.stack([columns[name].to_numpy(dtype=VALUE_DTYPE) for name in FEATURE_COLUMNS], axis=2)
+    features[np.isinf(features)] = np.nan
+    return dates, symbols, features, has_bar
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+def _partition(symbol: str) -> str:
+    return os.path.join(FEATURE_DIR, symbol)
+
+
+def read_meta(symbol: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(_partition(symbol), "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A different column layout is a different store - treat it as missing (rebuilt on write)
+    return meta if tuple(meta.get("columns", ())) == FEATURE_COLUMNS else None
+
+
+def _write_meta(symbol: str, rows: int, first_date, last_date):
+    meta = {
+        "symbol": symbol,
+        "columns": list(FEATURE_COLUMNS),
+        "dtype": np.dtype(VALUE_DTYPE).str,
+        "rows": rows,
+        "first_date": str(first_date) if first_date is not None else None,
+        "last_date": str(last_date) if last_date is not None else None,
+        "updated_at": datetime.utcnow().isoformat()
+    }
+    path = os.path.join(_partition(symbol), "meta.json")
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_partition(symbol: str, dates: np.ndarray, values: np.ndarray, append: bool = True) -> int:
+    """
+    Append rows to (or with append=False, replace) a symbol's partition.
+
+    Args:
+        dates: datetime64[D] (k,), all newer than the stored last date when appending
+        values: (k, len(FEATURE_COLUMNS))
+
+    Returns:
+        Committed row count
+    """
+    directory = _partition(symbol)
+    os.makedirs(directory, exist_ok=True)
+    meta = read_meta(symbol) if append else None
+    rows = meta["rows"] if meta else 0
+    first_date = meta["first_date"] if meta else (dates[0] if len(dates) else None)
+
+    row_bytes = {"dates.bin": 8, "values.bin": len(FEATURE_COLUMNS) * np.dtype(VALUE_DTYPE).itemsize}
+    payloads = {
+        "dates.bin": np.ascontiguousarray(dates.astype("datetime64[D]").astype(np.int64)),
+        "values.bin": np.ascontiguousarray(values, dtype=VALUE_DTYPE),
+    }
+    for name, payload in payloads.items():
+        path = os.path.join(directory, name)
+        with open(path, "ab" if os.path.exists(path) else "wb") as f:
+            f.truncate(rows * row_bytes[name])  # drops a crashed append, or everything when replacing
+            f.seek(rows * row_bytes[name])
+            f.write(payload.tobytes())
+
+    rows += len(dates)
+    _write_meta(symbol, rows, first_date, dates[-1] if len(dates) else (meta or {}).get("last_date"))
+    return rows
+
+
+def read_features(symbol: str) -> Optional[FeatureFrame]:
+    """
+    Memory-mapped features for a symbol, or None if it has no partition.
+    """
+    meta = read_meta(symbol)
+    if meta is None:
+        return None
+    rows = meta["rows"]
+    if rows == 0:
+        return FeatureFrame(symbol, np.array([], dtype="datetime64[D]"), np.empty((0, len(FEATURE_COLUMNS)), VALUE_DTYPE))
+    directory = _partition(symbol)
+    dates = np.memmap(os.path.join(directory, "dates.bin"), dtype=np.int64, mode="r", shape=(rows,))
+    values = np.memmap(
+        os.path.join(directory, "values.bin"), dtype=VALUE_DTYPE, mode="r", shape=(rows, len(FEATURE_COLUMNS))
+    )
+    return FeatureFrame(symbol, dates.view("datetime64[D]"), values)
+
+
+def feature_store_status(symbols: Optional[Sequence[str]] = None) -> dict:
+    """{symbol: {"rows", "first_date", "last_date"}} for stored symbols (meta only)."""
+    status = {}
+    for symbol in symbols or [s["symbol"] for s in get_all_stocks()]:
+        meta = read_meta(symbol)
+        if meta is not None:
+            status[symbol] = {key: meta[key] for key in ("rows", "first_date", "last_date")}
+    return status
+
+
+# ============================================================================
+# BUILD / APPEND
+# ============================================================================
+
+def _store(symbols: list, dates: np.ndarray, features: np.ndarray, has_bar: np.ndarray, after: Dict[str, Optional[np.datetime64]]) -> Dict[str, int]:
+    written = {}
+    for j, symbol in enumerate(symbols):
+        last = after.get(symbol)
+        keep = has_bar[:, j] if last is None else has_bar[:, j] & (dates > last)
+        if last is None or keep.any():
+            write_partition(symbol, dates[keep], features[keep, j], append=last is not None)
+            written[symbol] = int(keep.sum())
+    return written
+
+
+def build_feature_store(db: Session, symbols: Optional[Sequence[str]] = None, years: int = 10) -> Dict[str, int]:
+    """
+    (Re)write the partitions of `symbols` from their full history (one price query).
+
+    Returns:
+        {symbol: rows written}
+    """
+    symbols = list(symbols or [s["symbol"] for s in get_all_stocks()])
+    arrays = get_price_arrays_many(db, symbols, start_date=date.today() - timedelta(days=365 * years), ascending=True)
+    dates, found, features, has_bar = compute_features(arrays)
+    return _store(found, dates, features, has_bar, {})
+
+
+def update_feature_store(db: Session, symbols: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Append rows for dates after each partition's last date. Symbols without a partition
+    are built in full. Reads only a TAIL_BARS warm-up tail of stock_prices.
+
+    Returns:
+        {symbol: rows appended}
+    """
+    symbols = list(symbols or [s["symbol"] for s in get_all_stocks()])
+    last_dates = {}
+    for symbol in symbols:
+        meta = read_meta(symbol)
+        if meta and meta["last_date"]:
+            last_dates[symbol] = np.datetime64(meta["last_date"], "D")
+
+    written = {}
+    missing = [s for s in symbols if s not in last_dates]
+    if missing:
+        written.update(build_feature_store(db, missing))
+
+    if last_dates:
+        oldest = min(last_dates.values()).item()
+        arrays = get_price_arrays_many(
+            db, list(last_dates),
+            start_date=oldest - timedelta(days=int(TAIL_BARS * 365 / TRADING_DAYS) + 14),
+            ascending=True
+        )
+        dates, found, features, has_bar = compute_features(arrays)
+        written.update(_store(found, dates, features, has_bar, {s: last_dates[s] for s in found}))
+    return written
@@ -0,0 +1,229 @@
+"""
+FETCH SCHEDULER SERVICE - Rate-limit-aware bulk fetching from Polygon.io
+- Token bucket paces requests to a requests-per-minute budget (not a fixed sleep)
+- asyncio + httpx with bounded concurrency
+- Retries 429/5xx/network errors with jittered exponential backoff (honors Retry-After)
+- Checkpoint file records finished jobs so an interrupted run can resume
+- Used by: populate_db.py, daily_update.py
+- Point POLYGON_BASE_URL (or base_url=) at a local stub server for testing
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+import httpx
+
+from services.data_fetcher import build_historical_request, parse_historical_response
+
+
+# Polygon.io FREE tier is 5 requests/minute - raise this on paid tiers
+DEFAULT_REQUESTS_PER_MINUTE = float(os.getenv("POLYGON_REQUESTS_PER_MINUTE", 5))
+DEFAULT_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", 4))
+
+DATA_DIR = os.getenv(
+    "DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Async token bucket. Refills continuously at rate_per_minute / 60 tokens per second
+    and holds at most `burst` tokens.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_minute // 60)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available, then take it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Checkpoint:
+    """
+    JSON file of completed job keys. Written after every finished job.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.completed = set()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.completed = set(json.load(f).get("completed", []))
+            except (OSError, ValueError) as e:
+                print(f"Checkpoint read error ({path}): {e}")
+
+    def is_done(self, key: str) -> bool:
+        return key in self.completed
+
+    def mark_done(self, key: str):
+        self.mark_done_many([key])
+
+    def mark_done_many(self, keys):
+        """Record several finished jobs with a single file write."""
+        self.completed.update(keys)
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"completed": sorted(self.completed)}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.completed = set()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def checkpoint_path(name: str) -> str:
+    """Default checkpoint location for a named run (e.g. 'populate_db')."""
+    return os.path.join(CHECKPOINT_DIR, f"{name}.json")
+
+
+class FetchScheduler:
+    """
+    Fetches history for many symbols concurrently within a request budget.
+
+    Example:
+        scheduler = FetchScheduler(requests_per_minute=5, checkpoint=checkpoint_path("populate_db"))
+        summary = asyncio.run(scheduler.run([("AAPL", "5y"), ("MSFT", "5y")], on_result=save))
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 10.0,
+        checkpoint: Optional[str] = None,
+        base_url: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        self.bucket = TokenBucket(requests_per_minute)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.checkpoint = Checkpoint(checkpoint)
+        self.base_url = base_url
+        self.client = client
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def fetch_history(self, client: httpx.AsyncClient, symbol: str, period: str) -> dict:
+        """
+        Fetch one symbol's history, retrying throttled/failed requests.
+        Returns the same dict format as data_fetcher.get_historical_data().
+        """
+        url, params = build_historical_request(symbol, period, base_url=self.base_url)
+        error = None
+
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            retry_after = None
+            try:
+                response = await client.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return parse_historical_response(symbol, period, response.json())
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except (httpx.TransportError, ValueError) as e:
+                error = str(e) or e.__class__.__name__
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        return {
+            "symbol": symbol.upper(),
+            "error": f"Failed after {self.max_retries + 1} attempts: {error}",
+            "status": "error"
+        }
+
+    async def run(
+        self,
+        jobs: Iterable[Tuple[str, str]],
+        on_result: Optional[Callable[[str, dict], bool]] = None
+    ) -> dict:
+        """
+        Fetch every (symbol, period) job.
+
+        Args:
+            jobs: (symbol, period) pairs
+            on_result: called as on_result(symbol, response) in a worker thread
+                       (so it may do blocking DB writes); return False to leave
+                       the job un-checkpointed
+
+        Returns:
+            {"completed": [...], "failed": {symbol: error}, "skipped": [...], "elapsed": seconds}
+        """
+        start = time.time()
+        summary = {"completed": [], "failed": {}, "skipped": []}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_job(client, symbol, period):
+            key = f"{symbol}:{period}"
+            if self.checkpoint.is_done(key):
+                summary["skipped"].append(symbol)
+                return
+
+            async with semaphore:
+                response = await self.fetch_history(client, symbol, period)
+
+            ok = response.get("status") == "success"
+            if on_result is not None:
+                try:
+                    ok = (await asyncio.to_thread(on_result, symbol, response)) is not False and ok
+                except Exception as e:
+                    response = {"status": "error", "error": str(e)}
+                    ok = False
+
+            if ok:
+                self.checkpoint.mark_done(key)
+                summary["completed"].append(symbol)
+            else:
+                summary["failed"][symbol] = response.get("error", "Unknown error")
+
+        if self.client is not None:
+            await asyncio.gather(*(run_job(self.client, s, p) for s, p in jobs))
+        else:
+            limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            async with httpx.AsyncClient(limits=limits) as client:
+                await asyncio.gather(*(run_job(client, s, p) for s, p in jobs))
+
+        summary["elapsed"] = time.time() - start
+        return summary
@@ -1,10 +1,226 @@
 """
-ML PREDICTOR SERVICE - Stock price predictions (NOT IMPLEMENTED YET)
-- Will use LSTM/Random Forest to predict future prices
-- Reads historical data from database
-- Saves predictions to Prediction table
-- TODO: Train models, create predict_price() function
-- Will be used by: GET /api/prediction endpoint
+ML PREDICTOR SERVICE - Nightly batch inference for every tracked stock
+- Reads the last WINDOW rows of every symbol from the memory-mapped feature store
+  (services/feature_store.py, no stock_prices query) and stacks them into
+  a single (symbols × WINDOW × features) tensor
+- Each model runs ONE batched forward pass over that tensor and returns the whole
+  1..MAX_HORIZON trading-day path for every symbol (all horizons at once)
+- Models come from services/model_registry.py: the newest version of each of
+  SERVING_MODELS (PREDICTION_MODEL, then the linear and drift fallbacks); every
+  row records the model_name and model_version that produced it
+- Paths are written with one bulk upsert into predictions
+  (unique on stock_id, prediction_date, target_date, model_name) - reruns overwrite
+- The API never runs inference: /api/predictions/* are indexed reads of that table
+- Horizons match the frontend: 1day, 1week (5), 1month (21), 6months (126) trading days
+- Target dates skip weekends (numpy business days); exchange holidays aren't modelled
+- Run by: scripts/run_predictions.py and scripts/daily_update.py
 """
+import os
+import time
+from datetime import date
+from typing import Dict, NamedTuple, Optional, Sequence
 
-# TODO: Implement ML prediction logic
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config.stocks import get_all_stocks
+from database.crud import bulk_upsert_predictions
+from services.feature_store import read_features, FEATURE_COLUMNS
+from services.model_registry import load_model, DriftModel, FALLBACK_MODEL, PATH_DAYS
+
+
+HORIZONS = {"1day": 1, "1week": 5, "1month": 21, "6months": 126}
+MAX_HORIZON = PATH_DAYS
+WINDOW = 60  # trading days of input per symbol (models may use a shorter tail)
+# Model input channels (feature store columns, scaled to similar ranges by model_inputs)
+FEATURES = ("log_return", "volatility_20", "rsi_14", "macd_hist", "bb_percent_b", "volume_z_20")
+
+# Served model first, then the fallbacks - all run nightly so the API always has a path
+PREDICTION_MODEL = os.getenv("PREDICTION_MODEL", "linear")
+SERVING_MODELS = tuple(dict.fromkeys((PREDICTION_MODEL, FALLBACK_MODEL, DriftModel.name)))
+
+
+class FeatureBatch(NamedTuple):
+    """
+    Model input for every symbol with enough history, stacked along axis 0.
+    """
+    symbols: list
+    dates: np.ndarray       # datetime64[D] (N,) - last bar = prediction date
+    last_close: np.ndarray  # (N,)
+    features: np.ndarray    # (N, window, len(FEATURES)) float32
+
+
+def horizon_type(days: int) -> Optional[str]:
+    """'1day' / '1week' / ... for a trading-day offset that is one of HORIZONS, else None."""
+    for name, horizon_days in HORIZONS.items():
+        if horizon_days == days:
+            return name
+    return None
+
+
+def model_inputs(values: np.ndarray) -> np.ndarray:
+    """
+    Model channels from feature store rows (training and inference share this).
+
+    Args:
+        values: (..., len(FEATURE_COLUMNS)) stored rows
+
+    Returns:
+        (..., len(FEATURES)) float32, log return first
+    """
+    def column(name):
+        return values[..., FEATURE_COLUMNS.index(name)]
+    return np.stack([
+        column("log_return"),
+        column("volatility_20"),
+        (column("rsi_14") - 50) / 50,
+        column("macd_hist") / column("close"),
+        column("bb_percent_b") - 0.5,
+        column("volume_z_20"),
+    ], axis=-1).astype(np.float32)
+
+
+def training_windows(frame, window: int = WINDOW, stride: int = 1):
+    """
+    Every (window → next MAX_HORIZON days) sample in one symbol's stored features.
+    Samples with a missing value (indicator warm-up) are dropped.
+
+    Args:
+        frame: FeatureFrame from the feature store
+        stride: keep every stride-th sample
+
+    Returns:
+        (features (S, window, F), targets: cumulative log returns (S, MAX_HORIZON), dates of each window's last row (S,))
+    """
+    samples = len(frame) - window + 1 - MAX_HORIZON
+    if samples <= 0:
+        return np.empty((0, window, len(FEATURES)), np.float32), np.empty((0, MAX_HORIZON)), frame.dates[:0]
+
+    sliding = np.lib.stride_tricks.sliding_window_view
+    closes = np.asarray(frame.column("close"))
+    features = sliding(model_inputs(frame.values), window, axis=0)[:samples:stride].transpose(0, 2, 1)
+    last_close = closes[window - 1:window - 1 + samples:stride]
+    targets = np.log(sliding(closes[window:], MAX_HORIZON)[:samples:stride] / last_close[:, None])
+    dates = frame.dates[window - 1:window - 1 + samples:stride]
+
+    valid = ~(np.isnan(features).any(axis=(1, 2)) | np.isnan(targets).any(axis=1))
+    return features[valid], targets[valid], np.asarray(dates)[valid]
+
+
+def build_feature_batch(symbols: Sequence[str], asof: Optional[date] = None, window: int = WINDOW) -> FeatureBatch:
+    """
+    Stack every symbol's last `window` feature rows (up to asof) into one tensor.
+    Symbols missing from the store, or without `window` complete rows, are left out.
+    """
+    asof = np.datetime64(asof or date.today(), "D")
+    ready, dates, last_close, windows = [], [], [], []
+    for symbol in symbols:
+        frame = read_features(symbol)
+        if frame is None:
+            continue
+        end = int(np.searchsorted(frame.dates, asof, side="right"))
+        if end < window:
+            continue
+        inputs = model_inputs(frame.values[end - window:end])
+        if np.isnan(inputs).any():
+            continue
+        ready.append(symbol)
+        dates.append(frame.dates[end - 1])
+        last_close.append(frame.values[end - 1, FEATURE_COLUMNS.index("close")])
+        windows.append(inputs)
+
+    if not ready:
+        return FeatureBatch([], np.array([], dtype="datetime64[D]"), np.empty(0), np.empty((0, window, len(FEATURES)), np.float32))
+    return FeatureBatch(ready, np.array(dates, dtype="datetime64[D]"), np.array(last_close), np.stack(windows))
+
+
+def prediction_rows(batch: FeatureBatch, model, paths: np.ndarray, confidence: np.ndarray) -> list:
+    """
+    Flatten one model's (N × MAX_HORIZON) output into predictions rows.
+    Target dates are computed for the whole batch in one busday_offset call.
+    """
+    steps = np.arange(1, MAX_HORIZON + 1)
+    target_dates = np.busday_offset(batch.dates[:, None], steps[None, :], roll="forward")
+    prices = np.round(batch.last_close[:, None] * np.exp(paths), 4)
+    confidence = np.round(np.clip(confidence, 0.0, 1.0), 4)
+
+    steps_list = steps.tolist()
+    rows = []
+    for i, symbol in enumerate(batch.symbols):
+        prediction_date = batch.dates[i].item()
+        rows.extend(
+            {
+                "symbol": symbol,
+                "prediction_date": prediction_date,
+                "target_date": target_date,
+                "horizon_days": days,
+                "predicted_price": price,
+                "confidence": conf,
+                "model_name": model.name,
+                "model_version": model.version,
+            }
+            for target_date, days, price, conf in zip(
+                target_dates[i].tolist(), steps_list, prices[i].tolist(), confidence[i].tolist()
+            )
+        )
+    return rows
+
+
+def run_batch_predictions(
+    db: Session,
+    symbols: Optional[Sequence[str]] = None,
+    model_names: Optional[Sequence[str]] = None,
+    asof: Optional[date] = None
+) -> Dict:
+    """
+    Predict every horizon for every symbol with every model and bulk-upsert the paths.
+
+    Args:
+        symbols: default every tracked stock
+        model_names: newest version of each (default SERVING_MODELS, where a model that
+                     can't be loaded falls back to the next one)
+        asof: last bar date to predict from (default: today - i.e. the latest bar)
+
+    Returns:
+        {"symbols", "models": ["name:version"], "rows", "timings": {stage: seconds}, "status"}
+    """
+    symbols = list(symbols or [s["symbol"] for s in get_all_stocks()])
+
+    timings = {}
+    start = time.perf_counter()
+    models = {}
+    for name in model_names or SERVING_MODELS:
+        model = load_model(name, fallback=model_names is None)
+        if model.features is not None and tuple(model.features) != FEATURES:
+            print(f"Skipping {model.name} {model.version}: trained on features {model.features}")
+            continue
+        models[(model.name, model.version)] = model
+    if not models:
+        return {"status": "error", "message": "No model matches the current features", "symbols": 0, "rows": 0}
+    timings["load_models"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = build_feature_batch(symbols, asof, window=max(m.window for m in models.values()))
+    timings["features"] = time.perf_counter() - start
+    if not batch.symbols:
+        return {"status": "error", "message": "No symbol has enough stored features (run scripts/build_features.py)", "symbols": 0, "rows": 0}
+
+    rows = []
+    for model in models.values():
+        start = time.perf_counter()
+        paths, confidence = model.predict(batch.features)
+        timings[f"predict_{model.name}"] = time.perf_counter() - start
+        rows.extend(prediction_rows(batch, model, paths, confidence))
+
+    start = time.perf_counter()
+    written = bulk_upsert_predictions(db, rows)
+    timings["write"] = time.perf_counter() - start
+
+    return {
+        "symbols": len(batch.symbols),
+        "skipped": [s for s in symbols if s not in batch.symbols],
+        "models": [f"{name}:{version}" for name, version in models],
+        "rows": written,
+        "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+        "status": "success"
+    }
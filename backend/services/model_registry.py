@@ -0,0 +1,298 @@
+"""
+MODEL REGISTRY - Versioned prediction models under backend/models/, loaded on first use
+- Layout: models/{name}/{version}/metadata.json + the artifact
+  (weights.npz for "linear" models, model.keras for "keras" models)
+- Listing and version lookup only read metadata.json - nothing is loaded at import
+- load_model() keeps at most MODEL_CACHE_SIZE loaded models in an in-process LRU
+- TensorFlow is imported inside the Keras loader only, so API workers that never
+  load a Keras model never pay its import time or memory
+- If a Keras model can't be loaded (TensorFlow not installed, bad artifact) the
+  registry serves the newest linear model instead, then the builtin drift model
+- Every model has the same interface: predict(features (N, window, F)) →
+  (cumulative log returns (N, PATH_DAYS), confidence (N, PATH_DAYS)), one batched call
+- Used by: services/ml_predictor.py, scripts/train_models.py
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+MODELS_DIR = os.getenv(
+    "MODELS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+)
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", 2))
+PATH_DAYS = 126      # every model predicts trading days 1..PATH_DAYS after the last bar
+CONFIDENCE_Z = 1.96  # confidence = exp(-z · σ): ~0.96 for 1 day, ~0.6 for 6 months at 2% daily vol
+BUILTIN_VERSION = "builtin"
+FALLBACK_MODEL = "linear"
+
+
+# ============================================================================
+# MODELS
+# ============================================================================
+
+class DriftModel:
+    """
+    Baseline model: exponentially weighted mean log return, compounded over the path.
+    Pure NumPy, no artifact.
+    """
+    name = "drift"
+    version = BUILTIN_VERSION
+    framework = "numpy"
+    window = 60
+    features = None  # only uses channel 0 (log return)
+
+    def __init__(self, halflife: float = 20.0):
+        self.halflife = halflife
+
+    def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        returns = features[:, -self.window:, 0].astype(np.float64)
+        weights = 0.5 ** (np.arange(returns.shape[1] - 1, -1, -1) / self.halflife)
+        weights /= weights.sum()
+        drift = returns @ weights
+        sigma = returns.std(axis=1)
+
+        steps = np.arange(1, PATH_DAYS + 1, dtype=np.float64)
+        paths = drift[:, None] * steps
+        confidence = np.exp(-CONFIDENCE_Z * sigma[:, None] * np.sqrt(steps))
+        return paths, confidence
+
+
+class LinearModel:
+    """
+    Ridge regression from the flattened feature window to the whole log-return path.
+    One (N × window·F) @ (window·F × PATH_DAYS) matmul per batch - fast CPU serving.
+    """
+    framework = "linear"
+
+    def __init__(self, name: str, version: str, window: int, coef: np.ndarray, intercept: np.ndarray, residual_std: np.ndarray, features=None):
+        self.name = name
+        self.version = version
+        self.window = window
+        self.features = features
+        self.coef = coef
+        self.intercept = intercept
+        self.residual_std = residual_std
+
+    def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        flat = features[:, -self.window:].reshape(len(features), -1).astype(np.float64)
+        paths = flat @ self.coef + self.intercept
+        confidence = np.broadcast_to(np.exp(-CONFIDENCE_Z * self.residual_std), paths.shape)
+        return paths, confidence
+
+
+class KerasModel:
+    """
+    A saved Keras network (e.g. LSTM) with a (window, F) → PATH_DAYS output.
+    """
+    framework = "keras"
+
+    def __init__(self, name: str, version: str, window: int, network, residual_std: np.ndarray, features=None):
+        self.name = name
+        self.version = version
+        self.window = window
+        self.features = features
+        self.network = network
+        self.residual_std = residual_std
+
+    def predict(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # One forward pass for the whole batch - no per-symbol calls
+        paths = np.asarray(self.network(features[:, -self.window:], training=False), dtype=np.float64)
+        confidence = np.broadcast_to(np.exp(-CONFIDENCE_Z * self.residual_std), paths.shape)
+        return paths, confidence
+
+
+BUILTIN_MODELS = {DriftModel.name: DriftModel}
+
+
+def fit_linear_model(features: np.ndarray, targets: np.ndarray, alpha: float = 1.0):
+    """
+    Closed-form ridge regression.
+
+    Args:
+        features: (samples, window, F)
+        targets: (samples, PATH_DAYS) cumulative log returns
+
+    Returns:
+        (coef (window·F, PATH_DAYS), intercept (PATH_DAYS,), residual_std (PATH_DAYS,))
+    """
+    x = features.reshape(len(features), -1).astype(np.float64)
+    x_mean, y_mean = x.mean(axis=0), targets.mean(axis=0)
+    xc, yc = x - x_mean, targets - y_mean
+    coef = np.linalg.solve(xc.T @ xc + alpha * np.eye(x.shape[1]), xc.T @ yc)
+    intercept = y_mean - x_mean @ coef
+    residual_std = (targets - (x @ coef + intercept)).std(axis=0)
+    return coef, intercept, residual_std
+
+
+# ============================================================================
+# ARTIFACTS
+# ============================================================================
+
+def _model_dir(name: str, version: str) -> str:
+    return os.path.join(MODELS_DIR, name, version)
+
+
+def new_version() -> str:
+    """Sortable version string: UTC timestamp."""
+    return datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+
+def _write_metadata(name: str, version: str, metadata: dict) -> dict:
+    metadata = dict(metadata, name=name, version=version, created_at=datetime.utcnow().isoformat())
+    with open(os.path.join(_model_dir(name, version), "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def save_linear_model(name: str, window: int, coef, intercept, residual_std, metadata: Optional[dict] = None) -> dict:
+    """
+    Store a new version of a linear model. Returns its metadata.
+    """
+    version = new_version()
+    os.makedirs(_model_dir(name, version), exist_ok=True)
+    np.savez(
+        os.path.join(_model_dir(name, version), "weights.npz"),
+        coef=coef, intercept=intercept, residual_std=residual_std
+    )
+    return _write_metadata(name, version, dict(metadata or {}, framework="linear", window=window, path_days=PATH_DAYS))
+
+
+def save_keras_model(name: str, window: int, network, residual_std, metadata: Optional[dict] = None) -> dict:
+    """
+    Store a new version of a Keras network. Returns its metadata.
+    """
+    version = new_version()
+    os.makedirs(_model_dir(name, version), exist_ok=True)
+    network.save(os.path.join(_model_dir(name, version), "model.keras"))
+    np.save(os.path.join(_model_dir(name, version), "residual_std.npy"), residual_std)
+    return _write_metadata(name, version, dict(metadata or {}, framework="keras", window=window, path_days=PATH_DAYS))
+
+
+def read_metadata(name: str, version: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(_model_dir(name, version), "metadata.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_versions(name: str) -> List[str]:
+    """Stored versions of a model, oldest first (only ones with metadata)."""
+    directory = os.path.join(MODELS_DIR, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(v for v in os.listdir(directory) if os.path.isfile(os.path.join(directory, v, "metadata.json")))
+
+
+def list_models() -> dict:
+    """
+    {name: [versions]} for every stored model plus the builtin ones. Reads no artifacts.
+    """
+    models = {name: [BUILTIN_VERSION] for name in BUILTIN_MODELS}
+    if os.path.isdir(MODELS_DIR):
+        for name in sorted(os.listdir(MODELS_DIR)):
+            versions = list_versions(name)
+            if versions:
+                models[name] = versions
+    return models
+
+
+def resolve_version(name: str, version: Optional[str] = None) -> Optional[str]:
+    """The requested version if stored (default: the newest), else None."""
+    if name in BUILTIN_MODELS:
+        return BUILTIN_VERSION
+    versions = list_versions(name)
+    if version is None:
+        return versions[-1] if versions else None
+    return version if version in versions else None
+
+
+def _load_artifact(name: str, version: str):
+    if name in BUILTIN_MODELS:
+        return BUILTIN_MODELS[name]()
+
+    metadata = read_metadata(name, version)
+    if metadata is None:
+        raise FileNotFoundError(f"No metadata for model {name} {version}")
+    directory = _model_dir(name, version)
+
+    if metadata["framework"] == "linear":
+        with np.load(os.path.join(directory, "weights.npz")) as weights:
+            return LinearModel(
+                name, version, metadata["window"],
+                weights["coef"], weights["intercept"], weights["residual_std"], metadata.get("features")
+            )
+
+    if metadata["framework"] == "keras":
+        import tensorflow as tf  # only here - importing it costs seconds and hundreds of MB
+        network = tf.keras.models.load_model(os.path.join(directory, "model.keras"), compile=False)
+        residual_std = np.load(os.path.join(directory, "residual_std.npy"))
+        return KerasModel(name, version, metadata["window"], network, residual_std, metadata.get("features"))
+
+    raise ValueError(f"Unknown framework {metadata['framework']} for model {name} {version}")
+
+
+class ModelCache:
+    """
+    Thread-safe LRU of loaded models, keyed by (name, version).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, name: str, version: str):
+        key = (name, version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            # Loads are rare (first use per worker) - holding the lock keeps one copy per model
+            model = _load_artifact(name, version)
+            self._entries[key] = model
+            while len(self._entries) > max(self.max_entries, 1):
+                self._entries.popitem(last=False)
+            return model
+
+    def loaded(self) -> list:
+        with self._lock:
+            return [f"{name}:{version}" for name, version in self._entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+model_cache = ModelCache(MODEL_CACHE_SIZE)
+
+
+def load_model(name: str, version: Optional[str] = None, fallback: bool = True):
+    """
+    Loaded model (name, version or the newest), from the LRU after the first call.
+
+    Args:
+        fallback: serve the newest linear model (then drift) if this one can't be loaded
+
+    Raises:
+        ValueError: unknown model/version and fallback=False
+    """
+    resolved = resolve_version(name, version)
+    try:
+        if resolved is None:
+            raise ValueError(f"Unknown model {name}{' ' + version if version else ''}. Stored: {', '.join(list_models())}")
+        return model_cache.get_or_load(name, resolved)
+    except Exception as e:
+        if not fallback or name == DriftModel.name:
+            raise
+        print(f"Model {name} unavailable ({e}) - falling back")
+        if name != FALLBACK_MODEL and resolve_version(FALLBACK_MODEL) is not None:
+            return load_model(FALLBACK_MODEL, fallback=True)
+        return model_cache.get_or_load(DriftModel.name, BUILTIN_VERSION)
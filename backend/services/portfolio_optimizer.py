@@ -1,10 +1,285 @@
 """
-PORTFOLIO OPTIMIZER SERVICE - Asset allocation (NOT IMPLEMENTED YET)
-- Will use Modern Portfolio Theory (Sharpe ratio maximization)
-- Takes user's stocks and finds optimal weights
-- Calculates expected return and risk
-- TODO: Implement optimize_portfolio() function
-- Will be used by: POST /api/portfolio/optimize endpoint
+PORTFOLIO OPTIMIZER SERVICE - Mean-variance allocation (Modern Portfolio Theory)
+- Modes: max_sharpe, min_variance, target_return and frontier (N points)
+- Long-only by default, per-asset weight bounds, fully invested (weights sum to 1)
+- SLSQP (scipy) with analytic gradients; frontier points are solved in order of
+  target return, each warm-started from its neighbour's weights
+- Inputs come from the cached covariance service (services/covariance.py):
+  no stock_prices read per request, just a submatrix of the day's matrix
+- Results are memoized in the cache by (symbol set, mode, constraints, estimator,
+  lookback, as-of date) - a new trading day's matrix is a new key
+- optimize_job runs the solve in the compute pool (services/compute.py)
+- Used by: POST /api/portfolio/optimize
 """
+import hashlib
+import time
+from typing import List, Optional, Sequence, Tuple
 
-# TODO: Implement portfolio optimization logic
+import numpy as np
+import orjson
+from scipy.optimize import minimize
+
+from services.cache import get_cache, set_cache
+from services.covariance import get_or_build_covariance, submatrix, DEFAULT_ESTIMATOR, DEFAULT_LOOKBACK
+from services.risk_calculator import TRADING_DAYS, RISK_FREE_RATE
+
+
+MODES = ("max_sharpe", "min_variance", "target_return", "frontier")
+DEFAULT_FRONTIER_POINTS = 50
+MAX_FRONTIER_POINTS = 200
+OPTIMIZE_CACHE_TTL = 24 * 3600
+
+SOLVER_OPTIONS = {"maxiter": 500, "ftol": 1e-10}
+
+
+# ============================================================================
+# SOLVERS
+# ============================================================================
+
+def portfolio_stats(weights: np.ndarray, mu: np.ndarray, cov: np.ndarray, risk_free_rate: float = RISK_FREE_RATE):
+    """(annual return, annual volatility, Sharpe) for annualized mu / cov."""
+    ret = float(weights @ mu)
+    vol = float(np.sqrt(max(weights @ cov @ weights, 0.0)))
+    return ret, vol, (ret - risk_free_rate) / vol if vol else float("nan")
+
+
+def _constraints(mu: Optional[np.ndarray] = None, target: Optional[float] = None) -> list:
+    constraints = [{"type": "eq", "fun": lambda w: w.sum() - 1.0, "jac": lambda w: np.ones_like(w)}]
+    if target is not None:
+        constraints.append({"type": "eq", "fun": lambda w: w @ mu - target, "jac": lambda w: mu})
+    return constraints
+
+
+def _solve(objective, x0: np.ndarray, bounds, constraints) -> np.ndarray:
+    result = minimize(
+        objective, x0, jac=True, method="SLSQP",
+        bounds=bounds, constraints=constraints, options=SOLVER_OPTIONS
+    )
+    if not result.success and result.status != 9:  # 9 = iteration limit, still usable
+        raise ValueError(f"Optimizer failed: {result.message}")
+    weights = np.clip(result.x, [b[0] for b in bounds], [b[1] for b in bounds])
+    return weights / weights.sum()
+
+
+def _variance(cov: np.ndarray):
+    def objective(w):
+        cw = cov @ w
+        return w @ cw, 2.0 * cw
+    return objective
+
+
+def _negative_sharpe(mu: np.ndarray, cov: np.ndarray, risk_free_rate: float):
+    def objective(w):
+        cw = cov @ w
+        vol = np.sqrt(w @ cw)
+        excess = w @ mu - risk_free_rate
+        return -excess / vol, -(mu * vol - excess * cw / vol) / vol ** 2
+    return objective
+
+
+def _bounds(n: int, min_weight: float, max_weight: float):
+    if min_weight * n > 1.0 + 1e-9 or max_weight * n < 1.0 - 1e-9:
+        raise ValueError(f"Weight bounds [{min_weight}, {max_weight}] can't sum to 1 with {n} assets")
+    return [(min_weight, max_weight)] * n
+
+
+def _equal_weights(n: int) -> np.ndarray:
+    return np.full(n, 1.0 / n)
+
+
+def min_variance(cov: np.ndarray, min_weight: float = 0.0, max_weight: float = 1.0, x0: Optional[np.ndarray] = None) -> np.ndarray:
+    n = len(cov)
+    return _solve(_variance(cov), _equal_weights(n) if x0 is None else x0, _bounds(n, min_weight, max_weight), _constraints())
+
+
+def max_sharpe(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    risk_free_rate: float = RISK_FREE_RATE,
+    min_weight: float = 0.0,
+    max_weight: float = 1.0,
+    x0: Optional[np.ndarray] = None
+) -> np.ndarray:
+    n = len(cov)
+    return _solve(
+        _negative_sharpe(mu, cov, risk_free_rate),
+        _equal_weights(n) if x0 is None else x0,
+        _bounds(n, min_weight, max_weight),
+        _constraints()
+    )
+
+
+def target_return(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    target: float,
+    min_weight: float = 0.0,
+    max_weight: float = 1.0,
+    x0: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Minimum-variance weights with expected return == target."""
+    low, high = return_range(mu, min_weight, max_weight)
+    if not low - 1e-9 <= target <= high + 1e-9:
+        raise ValueError(f"Target return {target:.4f} is outside the achievable range [{low:.4f}, {high:.4f}]")
+    n = len(cov)
+    return _solve(_variance(cov), _equal_weights(n) if x0 is None else x0, _bounds(n, min_weight, max_weight), _constraints(mu, target))
+
+
+def return_range(mu: np.ndarray, min_weight: float = 0.0, max_weight: float = 1.0) -> Tuple[float, float]:
+    """
+    Lowest and highest expected return a fully invested portfolio can reach within the bounds
+    (fill the worst / best assets up to max_weight first).
+    """
+    def extreme(order):
+        weights = np.full(len(mu), min_weight)
+        remaining = 1.0 - weights.sum()
+        for i in order:
+            add = min(max_weight - min_weight, remaining)
+            weights[i] += add
+            remaining -= add
+        return float(weights @ mu)
+    order = np.argsort(mu)
+    return extreme(order), extreme(order[::-1])
+
+
+def efficient_frontier(
+    mu: np.ndarray,
+    cov: np.ndarray,
+    points: int = DEFAULT_FRONTIER_POINTS,
+    min_weight: float = 0.0,
+    max_weight: float = 1.0,
+    warm_start: bool = True
+) -> List[np.ndarray]:
+    """
+    Weights for `points` target returns from the min-variance portfolio up to the max achievable return.
+
+    Args:
+        warm_start: start each solve from the previous point's weights (False: from equal weights)
+    """
+    start = min_variance(cov, min_weight, max_weight)
+    low = float(start @ mu)
+    high = return_range(mu, min_weight, max_weight)[1]
+    # Stop just short of the top, where the feasible set collapses to a single point
+    targets = np.linspace(low, high - (high - low) * 1e-4, points)
+
+    frontier = [start]
+    previous = start
+    for target in targets[1:]:
+        weights = target_return(
+            mu, cov, float(target), min_weight, max_weight,
+            x0=previous if warm_start else None
+        )
+        frontier.append(weights)
+        previous = weights
+    return frontier
+
+
+# ============================================================================
+# SERVICE
+# ============================================================================
+
+def _memo_key(**params) -> str:
+    digest = hashlib.sha1(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()[:16]
+    return f"optimize:{params['asof']}:{digest}"
+
+
+def _allocation(symbols: Sequence[str], weights: np.ndarray, mu: np.ndarray, cov: np.ndarray, risk_free_rate: float) -> dict:
+    ret, vol, sharpe = portfolio_stats(weights, mu, cov, risk_free_rate)
+    return {
+        "weights": {s: round(float(w), 4) for s, w in zip(symbols, weights) if w > 5e-5},
+        "expected_return": round(ret, 4),
+        "volatility": round(vol, 4),
+        "sharpe": round(sharpe, 4),
+    }
+
+
+def optimize_portfolio(
+    db_factory,
+    symbols: Sequence[str],
+    mode: str = "max_sharpe",
+    target: Optional[float] = None,
+    points: int = DEFAULT_FRONTIER_POINTS,
+    min_weight: float = 0.0,
+    max_weight: float = 1.0,
+    risk_free_rate: float = RISK_FREE_RATE,
+    estimator: str = DEFAULT_ESTIMATOR,
+    lookback: int = DEFAULT_LOOKBACK
+) -> dict:
+    """
+    Optimize weights for a set of symbols from the cached covariance payload.
+
+    Args:
+        db_factory: callable returning a Session (only used if the covariance isn't cached)
+        mode: max_sharpe, min_variance, target_return (needs target) or frontier (points)
+        target: annual expected return for target_return mode
+
+    Returns:
+        {"mode", "symbols", "asof", ... allocation or "frontier", "elapsed_ms", "source", "status"}
+    """
+    start = time.perf_counter()
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode. Use one of: {', '.join(MODES)}")
+    if mode == "target_return" and target is None:
+        raise ValueError("target_return mode needs a target")
+
+    payload = get_or_build_covariance(db_factory, estimator, lookback)
+    if not payload:
+        return {"status": "error", "message": "No price data available"}
+
+    found, mean, cov = submatrix(payload, sorted(set(symbols)))
+    missing = [s for s in symbols if s not in found]
+    if missing:
+        return {"status": "error", "message": f"Not enough price data for: {', '.join(missing)}"}
+    if len(found) < 2:
+        return {"status": "error", "message": "Need at least 2 symbols"}
+
+    params = {
+        "symbols": found, "mode": mode, "target": target,
+        "points": points if mode == "frontier" else None,
+        "min_weight": min_weight, "max_weight": max_weight, "risk_free_rate": risk_free_rate,
+        "estimator": estimator, "lookback": lookback, "asof": payload["asof"],
+    }
+    key = _memo_key(**params)
+    cached = get_cache(key)
+    if cached is not None:
+        return dict(cached, elapsed_ms=round((time.perf_counter() - start) * 1000, 1), source="cache")
+
+    mu = mean * TRADING_DAYS
+    cov = cov * TRADING_DAYS
+    result = {
+        "mode": mode,
+        "symbols": found,
+        "estimator": estimator,
+        "lookback": lookback,
+        "asof": payload["asof"],
+        "constraints": {"min_weight": min_weight, "max_weight": max_weight},
+        "risk_free_rate": risk_free_rate,
+        "status": "success"
+    }
+
+    if mode == "frontier":
+        frontier = efficient_frontier(mu, cov, points, min_weight, max_weight)
+        result["frontier"] = [_allocation(found, w, mu, cov, risk_free_rate) for w in frontier]
+        # Tangency portfolio, warm-started from the frontier point with the best Sharpe
+        best = max(range(len(frontier)), key=lambda i: result["frontier"][i]["sharpe"])
+        result.update(_allocation(
+            found, max_sharpe(mu, cov, risk_free_rate, min_weight, max_weight, x0=frontier[best]),
+            mu, cov, risk_free_rate
+        ))
+    elif mode == "max_sharpe":
+        result.update(_allocation(found, max_sharpe(mu, cov, risk_free_rate, min_weight, max_weight), mu, cov, risk_free_rate))
+    elif mode == "min_variance":
+        result.update(_allocation(found, min_variance(cov, min_weight, max_weight), mu, cov, risk_free_rate))
+    else:
+        result.update(_allocation(found, target_return(mu, cov, target, min_weight, max_weight), mu, cov, risk_free_rate))
+
+    set_cache(key, result, expire_seconds=OPTIMIZE_CACHE_TTL)
+    return dict(result, elapsed_ms=round((time.perf_counter() - start) * 1000, 1), source="computed")
+
+
+def optimize_job(symbols: Sequence[str], **params) -> dict:
+    """
+    optimize_portfolio() with the process's own sessions (a compute pool job).
+    """
+    from database.db import SessionLocal
+    return optimize_portfolio(SessionLocal, symbols, **params)
@@ -0,0 +1,318 @@
+"""
+PRICE STREAM SERVICE - Live price fan-out for /ws/prices and /api/stream/prices (SSE)
+- One producer across all uvicorn workers: every worker runs the loop, but only the
+  holder of a Redis lease (lock:price-stream:producer) refreshes prices - once per
+  STREAM_INTERVAL for the union of every worker's subscribed symbols
+- Workers record their subscribed symbols in a Redis sorted set (price-stream:demand,
+  scored by last heartbeat) so the producer knows what to refresh
+- Changed prices are published once on Redis pub/sub (prices:updates); each worker
+  has one subscriber task that fans a message out to its own connections
+- Messages are encoded once per update (orjson) and shared by every connection
+- Backpressure: each connection keeps at most one pending message per symbol - a slow
+  client gets the newest price, never a growing queue (conflated updates are counted);
+  sends that block longer than SEND_TIMEOUT close the connection
+- Redis down: the worker produces for its own subscribers and dispatches locally
+- Used by: app/main.py (started on app startup)
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import orjson
+import redis.asyncio as aioredis
+
+
+STREAM_INTERVAL = float(os.getenv("PRICE_STREAM_INTERVAL", 60))  # seconds between refreshes
+SEND_TIMEOUT = 10.0          # seconds a connection may block a send before it's dropped
+HEARTBEAT_SECONDS = 15.0     # idle keep-alive for SSE / ping for WebSocket clients
+LISTENER_RETRY_SECONDS = 2.0
+
+PRICE_CHANNEL = "prices:updates"
+DEMAND_KEY = "price-stream:demand"
+PRODUCER_LOCK = "lock:price-stream:producer"
+INSTANCE_ID = uuid.uuid4().hex
+
+# Take the lease, or extend it if this worker already holds it
+_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+async_redis_client = aioredis.Redis(
+    host=os.getenv('REDIS_HOST', 'redis'),
+    port=int(os.getenv('REDIS_PORT', 6379)),
+    db=0
+)
+
+PriceLoader = Callable[[List[str]], Awaitable[dict]]
+
+
+def encode_price(symbol: str, data: dict, source: str, published_at: Optional[float] = None) -> str:
+    """The JSON text sent to clients for one price update."""
+    return orjson.dumps({
+        "type": "price",
+        "symbol": symbol,
+        "data": data,
+        "source": source,
+        "published_at": published_at or time.time()
+    }).decode()
+
+
+class Subscriber:
+    """
+    One client connection. Holds the newest undelivered message per symbol.
+    """
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self.conflated = 0
+        self._pending: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, symbol: str, message: str):
+        if symbol in self._pending:
+            self.conflated += 1
+        self._pending[symbol] = message
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait for pending messages and take all of them ([] on timeout).
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        return batch
+
+
+class PriceHub:
+    """
+    This worker's connections, indexed by symbol.
+    """
+
+    def __init__(self):
+        self._by_symbol: Dict[str, Set[Subscriber]] = defaultdict(set)
+        self.connections: Set[Subscriber] = set()
+        self.dispatched = 0
+        self.delivered = 0
+
+    def connect(self) -> Subscriber:
+        subscriber = Subscriber()
+        self.connections.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: Subscriber):
+        self.unsubscribe(subscriber, list(subscriber.symbols))
+        self.connections.discard(subscriber)
+
+    def subscribe(self, subscriber: Subscriber, symbols: Iterable[str]) -> List[str]:
+        """Add symbols to a connection. Returns the ones it didn't have yet."""
+        added = [s for s in dict.fromkeys(symbols) if s not in subscriber.symbols]
+        for symbol in added:
+            subscriber.symbols.add(symbol)
+            self._by_symbol[symbol].add(subscriber)
+        return added
+
+    def unsubscribe(self, subscriber: Subscriber, symbols: Iterable[str]):
+        for symbol in symbols:
+            subscriber.symbols.discard(symbol)
+            subscribers = self._by_symbol.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_symbol[symbol]
+
+    def symbols(self) -> List[str]:
+        return sorted(self._by_symbol)
+
+    def dispatch(self, symbol: str, message: str):
+        subscribers = self._by_symbol.get(symbol, ())
+        for subscriber in subscribers:
+            subscriber.offer(symbol, message)
+        self.dispatched += 1
+        self.delivered += len(subscribers)
+
+
+hub = PriceHub()
+
+_tasks: List[asyncio.Task] = []
+_last_published: Dict[str, tuple] = {}
+_stats = {"refreshes": 0, "published": 0, "producer": False, "listener": False}
+
+
+def get_stream_stats() -> dict:
+    """
+    Connection and fan-out counters for this worker.
+    """
+    return dict(
+        _stats,
+        connections=len(hub.connections),
+        symbols=len(hub.symbols()),
+        dispatched=hub.dispatched,
+        delivered=hub.delivered,
+        conflated=sum(s.conflated for s in hub.connections),
+        cpu_seconds=round(time.process_time(), 3)
+    )
+
+
+# ============================================================================
+# FAN-OUT (every worker)
+# ============================================================================
+
+async def _listen():
+    """Relay prices:updates messages to this worker's connections; reconnects on errors."""
+    while True:
+        pubsub = async_redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(PRICE_CHANNEL)
+            _stats["listener"] = True
+            async for message in pubsub.listen():
+                text = message["data"].decode()
+                hub.dispatch(orjson.loads(text)["symbol"], text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Price stream listener error: {e}")
+        finally:
+            _stats["listener"] = False
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+
+async def publish_price(symbol: str, data: dict, source: str) -> str:
+    """
+    Send one update to every worker (or only this one if Redis is unavailable).
+    """
+    message = encode_price(symbol, data, source)
+    try:
+        await async_redis_client.publish(PRICE_CHANNEL, message)
+    except Exception as e:
+        print(f"Price stream publish error: {e}")
+        hub.dispatch(symbol, message)
+    _stats["published"] += 1
+    return message
+
+
+# ============================================================================
+# PRODUCER (lease holder only)
+# ============================================================================
+
+async def _record_demand(now: float):
+    symbols = hub.symbols()
+    if symbols:
+        await async_redis_client.zadd(DEMAND_KEY, {symbol: now for symbol in symbols})
+
+
+async def _hold_lease(lease_seconds: float) -> bool:
+    return bool(await async_redis_client.eval(_LEASE_SCRIPT, 1, PRODUCER_LOCK, INSTANCE_ID, int(lease_seconds * 1000)))
+
+
+async def _demanded_symbols(now: float) -> List[str]:
+    """Symbols some worker heartbeated within the last two intervals."""
+    cutoff = now - 2 * STREAM_INTERVAL
+    pipe = async_redis_client.pipeline(transaction=False)
+    pipe.zremrangebyscore(DEMAND_KEY, "-inf", cutoff)
+    pipe.zrangebyscore(DEMAND_KEY, cutoff, "+inf")
+    _, symbols = await pipe.execute()
+    return sorted(s.decode() for s in symbols)
+
+
+def _price_signature(data: dict) -> tuple:
+    return tuple(data.get(field) for field in ("date", "open", "high", "low", "close", "volume"))
+
+
+async def refresh_once(loader: PriceLoader) -> int:
+    """
+    One producer cycle: heartbeat this worker's symbols, and if it holds the lease,
+    refresh every demanded symbol in one batched load and publish the changed ones.
+
+    Returns:
+        Number of updates published
+    """
+    now = time.time()
+    try:
+        await _record_demand(now)
+        _stats["producer"] = await _hold_lease(3 * STREAM_INTERVAL)
+        if not _stats["producer"]:
+            return 0
+        symbols = await _demanded_symbols(now)
+    except Exception as e:
+        # Redis down - serve this worker's own subscribers
+        print(f"Price stream coordination error: {e}")
+        _stats["producer"] = True
+        symbols = hub.symbols()
+    if not symbols:
+        return 0
+
+    prices = await loader(symbols)
+    _stats["refreshes"] += 1
+    published = 0
+    for symbol, (data, source) in prices.items():
+        signature = _price_signature(data)
+        if _last_published.get(symbol) != signature:
+            _last_published[symbol] = signature
+            await publish_price(symbol, data, source)
+            published += 1
+    return published
+
+
+async def _produce(loader: PriceLoader):
+    while True:
+        try:
+            await refresh_once(loader)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Price stream refresh error: {e}")
+        await asyncio.sleep(STREAM_INTERVAL)
+
+
+def start_price_stream(loader: PriceLoader):
+    """
+    Start this worker's fan-out listener and producer loop. Call once on app startup.
+
+    Args:
+        loader: async fn(symbols) → {symbol: (price data, source)}, bypassing the cache
+    """
+    if _tasks:
+        return
+    _tasks.append(asyncio.create_task(_listen()))
+    _tasks.append(asyncio.create_task(_produce(loader)))
+
+
+async def stop_price_stream():
+    """
+    Cancel the background tasks and hand the producer lease to another worker.
+    """
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    try:
+        await async_redis_client.eval(_RELEASE_SCRIPT, 1, PRODUCER_LOCK, INSTANCE_ID)
+        await async_redis_client.aclose()
+    except Exception as e:
+        print(f"Price stream shutdown error: {e}")
@@ -0,0 +1,305 @@
+"""
+FAST JSON RESPONSES - orjson bodies, pre-encoded splices, ETag/304 and compression
+- Endpoints return dicts encoded by ORJSONResponse (the app default); hot paths
+  return a Response directly so FastAPI's jsonable_encoder pass is skipped too
+- RawJSON: a value already encoded with orjson (e.g. straight from Redis), stored
+  with its digest; spliced_response() inserts it into the envelope as-is, without
+  decoding, and derives a strong ETag from the digests instead of hashing the body
+- JSONResponseMiddleware, for every 200 application/json GET:
+  * strong ETag (blake2b of the body unless the endpoint set one)
+  * If-None-Match → 304 with no body
+  * brotli (if installed) or gzip for bodies >= COMPRESS_MIN_BYTES; compressed
+    bodies are kept in a small LRU keyed by ETag, so a repeated body is compressed once
+- Streaming responses (SSE) and non-JSON responses pass through untouched
+- EventStreamResponse: SSE body whose chunks may each take at most send_timeout
+  seconds to send; a client that stalls longer is dropped (same rule as /ws/prices)
+- Used by: app/main.py
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+import orjson
+from fastapi.responses import Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESS_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', 1024))
+COMPRESSED_CACHE_BYTES = int(os.getenv('RESPONSE_COMPRESSED_CACHE_MB', 32)) * 1024 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+DIGEST_SIZE = 16
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY  # same as ORJSONResponse
+
+
+def _digest(*parts: bytes) -> bytes:
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for part in parts:
+        hasher.update(part)
+    return hasher.digest()
+
+
+# ============================================================================
+# PRE-ENCODED BODIES
+# ============================================================================
+
+class RawJSON(NamedTuple):
+    """A JSON value already encoded with orjson, plus the digest of those bytes."""
+    body: bytes
+    digest: bytes
+
+    @classmethod
+    def encode(cls, value: Any) -> "RawJSON":
+        body = orjson.dumps(value, option=ORJSON_OPTIONS)
+        return cls(body, _digest(body))
+
+    @classmethod
+    def unpack(cls, stored: bytes) -> "RawJSON":
+        """Inverse of pack() - a slice, the JSON itself is never parsed."""
+        return cls(stored[DIGEST_SIZE:], stored[:DIGEST_SIZE])
+
+    def pack(self) -> bytes:
+        """Digest + body, the form kept in the cache."""
+        return self.digest + self.body
+
+
+def spliced_response(fields: dict, headers: Optional[dict] = None) -> Response:
+    """
+    A JSON object response with fields in the given order.
+    RawJSON values are inserted byte-for-byte; everything else is encoded with orjson.
+    The ETag is derived from the RawJSON digests, so large spliced values aren't re-hashed.
+    """
+    parts = []
+    etag_parts = []
+    for key, value in fields.items():
+        name = orjson.dumps(key)
+        if isinstance(value, RawJSON):
+            parts.append(name + b":" + value.body)
+            etag_parts += [name, b"\x00raw", value.digest]
+        else:
+            encoded = orjson.dumps(value, option=ORJSON_OPTIONS)
+            parts.append(name + b":" + encoded)
+            etag_parts += [name, b"\x00json", encoded]
+    body = b"{" + b",".join(parts) + b"}"
+    headers = dict(headers or {}, etag=f'"{_digest(*etag_parts).hex()}"')
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# ============================================================================
+# CONDITIONAL REQUESTS + COMPRESSION
+# ============================================================================
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    "br" or "gzip" from an Accept-Encoding header (q=0 means refused), else None.
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison: W/ prefixes are ignored, "*" matches anything.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def _variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """Each content-coding is its own representation, so it gets its own ETag."""
+    if not encoding or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodies:
+    """
+    LRU of compressed bodies by variant ETag, bounded by total bytes.
+    Only touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get_or_compress(self, etag: str, encoding: str, body: bytes) -> bytes:
+        compressed = self._entries.get(etag)
+        if compressed is not None:
+            self.hits += 1
+            self._entries.move_to_end(etag)
+            return compressed
+        self.misses += 1
+        compressed = compress(body, encoding)
+        if len(compressed) <= self.max_bytes:
+            self._entries[etag] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return compressed
+
+    def __len__(self):
+        return len(self._entries)
+
+
+compressed_bodies = CompressedBodies(COMPRESSED_CACHE_BYTES)
+_stats = {"responses": 0, "not_modified": 0, "compressed": 0}
+
+
+def get_response_stats() -> dict:
+    """
+    ETag / compression counters for this worker.
+    """
+    return dict(
+        _stats,
+        compressed_cache_hits=compressed_bodies.hits,
+        compressed_cache_misses=compressed_bodies.misses,
+        compressed_cache_entries=len(compressed_bodies),
+        compressed_cache_bytes=compressed_bodies.size,
+        brotli=brotli is not None
+    )
+
+
+class JSONResponseMiddleware:
+    """
+    ASGI middleware adding ETag / 304 / compression to buffered JSON GET responses.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        start = None
+        passthrough = False
+        chunks = []
+
+        async def buffered_send(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] != 200
+                    or not headers.get("content-type", "").startswith("application/json")
+                    or "content-encoding" in headers
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._send_full(start, b"".join(chunks), if_none_match, encoding, send)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _send_full(self, start: dict, body: bytes, if_none_match: Optional[str], encoding: Optional[str], send):
+        headers = MutableHeaders(raw=list(start["headers"]))
+        etag = headers.get("etag") or f'"{_digest(body).hex()}"'
+        if len(body) < self.minimum_size:
+            encoding = None
+        else:
+            headers.add_vary_header("Accept-Encoding")
+        etag = _variant_etag(etag, encoding)
+        headers["etag"] = etag
+        _stats["responses"] += 1
+
+        if if_none_match and etag_matches(if_none_match, etag):
+            _stats["not_modified"] += 1
+            del headers["content-type"]
+            del headers["content-length"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding:
+            body = compressed_bodies.get_or_compress(etag, encoding, body)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            _stats["compressed"] += 1
+        await send({"type": "http.response.start", "status": 200, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
+
+
+class EventStreamResponse(StreamingResponse):
+    """
+    text/event-stream response with a per-chunk send timeout. A send that blocks
+    longer than send_timeout ends the response instead of waiting on the client forever.
+    on_close runs however the stream ends (finished, timed out, client gone - even
+    before the generator started).
+    """
+    media_type = "text/event-stream"
+
+    def __init__(self, content, send_timeout: float, headers: Optional[dict] = None, on_close=None):
+        super().__init__(content, headers=headers, media_type=self.media_type)
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+
+    async def stream_response(self, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        try:
+            async for chunk in self.body_iterator:
+                if not isinstance(chunk, (bytes, memoryview)):
+                    chunk = chunk.encode(self.charset)
+                message = {"type": "http.response.body", "body": chunk, "more_body": True}
+                await asyncio.wait_for(send(message), self.send_timeout)
+        except asyncio.TimeoutError:
+            return  # too slow to keep up - the server drops the unfinished response
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+            if hasattr(self.body_iterator, "aclose"):
+                await self.body_iterator.aclose()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
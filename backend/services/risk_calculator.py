@@ -1,9 +1,540 @@
 """
-RISK CALCULATOR SERVICE - Portfolio risk metrics (NOT IMPLEMENTED YET)
-- Will calculate volatility, Value at Risk (VaR), Sharpe ratio
-- Beta, correlation matrix, drawdown analysis
-- TODO: Implement calculate_risk() function
-- Will be used by: GET /api/risk endpoint
+RISK CALCULATOR SERVICE - Vectorized risk metrics for the whole universe at once
+- Builds a (dates × symbols) daily return matrix from StockPrice closes
+  (one IN query via database/price_store.py)
+- One NumPy pass computes, for every column: annualized return/volatility,
+  historical + parametric VaR/CVaR, Sharpe, Sortino, beta and max drawdown
+- Missing bars are NaN and every statistic is NaN-aware, so symbols with
+  gaps or shorter histories don't shift each other's dates
+- Beta is against an equal-weight universe return unless a benchmark symbol is given
+- Portfolio risk = the same metrics on the weighted return column
+- Optional Monte Carlo VaR/CVaR: correlated paths from a Cholesky factor of the
+  holdings' covariance, simulated in fixed-size chunks (bounded memory) with one
+  SeedSequence child per chunk, so results are reproducible for any worker count
+- universe_risk_job / portfolio_risk_job run in the compute pool (services/compute.py)
+  on its preloaded price arrays; Monte Carlo chunks stay in that process
+- Used by: GET /api/risk/stock/{symbol}, /api/risk/stocks, /api/risk/portfolio
 """
+import atexit
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from statistics import NormalDist
+from typing import Dict, List, NamedTuple, Optional, Sequence
 
-# TODO: Implement risk calculation logic
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config.stocks import get_all_stocks
+from database.price_store import PriceArrays, get_price_arrays_many
+from services.compute import preloaded_price_arrays, in_compute_worker, PRELOAD_DAYS
+
+
+TRADING_DAYS = 252
+DEFAULT_CONFIDENCE = 0.95
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.04"))  # annual
+MIN_OBSERVATIONS = 20  # fewer daily returns than this → metrics are None
+
+EQUAL_WEIGHT_BENCHMARK = "equal_weight"
+
+# Monte Carlo settings
+MC_DEFAULT_PATHS = 100_000
+MC_MAX_PATHS = int(os.getenv("MC_MAX_PATHS", "1000000"))
+MC_CHUNK_BYTES = int(os.getenv("MC_CHUNK_MB", "32")) * 1024 * 1024  # per-chunk shock array (peak ≈ 2×)
+MC_WORKERS = int(os.getenv("MC_WORKERS", "1"))  # >1 fans chunks out to a process pool
+MC_STUDENT_T_DF = float(os.getenv("MC_STUDENT_T_DF", "5"))  # fat tails; 0 = normal shocks
+
+METRICS = (
+    "observations", "annual_return", "volatility",
+    "var_historical", "cvar_historical", "var_parametric", "cvar_parametric",
+    "sharpe", "sortino", "beta", "max_drawdown",
+)
+
+
+class ReturnMatrix(NamedTuple):
+    """
+    Daily simple returns aligned on a shared date axis (oldest first).
+    returns[t, j] is NaN when symbol j has no bar on dates[t] or dates[t - 1].
+    """
+    dates: np.ndarray    # datetime64[D], shape (T,)
+    symbols: List[str]   # length N
+    returns: np.ndarray  # float64, shape (T, N)
+
+    def column(self, symbol: str) -> np.ndarray:
+        return self.returns[:, self.symbols.index(symbol)]
+
+
+def build_close_matrix(arrays: Dict[str, PriceArrays]):
+    """
+    Align closes from {symbol: PriceArrays (ascending)} on the union of their dates.
+
+    Returns:
+        (dates (T,), symbols, closes (T × N) with NaN where a symbol has no bar)
+    """
+    symbols = [symbol for symbol, prices in arrays.items() if len(prices)]
+    if not symbols:
+        return np.array([], dtype="datetime64[D]"), [], np.empty((0, 0))
+
+    dates = np.unique(np.concatenate([arrays[s].date for s in symbols]))
+    closes = np.full((len(dates), len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        closes[np.searchsorted(dates, arrays[symbol].date), j] = arrays[symbol].close
+    return dates, symbols, closes
+
+
+def simple_returns(closes: np.ndarray) -> np.ndarray:
+    """
+    Day-over-day returns of a (T × N) close matrix, shape (T - 1) × N.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return closes[1:] / closes[:-1] - 1.0
+
+
+def build_return_matrix(arrays: Dict[str, PriceArrays]) -> ReturnMatrix:
+    """
+    Align closes from {symbol: PriceArrays (ascending)} on the union of their dates
+    and turn them into a return matrix.
+    """
+    dates, symbols, closes = build_close_matrix(arrays)
+    if not symbols:
+        return ReturnMatrix(dates, [], closes)
+    return ReturnMatrix(dates[1:], symbols, simple_returns(closes))
+
+
+def load_return_matrix(db: Session, symbols: Sequence[str], lookback_days: int, end_date: Optional[date] = None) -> ReturnMatrix:
+    """
+    Read closes for all symbols with one query and build the return matrix.
+
+    Args:
+        lookback_days: calendar days of history to use
+        end_date: last date included (default: today)
+    """
+    end_date = end_date or date.today()
+    arrays = get_price_arrays_many(
+        db, symbols,
+        start_date=end_date - timedelta(days=lookback_days),
+        end_date=end_date,
+        ascending=True
+    )
+    return build_return_matrix(arrays)
+
+
+def preloaded_return_matrix(symbols: Sequence[str], lookback_days: int) -> ReturnMatrix:
+    """
+    load_return_matrix() up to today, cut from the compute process's preloaded prices
+    (a DB read only if lookback_days is longer than what's preloaded).
+    """
+    end_date = date.today()
+    if lookback_days > PRELOAD_DAYS:
+        from database.db import SessionLocal
+        db = SessionLocal()
+        try:
+            return load_return_matrix(db, symbols, lookback_days, end_date)
+        finally:
+            db.close()
+
+    start = np.datetime64(end_date - timedelta(days=lookback_days), "D")
+    prices = preloaded_price_arrays()
+    return build_return_matrix({
+        symbol: prices[symbol].take(prices[symbol].date >= start)
+        for symbol in symbols if symbol in prices
+    })
+
+
+def equal_weight_returns(returns: np.ndarray) -> np.ndarray:
+    """
+    Mean return across columns per day (ignoring missing symbols).
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN rows
+        return np.nanmean(returns, axis=1)
+
+
+def compute_risk_metrics(
+    returns: np.ndarray,
+    benchmark: Optional[np.ndarray] = None,
+    confidence: float = DEFAULT_CONFIDENCE,
+    risk_free_rate: float = RISK_FREE_RATE
+) -> Dict[str, np.ndarray]:
+    """
+    Risk metrics for every column of a (T × N) daily return matrix in one pass.
+
+    Args:
+        returns: daily simple returns, NaN where missing
+        benchmark: (T,) benchmark returns for beta (default: equal-weight of the columns)
+        confidence: VaR/CVaR confidence level (0.95 → 5% tail)
+        risk_free_rate: annual rate for Sharpe/Sortino
+
+    Returns:
+        {metric: (N,) array} - VaR/CVaR/drawdown are positive loss fractions (daily for VaR/CVaR)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    if benchmark is None:
+        benchmark = equal_weight_returns(returns)
+
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, returns, 0.0)
+    alpha = 1.0 - confidence
+    rf_daily = risk_free_rate / TRADING_DAYS
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+
+        mean = filled.sum(axis=0) / count
+        deviation = np.where(valid, returns - mean, 0.0)
+        std = np.sqrt((deviation ** 2).sum(axis=0) / (count - 1))
+
+        # Historical VaR/CVaR: empirical alpha-quantile and the mean beyond it
+        # (np.nanquantile loops over columns; one sort puts NaNs last in every column)
+        ordered = np.sort(returns, axis=0)
+        position = alpha * (count - 1)
+        lower = np.clip(np.floor(position).astype(np.int64), 0, None)
+        upper = np.minimum(lower + 1, np.maximum(count - 1, 0))
+        low_values = np.take_along_axis(ordered, lower[None, :], axis=0)[0]
+        high_values = np.take_along_axis(ordered, upper[None, :], axis=0)[0]
+        quantile = low_values + (high_values - low_values) * (position - lower)
+        tail = valid & (filled <= quantile)
+        var_historical = -quantile
+        cvar_historical = -(np.where(tail, filled, 0.0).sum(axis=0) / tail.sum(axis=0))
+
+        # Parametric (normal) VaR/CVaR
+        z = NormalDist().inv_cdf(alpha)
+        var_parametric = -(mean + z * std)
+        cvar_parametric = -(mean - std * NormalDist().pdf(z) / alpha)
+
+        annual_return = mean * TRADING_DAYS
+        volatility = std * np.sqrt(TRADING_DAYS)
+        sharpe = (annual_return - risk_free_rate) / volatility
+
+        downside = np.minimum(filled - rf_daily, 0.0) * valid
+        downside_dev = np.sqrt((downside ** 2).sum(axis=0) / count) * np.sqrt(TRADING_DAYS)
+        sortino = (annual_return - risk_free_rate) / downside_dev
+
+        # Beta over the days both the symbol and the benchmark have a return
+        paired = valid & ~np.isnan(benchmark)[:, None]
+        pair_count = paired.sum(axis=0)
+        r = np.where(paired, returns, 0.0)
+        b = np.where(paired, benchmark[:, None], 0.0)
+        r_mean = r.sum(axis=0) / pair_count
+        b_mean = b.sum(axis=0) / pair_count
+        covariance = (r * b).sum(axis=0) / pair_count - r_mean * b_mean
+        benchmark_var = (b * b).sum(axis=0) / pair_count - b_mean ** 2
+        beta = covariance / benchmark_var
+
+        # Max drawdown on the compounded wealth curve (missing day = flat)
+        wealth = np.cumprod(1.0 + filled, axis=0)
+        peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)  # starting value counts as a peak
+        max_drawdown = -(wealth / peak - 1.0).min(axis=0, initial=0.0)
+
+    metrics = {
+        "observations": count,
+        "annual_return": annual_return,
+        "volatility": volatility,
+        "var_historical": var_historical,
+        "cvar_historical": cvar_historical,
+        "var_parametric": var_parametric,
+        "cvar_parametric": cvar_parametric,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "beta": beta,
+        "max_drawdown": max_drawdown,
+    }
+    too_short = count < MIN_OBSERVATIONS
+    for name, values in metrics.items():
+        if name != "observations":
+            metrics[name] = np.where(too_short, np.nan, values)
+    return metrics
+
+
+def _benchmark_returns(matrix: ReturnMatrix, benchmark: Optional[str]) -> np.ndarray:
+    if not benchmark or benchmark == EQUAL_WEIGHT_BENCHMARK:
+        return equal_weight_returns(matrix.returns)
+    if benchmark not in matrix.symbols:
+        raise ValueError(f"No price data for benchmark {benchmark}")
+    return matrix.column(benchmark)
+
+
+def _metric_dict(metrics: Dict[str, np.ndarray], j: int, decimals: int = 4) -> dict:
+    """One column of compute_risk_metrics() output as JSON-friendly floats (NaN → None)."""
+    result = {}
+    for name in METRICS:
+        value = metrics[name][j]
+        if name == "observations":
+            result[name] = int(value)
+        else:
+            result[name] = None if np.isnan(value) else round(float(value), decimals)
+    return result
+
+
+def calculate_universe_risk(
+    matrix: ReturnMatrix,
+    benchmark: Optional[str] = None,
+    confidence: float = DEFAULT_CONFIDENCE
+) -> dict:
+    """
+    Risk metrics for every symbol in the matrix.
+
+    Returns:
+        {"benchmark", "confidence", "start_date", "end_date", "metrics": {symbol: {...}}, "status"}
+    """
+    if not matrix.symbols or len(matrix.dates) == 0:
+        return {"status": "error", "message": "No price data available"}
+
+    metrics = compute_risk_metrics(
+        matrix.returns,
+        benchmark=_benchmark_returns(matrix, benchmark),
+        confidence=confidence
+    )
+    return {
+        "benchmark": benchmark or EQUAL_WEIGHT_BENCHMARK,
+        "confidence": confidence,
+        "start_date": str(matrix.dates[0]),
+        "end_date": str(matrix.dates[-1]),
+        "metrics": {symbol: _metric_dict(metrics, j) for j, symbol in enumerate(matrix.symbols)},
+        "status": "success"
+    }
+
+
+def calculate_portfolio_risk(
+    matrix: ReturnMatrix,
+    weights: Dict[str, float],
+    benchmark: Optional[str] = None,
+    confidence: float = DEFAULT_CONFIDENCE,
+    simulate: bool = False,
+    paths: int = MC_DEFAULT_PATHS,
+    seed: Optional[int] = None,
+    horizon_days: int = 1,
+    mc_workers: int = MC_WORKERS
+) -> dict:
+    """
+    Risk metrics for a weighted portfolio (daily rebalanced to the given weights).
+
+    Args:
+        weights: {symbol: weight}, normalized to sum to 1
+        simulate: also run Monte Carlo VaR/CVaR (paths / seed / horizon_days, see monte_carlo_var)
+        mc_workers: processes for the simulation chunks
+
+    Returns:
+        {"weights", "portfolio": {...}, "holdings": {symbol: {...}}, ...}
+    """
+    missing = [s for s in weights if s not in matrix.symbols]
+    if missing:
+        return {"status": "error", "message": f"No price data for: {', '.join(missing)}"}
+
+    total = sum(weights.values())
+    if total <= 0:
+        return {"status": "error", "message": "Weights must sum to a positive number"}
+
+    columns = [matrix.symbols.index(s) for s in weights]
+    w = np.array(list(weights.values()), dtype=np.float64) / total
+    holdings = matrix.returns[:, columns]
+
+    # Days where any holding has no bar are dropped rather than treated as flat
+    complete = ~np.isnan(holdings).any(axis=1)
+    portfolio = np.where(complete, np.nan_to_num(holdings) @ w, np.nan)
+
+    benchmark_returns = _benchmark_returns(matrix, benchmark)
+    combined = np.column_stack([portfolio, holdings])
+    metrics = compute_risk_metrics(combined, benchmark=benchmark_returns, confidence=confidence)
+
+    result = {
+        "benchmark": benchmark or EQUAL_WEIGHT_BENCHMARK,
+        "confidence": confidence,
+        "start_date": str(matrix.dates[0]),
+        "end_date": str(matrix.dates[-1]),
+        "weights": {s: round(float(x), 4) for s, x in zip(weights, w)},
+        "portfolio": _metric_dict(metrics, 0),
+        "holdings": {s: _metric_dict(metrics, j + 1) for j, s in enumerate(weights)},
+        "status": "success"
+    }
+    if simulate:
+        result["monte_carlo"] = monte_carlo_var(
+            holdings[complete], w,
+            paths=paths, confidence=confidence, seed=seed, horizon_days=horizon_days, workers=mc_workers
+        )
+    return result
+
+
+def universe_risk_job(lookback_days: int, benchmark: Optional[str] = None) -> dict:
+    """
+    calculate_universe_risk() for every tracked stock (a compute pool job).
+    """
+    matrix = preloaded_return_matrix([s["symbol"] for s in get_all_stocks()], lookback_days)
+    return calculate_universe_risk(matrix, benchmark)
+
+
+def portfolio_risk_job(weights: Dict[str, float], lookback_days: int, benchmark: Optional[str] = None, **simulation) -> dict:
+    """
+    calculate_portfolio_risk() (a compute pool job). Without a benchmark the equal-weight
+    universe is the benchmark, so every tracked stock goes into the matrix.
+    """
+    symbols = [s["symbol"] for s in get_all_stocks()] if benchmark is None else [*weights, benchmark]
+    matrix = preloaded_return_matrix(list(dict.fromkeys(symbols)), lookback_days)
+    # A compute process already has a core to itself - no nested pool
+    mc_workers = 1 if in_compute_worker() else MC_WORKERS
+    return calculate_portfolio_risk(matrix, weights, benchmark, mc_workers=mc_workers, **simulation)
+
+
+# ============================================================================
+# MONTE CARLO VaR
+# ============================================================================
+
+def cholesky_factor(cov: np.ndarray) -> np.ndarray:
+    """
+    Lower-triangular L with L @ L.T == cov. Adds a small diagonal jitter when the
+    sample covariance isn't positive definite (e.g. fewer days than assets).
+    """
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1.0
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 100
+    raise ValueError("Covariance matrix is not positive definite")
+
+
+def chunk_sizes(paths: int, assets: int, horizon_days: int, chunk_bytes: int = MC_CHUNK_BYTES) -> List[int]:
+    """
+    Split paths into chunks whose (chunk × horizon × assets) float64 shocks fit in chunk_bytes.
+    """
+    per_chunk = max(1, chunk_bytes // (8 * assets * horizon_days))
+    full, rest = divmod(paths, per_chunk)
+    return [per_chunk] * full + ([rest] if rest else [])
+
+
+def _simulate_chunk(args) -> np.ndarray:
+    """
+    Portfolio returns for one chunk of paths (module-level so process pools can pickle it).
+    Buy-and-hold over the horizon: each asset compounds its daily returns, then weights apply.
+    """
+    size, seed, mean, factor, weights, horizon_days, df = args
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((size, horizon_days, len(mean)))
+    if df > 2:
+        # Multivariate Student-t, rescaled so the covariance is unchanged
+        scale = np.sqrt(rng.chisquare(df, size=(size, horizon_days, 1)) / (df - 2))
+        shocks /= scale
+    daily = shocks @ factor.T
+    daily += mean
+    if horizon_days == 1:
+        return daily[:, 0, :] @ weights
+    daily += 1.0
+    np.maximum(daily, 0.0, out=daily)  # a position can't lose more than everything
+    return (daily.prod(axis=1) - 1.0) @ weights
+
+
+_process_pool = None
+_process_pool_workers = 0
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """One long-lived pool per process (start-up cost is paid once)."""
+    global _process_pool, _process_pool_workers
+    if _process_pool is None or _process_pool_workers != workers:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        _process_pool_workers = workers
+    return _process_pool
+
+
+@atexit.register
+def _shutdown_process_pool():
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def simulate_portfolio_returns(
+    mean: np.ndarray,
+    cov: np.ndarray,
+    weights: np.ndarray,
+    paths: int = MC_DEFAULT_PATHS,
+    horizon_days: int = 1,
+    seed: Optional[int] = None,
+    workers: int = MC_WORKERS,
+    chunk_bytes: int = MC_CHUNK_BYTES,
+    df: float = MC_STUDENT_T_DF
+) -> np.ndarray:
+    """
+    Simulate `paths` portfolio returns over `horizon_days`.
+
+    Args:
+        mean / cov: daily mean vector and covariance of the holdings
+        seed: root seed - chunk i always uses SeedSequence(seed).spawn()[i],
+              so the output doesn't depend on `workers`
+        workers: >1 runs chunks on a process pool
+        df: Student-t degrees of freedom (<= 2 → normal shocks)
+
+    Returns:
+        (paths,) float64 portfolio returns
+    """
+    factor = cholesky_factor(np.atleast_2d(cov))
+    sizes = chunk_sizes(paths, len(mean), horizon_days, chunk_bytes)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, child, mean, factor, weights, horizon_days, df) for size, child in zip(sizes, seeds)]
+
+    if workers > 1 and len(tasks) > 1:
+        chunks = list(_get_process_pool(workers).map(_simulate_chunk, tasks))
+    else:
+        chunks = [_simulate_chunk(task) for task in tasks]
+    return np.concatenate(chunks)
+
+
+def monte_carlo_var(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    paths: int = MC_DEFAULT_PATHS,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+    horizon_days: int = 1,
+    workers: int = MC_WORKERS
+) -> dict:
+    """
+    Monte Carlo VaR/CVaR of a portfolio from its holdings' daily return history.
+
+    Args:
+        returns: (T × N) daily returns with no missing values
+        weights: (N,) portfolio weights summing to 1
+        seed: None picks a fresh one (reported back so the run can be repeated)
+
+    Returns:
+        {"var", "cvar", "paths", "horizon_days", "seed", "chunks", "distribution", "elapsed_ms"}
+    """
+    start = time.perf_counter()
+    if len(returns) < MIN_OBSERVATIONS:
+        return {"status": "error", "message": "Not enough overlapping history to estimate covariance"}
+    if not 1 <= paths <= MC_MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {MC_MAX_PATHS}")
+
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**63)
+    mean = returns.mean(axis=0)
+    cov = np.cov(returns, rowvar=False)
+
+    simulated = simulate_portfolio_returns(
+        mean, cov, weights, paths=paths, horizon_days=horizon_days, seed=seed, workers=workers
+    )
+
+    # Tail without a full sort: k-th smallest return and everything below it
+    k = max(0, int((1.0 - confidence) * paths) - 1)
+    partitioned = np.partition(simulated, k)
+    var = -partitioned[k]
+    cvar = -partitioned[:k + 1].mean()
+
+    return {
+        "var": round(float(var), 4),
+        "cvar": round(float(cvar), 4),
+        "paths": paths,
+        "horizon_days": horizon_days,
+        "seed": seed,
+        "chunks": len(chunk_sizes(paths, len(mean), horizon_days)),
+        "distribution": f"student_t(df={MC_STUDENT_T_DF:g})" if MC_STUDENT_T_DF > 2 else "normal",
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "status": "success"
+    }
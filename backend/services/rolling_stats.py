@@ -0,0 +1,420 @@
+"""
+ROLLING STATS SERVICE - Rolling 20/60/252-day analytics with O(1) daily updates
+- Per window: moving average of the close, annualized volatility of daily returns,
+  correlation of daily returns with the equal-weight universe (same benchmark as beta)
+- First load: every symbol × window in one vectorized pass over the close matrix
+  (cumulative sums, no per-window loops) → O(n) instead of O(n·w)
+- Each cached series carries its running state: the last w bars plus running
+  sums and windowed Welford moments (mean, M2, co-moment) per window
+- daily_update.py pushes new bars into that state: O(1) per bar and window,
+  no history re-read
+- Both paths emit one point per date of the aligned close matrix; a window containing
+  a missing bar is NaN/None (same as pandas rolling(w) defaults)
+- Cached per symbol under rolling:{symbol}:asc, oldest first so new points are appended;
+  slice_rolling() serves them newest first like the history series
+- Used by: GET /api/history/rolling, scripts/daily_update.py
+"""
+import math
+from bisect import bisect_right
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from database.price_store import get_price_arrays_many
+from services.cache import get_cache_many, set_cache_many, HISTORY_SERIES_DAYS
+from services.risk_calculator import (
+    TRADING_DAYS, build_close_matrix, simple_returns, equal_weight_returns
+)
+
+
+WINDOWS = (20, 60, 252)
+ROLLING_CACHE_TTL = 26 * 3600  # outlives one daily_update cycle so updates stay incremental
+SERIES_METRICS = ("sma", "volatility", "correlation")
+
+# Calendar days of extra history so the longest window is warm at the start of the series
+WARMUP_DAYS = int(max(WINDOWS) * 365 / TRADING_DAYS) + 14
+
+
+def rolling_key(symbol: str) -> str:
+    return f"rolling:{symbol}:asc"
+
+
+# ============================================================================
+# VECTORIZED (full series)
+# ============================================================================
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of each trailing window along axis 0 via one cumulative sum (NaN for the first window-1 rows).
+    """
+    cumulative = np.cumsum(values, axis=0)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1] = cumulative[window - 1]
+        out[window:] = cumulative[window:] - cumulative[:-window]
+    return out
+
+
+def rolling_series(
+    closes: np.ndarray,
+    returns: np.ndarray,
+    benchmark: np.ndarray,
+    window: int
+) -> Dict[str, np.ndarray]:
+    """
+    Rolling SMA, annualized volatility and benchmark correlation for every column.
+
+    Args:
+        closes: (T × N) closes, NaN where missing
+        returns: (T × N) daily returns aligned with closes (row 0 is NaN)
+        benchmark: (T,) benchmark returns aligned with closes
+
+    Returns:
+        {"sma", "volatility", "correlation"} → (T × N) arrays
+    """
+    # Windows that touch a missing value are NaN
+    close_missing = _rolling_sum(np.isnan(closes).astype(np.float64), window) > 0
+    return_missing = _rolling_sum(np.isnan(returns).astype(np.float64), window) > 0
+    pair_missing = return_missing | (_rolling_sum(np.isnan(benchmark).astype(np.float64), window) > 0)[:, None]
+
+    # Centre before summing squares so the variance doesn't lose precision to cancellation
+    x = returns - np.nanmean(returns, axis=0)
+    y = (benchmark - np.nanmean(benchmark))[:, None]
+    x = np.nan_to_num(x)
+    y = np.nan_to_num(y)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sma = _rolling_sum(np.nan_to_num(closes), window) / window
+
+        sum_x = _rolling_sum(x, window)
+        sum_y = _rolling_sum(y, window)
+        m2x = _rolling_sum(x * x, window) - sum_x ** 2 / window
+        m2y = _rolling_sum(y * y, window) - sum_y ** 2 / window
+        cxy = _rolling_sum(x * y, window) - sum_x * sum_y / window
+
+        volatility = np.sqrt(np.maximum(m2x, 0.0) / (window - 1) * TRADING_DAYS)
+        correlation = cxy / np.sqrt(m2x * m2y)
+
+    return {
+        "sma": np.where(close_missing, np.nan, sma),
+        "volatility": np.where(return_missing, np.nan, volatility),
+        "correlation": np.where(pair_missing, np.nan, correlation),
+    }
+
+
+# ============================================================================
+# INCREMENTAL (O(1) per bar)
+# ============================================================================
+
+class _Moments:
+    """
+    Windowed Welford moments of (x, y) pairs: means, M2s and co-moment, with add and remove.
+    """
+    __slots__ = ("n", "mean_x", "mean_y", "m2x", "m2y", "cxy")
+
+    def __init__(self, n=0, mean_x=0.0, mean_y=0.0, m2x=0.0, m2y=0.0, cxy=0.0):
+        self.n, self.mean_x, self.mean_y = n, mean_x, mean_y
+        self.m2x, self.m2y, self.cxy = m2x, m2y, cxy
+
+    def add(self, x: float, y: float):
+        self.n += 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.m2x += dx * (x - self.mean_x)
+        self.m2y += dy * (y - self.mean_y)
+        self.cxy += dx * (y - self.mean_y)
+
+    def remove(self, x: float, y: float):
+        if self.n <= 1:
+            self.__init__()
+            return
+        self.n -= 1
+        dx = x - self.mean_x
+        dy = y - self.mean_y
+        self.mean_x -= dx / self.n
+        self.mean_y -= dy / self.n
+        self.m2x -= dx * (x - self.mean_x)
+        self.m2y -= dy * (y - self.mean_y)
+        self.cxy -= dx * (y - self.mean_y)
+
+    def to_list(self) -> list:
+        return [self.n, self.mean_x, self.mean_y, self.m2x, self.m2y, self.cxy]
+
+
+class RollingWindow:
+    """
+    Running state of one window: the last `size` (close, return, benchmark) bars,
+    the close sum, return moments and return/benchmark pair moments.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.bars = deque()
+        self.close_sum = 0.0
+        self.returns = _Moments()   # x = return, y unused
+        self.pairs = _Moments()     # x = return, y = benchmark return
+        self.missing_closes = 0
+        self.missing_returns = 0
+        self.missing_pairs = 0
+
+    def _apply(self, bar, sign: int):
+        close, ret, bench = bar
+        if math.isnan(close):
+            self.missing_closes += sign
+        else:
+            self.close_sum += sign * close
+        if math.isnan(ret):
+            self.missing_returns += sign
+        else:
+            (self.returns.add if sign > 0 else self.returns.remove)(ret, 0.0)
+        if math.isnan(ret) or math.isnan(bench):
+            self.missing_pairs += sign
+        else:
+            (self.pairs.add if sign > 0 else self.pairs.remove)(ret, bench)
+
+    def push(self, close: float, ret: float, bench: float):
+        """Add the newest bar (and drop the oldest once the window is full)."""
+        if len(self.bars) == self.size:
+            self._apply(self.bars.popleft(), -1)
+        bar = (close, ret, bench)
+        self.bars.append(bar)
+        self._apply(bar, +1)
+
+    def values(self):
+        """(sma, volatility, correlation) for the current window - NaN until it's full."""
+        full = len(self.bars) == self.size
+        sma = self.close_sum / self.size if full and not self.missing_closes else math.nan
+        volatility = correlation = math.nan
+        if full and not self.missing_returns:
+            volatility = math.sqrt(max(self.returns.m2x, 0.0) / (self.size - 1) * TRADING_DAYS)
+        if full and not self.missing_pairs:
+            denominator = math.sqrt(max(self.pairs.m2x * self.pairs.m2y, 0.0))
+            correlation = self.pairs.cxy / denominator if denominator else math.nan
+        return sma, volatility, correlation
+
+    @classmethod
+    def from_bars(cls, size: int, bars: Iterable) -> "RollingWindow":
+        window = cls(size)
+        for bar in bars:
+            window.push(*bar)
+        return window
+
+    def to_dict(self) -> dict:
+        return {
+            "size": self.size,
+            "bars": [[_nan_to_none(v) for v in bar] for bar in self.bars],
+            "close_sum": self.close_sum,
+            "returns": self.returns.to_list(),
+            "pairs": self.pairs.to_list(),
+            "missing": [self.missing_closes, self.missing_returns, self.missing_pairs],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingWindow":
+        window = cls(data["size"])
+        window.bars = deque(tuple(_none_to_nan(v) for v in bar) for bar in data["bars"])
+        window.close_sum = data["close_sum"]
+        window.returns = _Moments(*data["returns"])
+        window.pairs = _Moments(*data["pairs"])
+        window.missing_closes, window.missing_returns, window.missing_pairs = data["missing"]
+        return window
+
+
+def _nan_to_none(value: float):
+    return None if value is None or math.isnan(value) else value
+
+
+def _none_to_nan(value) -> float:
+    return math.nan if value is None else value
+
+
+def _to_list(values: np.ndarray, decimals: int) -> list:
+    """JSON-safe list (NaN → None)."""
+    return [None if v != v else v for v in np.round(values, decimals).tolist()]
+
+
+_DECIMALS = {"sma": 4, "volatility": 6, "correlation": 6}
+
+
+# ============================================================================
+# CACHED SERIES
+# ============================================================================
+
+def compute_rolling_payloads(
+    dates: np.ndarray,
+    symbols: List[str],
+    closes: np.ndarray,
+    windows: Sequence[int] = WINDOWS,
+    max_days: int = HISTORY_SERIES_DAYS
+) -> Dict[str, dict]:
+    """
+    Full rolling series + running state for every symbol of a close matrix (ascending dates).
+
+    Returns:
+        {symbol: {"symbol", "dates", "windows": {w: {metric: [...]}}, "state", "status"}}
+        with series oldest first, trimmed to the last max_days calendar days
+    """
+    returns = np.vstack([np.full((1, len(symbols)), np.nan), simple_returns(closes)])
+    benchmark = equal_weight_returns(returns)
+    series = {w: rolling_series(closes, returns, benchmark, w) for w in windows}
+
+    keep = dates > dates[-1] - np.timedelta64(max_days, "D")
+    date_strings = dates[keep].astype(str).tolist()
+    # The state covers every row (a symbol's trailing missing bars too), so updates resume after dates[-1]
+    start = max(0, len(dates) - max(windows))
+
+    payloads = {}
+    for j, symbol in enumerate(symbols):
+        has_bars = ~np.isnan(closes[:, j])
+        if not has_bars.any():
+            continue
+        last = np.flatnonzero(has_bars)[-1]
+        payloads[symbol] = {
+            "symbol": symbol,
+            "dates": list(date_strings),
+            "windows": {
+                str(w): {
+                    metric: _to_list(series[w][metric][keep, j], _DECIMALS[metric])
+                    for metric in SERIES_METRICS
+                }
+                for w in windows
+            },
+            "state": {
+                "last_date": str(dates[-1]),
+                "last_close": float(closes[last, j]),
+                "windows": {
+                    str(w): RollingWindow.from_bars(
+                        w, zip(closes[start:, j].tolist(), returns[start:, j].tolist(), benchmark[start:].tolist())
+                    ).to_dict()
+                    for w in windows
+                },
+            },
+            "status": "success"
+        }
+    return payloads
+
+
+def load_rolling_payloads(db: Session, symbols: Sequence[str], end_date: Optional[date] = None) -> Dict[str, dict]:
+    """
+    Read closes for all symbols with one query and compute their rolling payloads.
+    The benchmark is the equal-weight return of `symbols`, so pass the whole universe.
+    """
+    end_date = end_date or date.today()
+    arrays = get_price_arrays_many(
+        db, symbols,
+        start_date=end_date - timedelta(days=HISTORY_SERIES_DAYS + WARMUP_DAYS),
+        end_date=end_date,
+        ascending=True
+    )
+    dates, symbols, closes = build_close_matrix(arrays)
+    if not symbols:
+        return {}
+    return compute_rolling_payloads(dates, symbols, closes)
+
+
+def push_bar(payload: dict, windows: Dict[str, RollingWindow], bar_date: str, close: float, ret: float, bench: float):
+    """
+    Append one date to a payload's series: O(1) per window.
+    close is NaN when the symbol has no bar that day (the points are None, as in the full path).
+    `windows` is the payload's state, already loaded with RollingWindow.from_dict().
+    """
+    for key, window_series in payload["windows"].items():
+        window = windows.setdefault(key, RollingWindow(int(key)))
+        window.push(close, ret, bench)
+        for metric, value in zip(SERIES_METRICS, window.values()):
+            value = None if math.isnan(value) else round(value, _DECIMALS[metric])
+            window_series[metric].append(value)
+
+    payload["dates"].append(bar_date)
+    payload["state"]["last_date"] = bar_date
+    if not math.isnan(close):
+        payload["state"]["last_close"] = close
+
+
+def _copy_payload(payload: dict) -> dict:
+    """Copy the parts push_bar() mutates (cached values may be shared with the in-process cache)."""
+    return dict(
+        payload,
+        dates=list(payload["dates"]),
+        windows={w: {m: list(v) for m, v in series.items()} for w, series in payload["windows"].items()},
+        state=dict(payload["state"])
+    )
+
+
+def _trim_payload(payload: dict, max_days: int = HISTORY_SERIES_DAYS):
+    """Drop points older than max_days before the newest one (same window as the full computation)."""
+    oldest = (date.fromisoformat(payload["dates"][-1]) - timedelta(days=max_days)).isoformat()
+    drop = bisect_right(payload["dates"], oldest)
+    del payload["dates"][:drop]
+    for window_series in payload["windows"].values():
+        for values in window_series.values():
+            del values[:drop]
+
+
+def update_rolling_stats(db: Session, symbols: Sequence[str]) -> int:
+    """
+    Push bars written since each cached payload's last_date into its running state.
+    Symbols without a cached payload are skipped (the next read computes them in full).
+
+    Returns:
+        number of symbols updated
+    """
+    symbols = list(symbols)
+    keys = {rolling_key(s): s for s in symbols}
+    payloads = {keys[key]: value for key, value in get_cache_many(keys).items()}
+    if not payloads:
+        return 0
+
+    # One read from the oldest last_date covers every symbol's new bars and their benchmark
+    start_date = min(date.fromisoformat(p["state"]["last_date"]) for p in payloads.values())
+    arrays = get_price_arrays_many(db, symbols, start_date=start_date, ascending=True)
+    dates, matrix_symbols, closes = build_close_matrix(arrays)
+    if len(dates) < 2:
+        return 0
+
+    returns = np.vstack([np.full((1, len(matrix_symbols)), np.nan), simple_returns(closes)])
+    benchmark = equal_weight_returns(returns)
+    date_strings = dates.astype(str).tolist()
+
+    updated = {}
+    for symbol, cached in payloads.items():
+        if symbol not in matrix_symbols:
+            continue
+        payload = _copy_payload(cached)
+        j = matrix_symbols.index(symbol)
+        last_date = payload["state"]["last_date"]
+        windows = {key: RollingWindow.from_dict(data) for key, data in payload["state"]["windows"].items()}
+        for t in range(1, len(dates)):
+            if date_strings[t] <= last_date:
+                continue
+            push_bar(payload, windows, date_strings[t], float(closes[t, j]), float(returns[t, j]), float(benchmark[t]))
+        if payload["state"]["last_date"] != last_date:
+            payload["state"]["windows"] = {key: window.to_dict() for key, window in windows.items()}
+            _trim_payload(payload)
+            updated[rolling_key(symbol)] = payload
+
+    if updated:
+        set_cache_many(updated, expire_seconds=ROLLING_CACHE_TTL)
+    return len(updated)
+
+
+def slice_rolling(payload: dict, period_days: int, windows: Optional[Sequence[int]] = None) -> dict:
+    """
+    The last period_days (calendar) of a payload, newest first, without the running state.
+    """
+    dates = payload["dates"]
+    cutoff = (date.fromisoformat(dates[-1]) - timedelta(days=period_days)).isoformat() if dates else ""
+    start = bisect_right(dates, cutoff)
+    selected = [str(w) for w in windows] if windows else list(payload["windows"])
+    return {
+        "dates": dates[start:][::-1],
+        "windows": {
+            w: {metric: values[start:][::-1] for metric, values in payload["windows"][w].items()}
+            for w in selected if w in payload["windows"]
+        }
+    }
@@ -0,0 +1,286 @@
+"""
+CACHE SERIALIZERS - Encoding of values stored in Redis
+- orjson (default): fast JSON for every key
+- columnar (CACHE_HISTORY_FORMAT=columnar): history payloads packed as one array per OHLCV field
+  (int32 epoch-day dates, float64 prices, int64 volume) instead of
+  ~1,260 dicts with repeated key names
+- matrix (cov:* keys): covariance payloads as a float64 mean vector plus the packed
+  upper triangle of the symmetric matrix, n(n+1)/2 floats instead of n² JSON numbers
+- Optional compression: zlib (stdlib), zstd or lz4 if installed
+- Encoded values start with a 3-byte header (0x00, codec, compression);
+  anything else is treated as legacy plain JSON so old entries stay readable
+- Used by: services/cache.py
+"""
+import json
+import os
+import struct
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import orjson
+
+
+MAGIC = b"\x00"
+
+CODEC_ORJSON = b"O"
+CODEC_COLUMNAR = b"C"
+CODEC_MATRIX = b"M"
+
+COMPRESSION_NONE = b"N"
+COMPRESSION_ZLIB = b"Z"
+COMPRESSION_ZSTD = b"S"
+COMPRESSION_LZ4 = b"L"
+
+# Payloads smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+OHLCV_FIELDS = ("date", "open", "high", "low", "close", "volume")
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+_COLUMNAR_HEADER = struct.Struct("<II")  # meta length, row count
+_MATRIX_HEADER = struct.Struct("<II")    # meta length, matrix size
+
+
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+
+def _load_compressors() -> Dict[bytes, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    """Find which compression libraries are installed."""
+    compressors = {
+        COMPRESSION_ZLIB: (lambda b: zlib.compress(b, 1), zlib.decompress),
+    }
+    try:
+        import zstandard
+        compressors[COMPRESSION_ZSTD] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress
+        )
+    except ImportError:
+        pass
+    try:
+        import lz4.frame
+        compressors[COMPRESSION_LZ4] = (lz4.frame.compress, lz4.frame.decompress)
+    except ImportError:
+        pass
+    return compressors
+
+
+_COMPRESSORS = _load_compressors()
+
+_COMPRESSION_NAMES = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+    "lz4": COMPRESSION_LZ4,
+}
+
+
+def _resolve_compression(name: str) -> bytes:
+    flag = _COMPRESSION_NAMES.get((name or "none").lower(), COMPRESSION_NONE)
+    if flag != COMPRESSION_NONE and flag not in _COMPRESSORS:
+        print(f"Cache compression '{name}' not installed, storing uncompressed")
+        return COMPRESSION_NONE
+    return flag
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+def _encode_orjson(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _decode_orjson(payload: bytes) -> Any:
+    return orjson.loads(payload)
+
+
+def _is_ohlcv_rows(rows: Any) -> bool:
+    return (
+        isinstance(rows, list)
+        and len(rows) > 0
+        and all(isinstance(row, dict) and row.keys() == set(OHLCV_FIELDS) for row in rows)
+    )
+
+
+def _encode_columnar(value: Any) -> Optional[bytes]:
+    """
+    Pack a history payload ({..., "data": [{date, open, ...}, ...]}).
+    Returns None if the value doesn't have that shape.
+    """
+    if not isinstance(value, dict) or not _is_ohlcv_rows(value.get("data")):
+        return None
+
+    rows = value["data"]
+    try:
+        dates = np.array([row["date"] for row in rows], dtype="datetime64[D]").astype("<i4")
+        prices = np.array(
+            [(row["open"], row["high"], row["low"], row["close"]) for row in rows], dtype="<f8"
+        )
+        volume = np.array([row["volume"] for row in rows], dtype="<i8")
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+    meta = orjson.dumps({k: v for k, v in value.items() if k != "data"})
+    # Pad with JSON whitespace so the float/int arrays start 8-byte aligned
+    meta += b" " * (-len(meta) % 8)
+    return b"".join([
+        _COLUMNAR_HEADER.pack(len(meta), len(rows)),
+        meta,
+        # Column-major so each field is one contiguous array
+        np.ascontiguousarray(prices.T).tobytes(),
+        volume.tobytes(),
+        dates.tobytes(),
+    ])
+
+
+def decode_columnar_arrays(payload: bytes) -> Tuple[dict, Dict[str, np.ndarray]]:
+    """
+    Unpack a columnar payload into (meta, {"date": int32 epoch-days, "open": float64, ...}).
+    The arrays are read-only views over the payload.
+    """
+    meta_len, n = _COLUMNAR_HEADER.unpack_from(payload, 0)
+    offset = _COLUMNAR_HEADER.size
+    meta = orjson.loads(payload[offset:offset + meta_len])
+    offset += meta_len
+
+    columns = {}
+    for field in PRICE_FIELDS:
+        columns[field] = np.frombuffer(payload, dtype="<f8", count=n, offset=offset)
+        offset += 8 * n
+    columns["volume"] = np.frombuffer(payload, dtype="<i8", count=n, offset=offset)
+    offset += 8 * n
+    columns["date"] = np.frombuffer(payload, dtype="<i4", count=n, offset=offset)
+    return meta, columns
+
+
+def _decode_columnar(payload: bytes) -> Any:
+    meta, columns = decode_columnar_arrays(payload)
+    rows = zip(
+        columns["date"].astype("datetime64[D]").astype(str).tolist(),
+        columns["open"].tolist(),
+        columns["high"].tolist(),
+        columns["low"].tolist(),
+        columns["close"].tolist(),
+        columns["volume"].tolist()
+    )
+    value = dict(meta)
+    value["data"] = [
+        {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": v}
+        for d, o, h, l, c, v in rows
+    ]
+    return value
+
+
+def _encode_matrix(value: Any) -> Optional[bytes]:
+    """
+    Pack a covariance payload ({..., "mean": (n,), "matrix": (n, n) symmetric}).
+    Returns None if the value doesn't have that shape.
+    """
+    if not isinstance(value, dict):
+        return None
+    matrix, mean = value.get("matrix"), value.get("mean")
+    if not isinstance(matrix, np.ndarray) or not isinstance(mean, np.ndarray):
+        return None
+    n = len(mean)
+    if matrix.shape != (n, n):
+        return None
+
+    meta = orjson.dumps({k: v for k, v in value.items() if k not in ("matrix", "mean")})
+    meta += b" " * (-len(meta) % 8)
+    return b"".join([
+        _MATRIX_HEADER.pack(len(meta), n),
+        meta,
+        mean.astype("<f8").tobytes(),
+        matrix[np.triu_indices(n)].astype("<f8").tobytes(),
+    ])
+
+
+def _decode_matrix(payload: bytes) -> Any:
+    meta_len, n = _MATRIX_HEADER.unpack_from(payload, 0)
+    offset = _MATRIX_HEADER.size
+    value = orjson.loads(payload[offset:offset + meta_len])
+    offset += meta_len
+
+    value["mean"] = np.frombuffer(payload, dtype="<f8", count=n, offset=offset)
+    offset += 8 * n
+    packed = np.frombuffer(payload, dtype="<f8", count=n * (n + 1) // 2, offset=offset)
+    upper = np.triu_indices(n)
+    matrix = np.empty((n, n))
+    matrix[upper] = packed
+    matrix[upper[1], upper[0]] = packed
+    value["matrix"] = matrix
+    return value
+
+
+_DECODERS = {
+    CODEC_ORJSON: _decode_orjson,
+    CODEC_COLUMNAR: _decode_columnar,
+    CODEC_MATRIX: _decode_matrix,
+}
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class Serializer:
+    """
+    Encodes values with a preferred codec and optional compression.
+    decode() understands every codec plus legacy plain JSON.
+    """
+
+    def __init__(self, codec: bytes = CODEC_ORJSON, compression: str = "none"):
+        self.codec = codec
+        self.compression = _resolve_compression(compression)
+
+    def encode(self, value: Any) -> bytes:
+        codec, payload = self.codec, None
+        if codec == CODEC_COLUMNAR:
+            payload = _encode_columnar(value)
+        elif codec == CODEC_MATRIX:
+            payload = _encode_matrix(value)
+        if payload is None:
+            codec, payload = CODEC_ORJSON, _encode_orjson(value)
+
+        compression = self.compression
+        if compression == COMPRESSION_NONE or len(payload) < COMPRESS_MIN_BYTES:
+            compression = COMPRESSION_NONE
+        else:
+            payload = _COMPRESSORS[compression][0](payload)
+        return MAGIC + codec + compression + payload
+
+    @staticmethod
+    def decode(raw: bytes) -> Any:
+        if not raw.startswith(MAGIC):
+            # Legacy entry written with json.dumps before the serializer existed
+            return json.loads(raw)
+
+        codec, compression, payload = raw[1:2], raw[2:3], raw[3:]
+        if compression != COMPRESSION_NONE:
+            if compression not in _COMPRESSORS:
+                raise ValueError(f"Cache entry uses unavailable compression {compression!r}")
+            payload = _COMPRESSORS[compression][1](payload)
+        return _DECODERS[codec](payload)
+
+
+DEFAULT_SERIALIZER = Serializer(CODEC_ORJSON)
+# CACHE_HISTORY_FORMAT=columnar halves history bytes; orjson is faster when callers need dict rows
+HISTORY_SERIALIZER = Serializer(
+    CODEC_COLUMNAR if os.getenv("CACHE_HISTORY_FORMAT", "orjson") == "columnar" else CODEC_ORJSON,
+    compression=os.getenv("CACHE_COMPRESSION", "none")
+)
+MATRIX_SERIALIZER = Serializer(CODEC_MATRIX)
+
+
+def serializer_for_key(key: str) -> Serializer:
+    """
+    Pick the serializer for a cache key (history:* → HISTORY_SERIALIZER, cov:* → MATRIX_SERIALIZER).
+    """
+    if key.startswith("history:"):
+        return HISTORY_SERIALIZER
+    if key.startswith("cov:"):
+        return MATRIX_SERIALIZER
+    return DEFAULT_SERIALIZER
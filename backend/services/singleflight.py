@@ -0,0 +1,161 @@
+"""
+SINGLE-FLIGHT LOADER - Request coalescing for cache misses
+- Only one load per cache key runs at a time, everyone else awaits its result
+- In-process: concurrent requests share one asyncio future per key
+- Across uvicorn workers: a short-lease Redis lock (lock:<key>) elects the loader,
+  the other workers poll the cache until the value shows up
+- Stale-while-revalidate: values are stored for ttl + stale_ttl seconds; once they
+  pass ttl they're still served while one background refresh runs
+- Redis calls (cache reads/writes, lock set/eval) run off the event loop
+  through services/cache.py's *_async variants and run_cache()
+- Used by: /api/price and /api/history (cache → DB → API chain)
+"""
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from services.cache import redis_client, run_cache, get_cache_async, get_cache_with_ttl_async, set_cache_async
+
+
+LOCK_PREFIX = "lock:"
+LOCK_LEASE_SECONDS = 5.0
+LOCK_POLL_SECONDS = 0.05
+
+# Compare-and-delete so a worker never releases a lock it no longer owns
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+Loader = Callable[[], Awaitable[Tuple[Any, str]]]
+
+_inflight: Dict[str, asyncio.Future] = {}
+_background: Set[asyncio.Task] = set()
+
+
+def _acquire_lock(key: str, lease_seconds: float) -> Optional[str]:
+    """Try to take the cross-worker lock for key. Returns a token if acquired."""
+    token = uuid.uuid4().hex
+    try:
+        if redis_client.set(f"{LOCK_PREFIX}{key}", token, nx=True, px=int(lease_seconds * 1000)):
+            return token
+        return None
+    except Exception as e:
+        # Redis down - fall back to in-process coalescing only
+        print(f"Lock acquire error: {e}")
+        return token
+
+
+def _release_lock(key: str, token: str):
+    try:
+        redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, f"{LOCK_PREFIX}{key}", token)
+    except Exception as e:
+        print(f"Lock release error: {e}")
+
+
+async def _wait_for_other_worker(key: str, lease_seconds: float) -> Optional[Any]:
+    """Poll the cache while another worker holds the lock (at most one lease)."""
+    deadline = time.monotonic() + lease_seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+        value = await get_cache_async(key)
+        if value is not None:
+            return value
+    return None
+
+
+async def _load(
+    key: str,
+    loader: Loader,
+    ttl: int,
+    stale_ttl: int,
+    cacheable: Callable[[Any], bool],
+    lease_seconds: float
+) -> Tuple[Any, str]:
+    """Run the loader under the cross-worker lock and cache its result."""
+    token = await run_cache(_acquire_lock, key, lease_seconds)
+    if token is None:
+        value = await _wait_for_other_worker(key, lease_seconds)
+        if value is not None:
+            return value, "cache"
+        # Lease ran out without a value - load it ourselves
+        token = await run_cache(_acquire_lock, key, lease_seconds)
+
+    try:
+        value, source = await loader()
+        if value is not None and cacheable(value):
+            await set_cache_async(key, value, expire_seconds=ttl + stale_ttl)
+        return value, source
+    finally:
+        if token is not None:
+            await run_cache(_release_lock, key, token)
+
+
+async def _coalesced(key: str, *args) -> Tuple[Any, str]:
+    """Share one in-flight load per key within this process."""
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    # Nobody may await a failed background refresh - mark the exception as retrieved
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        result = await _load(key, *args)
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def _refresh_in_background(key: str, *args):
+    """Start a refresh for key unless one is already running."""
+    if key in _inflight:
+        return
+    task = asyncio.create_task(_coalesced(key, *args))
+    _background.add(task)
+
+    def _done(t: asyncio.Task):
+        _background.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            print(f"Background refresh failed for {key}: {t.exception()}")
+
+    task.add_done_callback(_done)
+
+
+async def load_with_singleflight(
+    key: str,
+    loader: Loader,
+    ttl: int,
+    stale_ttl: int = 0,
+    cacheable: Callable[[Any], bool] = lambda value: True,
+    lease_seconds: float = LOCK_LEASE_SECONDS
+) -> Tuple[Any, str]:
+    """
+    Get a cached value or load it, with at most one load per key in flight.
+
+    Args:
+        key: Redis cache key
+        loader: async function returning (value, source), e.g. DB then API
+        ttl: seconds the value counts as fresh
+        stale_ttl: extra seconds an expired value may be served while it refreshes
+        cacheable: predicate deciding whether a loaded value gets cached
+        lease_seconds: cross-worker lock lease (should exceed a typical load)
+
+    Returns:
+        (value, source) where source is "cache" or whatever the loader reported
+    """
+    cached, ttl_left = await get_cache_with_ttl_async(key)
+    if cached is not None:
+        if stale_ttl and ttl_left is not None and ttl_left <= stale_ttl:
+            _refresh_in_background(key, loader, ttl, stale_ttl, cacheable, lease_seconds)
+        return cached, "cache"
+
+    return await _coalesced(key, loader, ttl, stale_ttl, cacheable, lease_seconds)
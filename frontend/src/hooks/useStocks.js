@@ -1,5 +1,7 @@
-import { useQuery } from '@tanstack/react-query';
+import { useEffect } from 'react';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { stocksApi } from '../services/api';
+import { subscribePrice } from '../services/priceStream';
 
 export const useStocks = (sector = null) => {
   return useQuery({
@@ -16,18 +18,32 @@ export const useSectors = () => {
 };
 
 export const useCurrentPrice = (symbol) => {
+  const queryClient = useQueryClient();
+
+  // Live updates are pushed over the shared price stream (no polling)
+  useEffect(() => {
+    if (!symbol) return undefined;
+    return subscribePrice(symbol, (message) => {
+      queryClient.setQueryData(['price', symbol], (current) =>
+        current ? { ...current, data: message.data, source: 'stream' } : current
+      );
+    });
+  }, [symbol, queryClient]);
+
   return useQuery({
     queryKey: ['price', symbol],
     queryFn: () => stocksApi.getCurrentPrice(symbol),
     enabled: !!symbol,
-    refetchInterval: 60000, // Refetch every minute for current price
   });
 };
 
-export const useStockHistory = (symbol, period = '6mo') => {
+// Charts never need more bars than they have pixels - long periods are downsampled server-side
+const HISTORY_MAX_POINTS = 300;
+
+export const useStockHistory = (symbol, period = '6mo', maxPoints = HISTORY_MAX_POINTS) => {
   return useQuery({
-    queryKey: ['history', symbol, period],
-    queryFn: () => stocksApi.getHistory(symbol, period),
+    queryKey: ['history', symbol, period, maxPoints],
+    queryFn: () => stocksApi.getHistory(symbol, period, { maxPoints }),
     enabled: !!symbol,
   });
 };
@@ -1,8 +1,10 @@
 import axios from 'axios';
 
+export const API_BASE_URL = 'http://localhost:8000';
+
 // Create axios instance with base configuration
 const api = axios.create({
-  baseURL: 'http://localhost:8000',
+  baseURL: API_BASE_URL,
   timeout: 10000,
   headers: {
     'Content-Type': 'application/json',
@@ -51,8 +53,29 @@ export const stocksApi = {
   },
 
   // Get historical price data
-  getHistory: async (symbol, period = '6mo') => {
-    return api.get('/api/history', { params: { symbol, period } });
+  // interval: '1d' | '1w' | '1mo' candles; maxPoints: LTTB-downsample to at most this many bars
+  getHistory: async (symbol, period = '6mo', { interval = '1d', maxPoints = null } = {}) => {
+    const params = { symbol, period, interval };
+    if (maxPoints) params.max_points = maxPoints;
+    return api.get('/api/history', { params });
+  },
+
+  // Get historical price data with rolling SMA / volatility / correlation
+  getRollingHistory: async (symbol, period = '1y', windows = null) => {
+    const params = windows ? { symbol, period, windows: windows.join(',') } : { symbol, period };
+    return api.get('/api/history/rolling', { params });
+  },
+
+  // Get current prices for several stocks in one request
+  getPrices: async (symbols) => {
+    const symbolsStr = Array.isArray(symbols) ? symbols.join(',') : symbols;
+    return api.get('/api/prices', { params: { symbols: symbolsStr } });
+  },
+
+  // Get historical price data for several stocks in one request
+  getHistoryBatch: async (symbols, period = '6mo') => {
+    const symbolsStr = Array.isArray(symbols) ? symbols.join(',') : symbols;
+    return api.get('/api/history/batch', { params: { symbols: symbolsStr, period } });
   },
 
   // Get stock analysis summary
@@ -65,6 +88,12 @@ export const stocksApi = {
     const symbolsStr = Array.isArray(symbols) ? symbols.join(',') : symbols;
     return api.get('/api/analysis/compare', { params: { symbols: symbolsStr } });
   },
+
+  // Correlation matrix of daily returns (cached, rebuilt daily)
+  getCorrelation: async (symbols, estimator = 'ledoit_wolf', lookback = 252) => {
+    const symbolsStr = Array.isArray(symbols) ? symbols.join(',') : symbols;
+    return api.get('/api/analysis/correlation', { params: { symbols: symbolsStr, estimator, lookback } });
+  },
 };
 
 // ============================================================================
@@ -135,6 +164,11 @@ export const portfolioApi = {
   getTransactions: async (portfolioId, limit = 50) => {
     return api.get(`/api/portfolio/${portfolioId}/transactions`, { params: { limit } });
   },
+
+  // Optimal weights (mode: max_sharpe, min_variance, target_return, frontier)
+  optimize: async (symbols, options = {}) => {
+    return api.post('/api/portfolio/optimize', { symbols, ...options });
+  },
 };
 
 // ============================================================================
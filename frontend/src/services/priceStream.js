@@ -0,0 +1,91 @@
+import { API_BASE_URL } from './api';
+
+// ============================================================================
+// LIVE PRICE STREAM
+// One shared connection per tab for every subscribed symbol: /ws/prices,
+// or Server-Sent Events (/api/stream/prices) if the WebSocket can't connect
+// ============================================================================
+
+const listeners = new Map(); // symbol -> Set of callbacks
+let socket = null;
+let eventSource = null;
+let useSse = false;
+let retryTimer = null;
+let retryDelay = 1000;
+
+const subscribedSymbols = () => [...listeners.keys()];
+
+const dispatch = (message) => {
+  if (message.type !== 'price') return;
+  listeners.get(message.symbol)?.forEach((callback) => callback(message));
+};
+
+const send = (action, symbols) => {
+  if (socket?.readyState === WebSocket.OPEN) {
+    socket.send(JSON.stringify({ action, symbols }));
+  }
+};
+
+const scheduleReconnect = () => {
+  if (!listeners.size || retryTimer) return;
+  retryTimer = setTimeout(() => {
+    retryTimer = null;
+    connect();
+  }, retryDelay);
+  retryDelay = Math.min(retryDelay * 2, 30000);
+};
+
+const connectWebSocket = () => {
+  let opened = false;
+  socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/ws/prices`);
+  socket.onopen = () => {
+    opened = true;
+    retryDelay = 1000;
+    if (listeners.size) send('subscribe', subscribedSymbols());
+  };
+  socket.onmessage = (event) => dispatch(JSON.parse(event.data));
+  socket.onclose = () => {
+    socket = null;
+    if (!opened) useSse = true; // blocked by a proxy etc. - fall back to SSE
+    scheduleReconnect();
+  };
+};
+
+// SSE subscriptions are fixed per request, so the symbol set is changed by reconnecting
+// (EventSource retries dropped connections by itself)
+const connectEventSource = () => {
+  eventSource?.close();
+  eventSource = null;
+  if (!listeners.size) return;
+  const symbols = subscribedSymbols().join(',');
+  eventSource = new EventSource(`${API_BASE_URL}/api/stream/prices?symbols=${symbols}`);
+  eventSource.addEventListener('price', (event) => dispatch(JSON.parse(event.data)));
+};
+
+const connect = () => {
+  if (useSse) connectEventSource();
+  else if (!socket) connectWebSocket();
+};
+
+// Call `callback` with every pushed update for `symbol`. Returns the unsubscribe function.
+export const subscribePrice = (symbol, callback) => {
+  const isNew = !listeners.has(symbol);
+  if (isNew) listeners.set(symbol, new Set());
+  listeners.get(symbol).add(callback);
+
+  if (isNew) {
+    if (useSse) connectEventSource();
+    else if (socket) send('subscribe', [symbol]);
+    else connect();
+  }
+
+  return () => {
+    const callbacks = listeners.get(symbol);
+    if (!callbacks) return;
+    callbacks.delete(callback);
+    if (callbacks.size) return;
+    listeners.delete(symbol);
+    if (useSse) connectEventSource();
+    else send('unsubscribe', [symbol]);
+  };
+};